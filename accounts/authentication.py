@@ -0,0 +1,93 @@
+"""
+JWT authentication with the user loaded from the cache.
+
+JWTAuthentication reads the user row on every request. Here the user is
+cached by id for PLANETARIUM_USER_CACHE_TIMEOUT seconds, and dropped
+from the cache whenever it is saved or deleted (see accounts.signals),
+so deactivating a user or changing a password takes effect at once.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+USER_CACHE_KEY = "jwt_user:{user_id}"
+USER_CACHE_TIMEOUT = 60 * 5
+
+
+def _user_key(user_id):
+    return USER_CACHE_KEY.format(user_id=user_id)
+
+
+def get_cached_user(user_id):
+    """The user with this id, or None when there is no such user"""
+    key = _user_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        ).first()
+        if user is None:
+            return None
+        cache.set(
+            key,
+            user,
+            getattr(
+                settings,
+                "PLANETARIUM_USER_CACHE_TIMEOUT",
+                USER_CACHE_TIMEOUT
+            )
+        )
+    return user
+
+
+def invalidate_cached_user(user):
+    cache.delete(_user_key(getattr(user, api_settings.USER_ID_FIELD)))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication resolving the user through get_cached_user()"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(
+                _("User not found"),
+                code="user_not_found"
+            )
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"),
+                code="user_inactive"
+            )
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."),
+                code="password_changed"
+            )
+        return user
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """Document CachedJWTAuthentication like JWTAuthentication"""
+
+    target_class = CachedJWTAuthentication
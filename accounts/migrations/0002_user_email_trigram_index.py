@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+# icontains compiles to UPPER("email"::text) LIKE UPPER(%s) on PostgreSQL,
+# so the trigram index is built on that same expression.
+FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX user_email_trgm_idx
+    ON accounts_user
+    USING GIN (UPPER(email::text) gin_trgm_ops)
+    """,
+]
+
+BACKWARD = [
+    "DROP INDEX IF EXISTS user_email_trgm_idx",
+]
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            for statement in statements:
+                schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(FORWARD),
+            run_on_postgresql(BACKWARD),
+        ),
+    ]
@@ -1,6 +1,18 @@
-from django.contrib.auth import get_user_model
+from datetime import timedelta
 
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+
+from accounts.tokens import RefreshToken, is_blacklisted
+
+
+LAST_LOGIN_INTERVAL = timedelta(hours=1)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -24,3 +36,42 @@ class UserSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         return get_user_model().objects.create_user(**validated_data)
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    """
+    Issue tokens, recording the login at most every LAST_LOGIN_INTERVAL.
+
+    Every save of a user drops it from the authentication cache, so
+    writing last_login on each login would empty it for active users.
+    """
+
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        interval = getattr(
+            settings,
+            "PLANETARIUM_LAST_LOGIN_INTERVAL",
+            LAST_LOGIN_INTERVAL
+        )
+        last_login = self.user.last_login
+        if last_login is None or timezone.now() - last_login >= interval:
+            update_last_login(None, self.user)
+        return data
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = RefreshToken
+
+
+class TokenVerifySerializer(jwt_serializers.TokenVerifySerializer):
+    def validate(self, attrs):
+        token = UntypedToken(attrs["token"])
+        if is_blacklisted(token.get(api_settings.JTI_CLAIM)):
+            raise serializers.ValidationError("Token is blacklisted")
+        return {}
+
+
+class TokenBlacklistSerializer(jwt_serializers.TokenBlacklistSerializer):
+    token_class = RefreshToken
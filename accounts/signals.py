@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from accounts.authentication import invalidate_cached_user
+from accounts.tokens import forget_blacklisted, set_blacklisted
+
+
+@receiver([post_delete, post_save], sender=get_user_model())
+def invalidate_authenticated_user(sender, instance, **kwargs): # noqa
+    # Again on commit, in case a request cached the old row meanwhile.
+    invalidate_cached_user(instance)
+    transaction.on_commit(lambda: invalidate_cached_user(instance))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def cache_blacklisted_token(sender, instance, **kwargs): # noqa
+    # Cached as blacklisted only once that is committed; a False cached
+    # meanwhile by a concurrent lookup is overwritten then.
+    jti = instance.token.jti
+    forget_blacklisted(jti)
+    transaction.on_commit(lambda: set_blacklisted(jti, True))
+
+
+@receiver(post_delete, sender=BlacklistedToken)
+def cache_unblacklisted_token(sender, instance, **kwargs): # noqa
+    jti = instance.token.jti
+    forget_blacklisted(jti)
+    transaction.on_commit(lambda: forget_blacklisted(jti))
@@ -0,0 +1,132 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import QuerySet
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from accounts.tokens import (
+    RefreshToken,
+    forget_blacklisted,
+    is_blacklisted,
+)
+
+
+SHOW_THEME_URL = reverse("planetarium:showtheme-list")
+TOKEN_URL = reverse("accounts:token_obtain_pair")
+TOKEN_BLACKLIST_URL = reverse("accounts:token_blacklist")
+TOKEN_REFRESH_URL = reverse("accounts:token_refresh")
+TOKEN_VERIFY_URL = reverse("accounts:token_verify")
+
+
+class CachedJWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="email@email.com",
+            password="password123",
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def obtain_tokens(self):
+        res = self.client.post(
+            TOKEN_URL,
+            {"email": "email@email.com", "password": "password123"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_browsing_runs_no_user_queries(self):
+        """Test the user is loaded once, then read from the cache"""
+        access = self.obtain_tokens()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.client.get(SHOW_THEME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(SHOW_THEME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_saving_user_updates_cache(self):
+        access = self.obtain_tokens()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.client.get(SHOW_THEME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(SHOW_THEME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_last_login_recorded_once_an_hour(self):
+        self.obtain_tokens()
+        self.user.refresh_from_db()
+        last_login = self.user.last_login
+
+        self.obtain_tokens()
+        self.user.refresh_from_db()
+
+        self.assertIsNotNone(last_login)
+        self.assertEqual(self.user.last_login, last_login)
+
+    def test_rotated_refresh_token_is_blacklisted(self):
+        refresh = self.obtain_tokens()["refresh"]
+
+        res = self.client.post(TOKEN_REFRESH_URL, {"refresh": refresh})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data["refresh"], refresh)
+
+        res = self.client.post(TOKEN_REFRESH_URL, {"refresh": refresh})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_blacklist_lookups_are_cached(self):
+        refresh = self.obtain_tokens()["refresh"]
+        self.client.post(TOKEN_VERIFY_URL, {"token": refresh})
+
+        with self.assertNumQueries(0):
+            res = self.client.post(TOKEN_VERIFY_URL, {"token": refresh})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.post(TOKEN_BLACKLIST_URL, {"refresh": refresh})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.post(TOKEN_VERIFY_URL, {"token": refresh})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_lookup_does_not_overwrite_blacklisting(self):
+        """Test a lookup racing a blacklisting keeps the token revoked"""
+        refresh = self.obtain_tokens()["refresh"]
+        token = RefreshToken(refresh)
+        jti = token[api_settings.JTI_CLAIM]
+        exists = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        # Loading the token already cached its answer.
+        forget_blacklisted(jti)
+
+        def blacklisted_meanwhile():
+            with self.captureOnCommitCallbacks(execute=True):
+                token.blacklist()
+            return exists
+
+        with mock.patch.object(
+            QuerySet,
+            "exists",
+            side_effect=blacklisted_meanwhile
+        ):
+            self.assertFalse(is_blacklisted(jti))
+        self.assertTrue(is_blacklisted(jti))
+
+    def test_rolled_back_blacklisting_is_not_cached(self):
+        refresh = self.obtain_tokens()["refresh"]
+        token = RefreshToken(refresh)
+
+        with self.assertRaises(DatabaseError):
+            with transaction.atomic():
+                token.blacklist()
+                raise DatabaseError
+
+        self.assertFalse(is_blacklisted(token[api_settings.JTI_CLAIM]))
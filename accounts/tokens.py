@@ -0,0 +1,51 @@
+"""
+Refresh tokens checked against a cached blacklist.
+
+Whether a token id is blacklisted is cached for as long as a refresh
+token lives, both ways. A lookup only adds its answer, so it never
+overwrites the one accounts.signals writes when a token is blacklisted
+or taken off the blacklist.
+"""
+
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+
+BLACKLIST_CACHE_KEY = "jwt_blacklisted:{jti}"
+
+
+def _blacklist_key(jti):
+    return BLACKLIST_CACHE_KEY.format(jti=jti)
+
+
+def _timeout():
+    return int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+
+
+def is_blacklisted(jti):
+    key = _blacklist_key(jti)
+    blacklisted = cache.get(key)
+    if blacklisted is None:
+        blacklisted = BlacklistedToken.objects.filter(
+            token__jti=jti
+        ).exists()
+        cache.add(key, blacklisted, _timeout())
+    return blacklisted
+
+
+def set_blacklisted(jti, blacklisted):
+    cache.set(_blacklist_key(jti), blacklisted, _timeout())
+
+
+def forget_blacklisted(jti):
+    cache.delete(_blacklist_key(jti))
+
+
+class RefreshToken(tokens.RefreshToken):
+    def check_blacklist(self):
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
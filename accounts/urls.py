@@ -1,12 +1,13 @@
 from django.urls import path
-from rest_framework_simplejwt.views import (
+
+from accounts.views import (
+    CreateUserView,
+    TokenBlacklistView,
     TokenObtainPairView,
     TokenRefreshView,
     TokenVerifyView,
 )
 
-from accounts.views import CreateUserView
-
 app_name = "accounts"
 
 urlpatterns = [
@@ -30,4 +31,9 @@ urlpatterns = [
         TokenVerifyView.as_view(),
         name="token_verify"
     ),
+    path(
+        "token/blacklist/",
+        TokenBlacklistView.as_view(),
+        name="token_blacklist"
+    ),
 ]
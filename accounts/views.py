@@ -1,5 +1,6 @@
 from rest_framework import generics
 from rest_framework.permissions import AllowAny
+from rest_framework_simplejwt import views as jwt_views
 
 from accounts.models import User
 from accounts.serializers import UserSerializer
@@ -9,3 +10,19 @@ class CreateUserView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [AllowAny]
+
+
+class TokenObtainPairView(jwt_views.TokenObtainPairView):
+    throttle_scope = "token"
+
+
+class TokenRefreshView(jwt_views.TokenRefreshView):
+    throttle_scope = "token"
+
+
+class TokenVerifyView(jwt_views.TokenVerifyView):
+    throttle_scope = "token"
+
+
+class TokenBlacklistView(jwt_views.TokenBlacklistView):
+    throttle_scope = "token"
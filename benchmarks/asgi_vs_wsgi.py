@@ -0,0 +1,172 @@
+"""
+The catalog and schedule reads under WSGI and under ASGI.
+
+Serves one seeded database first with a WSGI server on a fixed pool of
+worker threads (as gunicorn --threads would), then with uvicorn and the
+async read endpoints, and drives both with the same virtual users. Slow
+clients, which trickle each request in a byte at a time, run alongside
+them: under WSGI each one holds a worker thread until its request is
+in, under ASGI it only holds an open socket.
+
+    python -m benchmarks.asgi_vs_wsgi --users 200 --slow-clients 16
+
+Prints the load test report of each interface, and the change from
+WSGI to ASGI, as JSON.
+"""
+
+import argparse
+import socket
+import threading
+import time
+
+from benchmarks.load_test import (
+    READ_APIS,
+    SCENARIOS,
+    compare,
+    run_users,
+    seed_load_test,
+    start_server,
+    summarize_endpoints,
+)
+from benchmarks.utils import benchmark_database, print_report, setup_django
+
+
+class SlowClient(threading.Thread):
+    """Repeats a GET, sending each request over `duration` seconds"""
+
+    def __init__(self, port, token, path, duration, stop):
+        super().__init__()
+        self.address = ("127.0.0.1", port)
+        self.request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: 127.0.0.1\r\n"
+            f"Authorization: Bearer {token}\r\n"
+            f"Connection: close\r\n\r\n"
+        ).encode()
+        self.delay = duration / len(self.request)
+        self.stop = stop
+        self.completed = 0
+
+    def send(self, connection):
+        for index in range(len(self.request)):
+            if self.stop.wait(self.delay):
+                return False
+            connection.sendall(self.request[index:index + 1])
+        while connection.recv(65536):
+            pass
+        return True
+
+    def run(self):
+        while not self.stop.is_set():
+            try:
+                with socket.create_connection(self.address) as connection:
+                    if self.send(connection):
+                        self.completed += 1
+            except OSError:
+                pass
+
+
+def run_interface(database, interface, threads, tokens, context, args):
+    server, port = start_server(database, interface, threads)
+    context = {**context, "read_api": READ_APIS[interface]}
+    stop = threading.Event()
+    slow_clients = [
+        SlowClient(
+            port,
+            tokens[index % len(tokens)],
+            f"{context['read_api']}/show-sessions/{context['popular']}/",
+            args.slow_duration,
+            stop,
+        )
+        for index in range(args.slow_clients)
+    ]
+    try:
+        for client in slow_clients:
+            client.start()
+        # Let the slow clients take their connections first.
+        time.sleep(args.slow_duration / 4)
+        samples, elapsed = run_users(
+            port,
+            tokens,
+            context,
+            SCENARIOS[args.scenario],
+            args.iterations,
+            args.seed
+        )
+    finally:
+        stop.set()
+        for client in slow_clients:
+            client.join()
+        server.terminate()
+        server.wait()
+    return {
+        "duration_s": round(elapsed, 3),
+        "slow_requests_completed": sum(
+            client.completed for client in slow_clients
+        ),
+        **summarize_endpoints(samples, elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scenario", choices=SCENARIOS, default="browse")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--domes", type=int, default=10)
+    parser.add_argument("--sessions-per-dome", type=int, default=200)
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=8,
+        help="WSGI worker threads"
+    )
+    parser.add_argument("--slow-clients", type=int, default=16)
+    parser.add_argument(
+        "--slow-duration",
+        type=float,
+        default=2.0,
+        help="seconds a slow client takes to send a request"
+    )
+    args = parser.parse_args()
+
+    setup_django()
+
+    with benchmark_database() as connection:
+        tokens, context = seed_load_test(
+            args.users,
+            args.domes,
+            args.sessions_per_dome
+        )
+        database = connection.settings_dict["NAME"]
+        connection.close()
+
+        report = {
+            "scenario": args.scenario,
+            "backend": connection.vendor,
+            "users": args.users,
+            "iterations": args.iterations,
+            "seed": args.seed,
+            "wsgi_threads": args.threads,
+            "slow_clients": args.slow_clients,
+        }
+        for interface, threads in (("wsgi", args.threads), ("asgi", None)):
+            report[interface] = run_interface(
+                database,
+                interface,
+                threads,
+                tokens,
+                context,
+                args
+            )
+        report["change"] = compare(report["asgi"], report["wsgi"])
+
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
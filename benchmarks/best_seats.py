@@ -0,0 +1,66 @@
+"""
+Timings of the best-available seat finder on large domes.
+
+Fills seat maps at random to several occupancy levels and times
+SeatMap.best_seats for groups of different sizes. Needs no database.
+
+The slowest case is a group that no row has room for, split over the
+scattered free seats of a nearly full dome (count=10 at 98%).
+
+    python -m benchmarks.best_seats
+"""
+
+import argparse
+import random
+
+from benchmarks.utils import measure, print_report, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=60)
+    parser.add_argument("--seats-in-row", type=int, default=80)
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from planetarium.seat_map import SeatMap
+
+    rng = random.Random(args.seed)
+    seats = [
+        (row, seat)
+        for row in range(1, args.rows + 1)
+        for seat in range(1, args.seats_in_row + 1)
+    ]
+    report = {
+        "rows": args.rows,
+        "seats_in_row": args.seats_in_row,
+        "capacity": len(seats),
+        "results": [],
+    }
+    for occupancy in (0.0, 0.5, 0.9, 0.98):
+        seat_map = SeatMap(args.rows, args.seats_in_row)
+        for row, seat in rng.sample(seats, int(len(seats) * occupancy)):
+            seat_map.set(row, seat, True)
+        for count in (1, 4, 10):
+            found = seat_map.best_seats(count)
+            report["results"].append({
+                "occupancy": occupancy,
+                "count": count,
+                "found": None if found is None else len(found),
+                "rows_used": (
+                    None if found is None
+                    else len({row for row, _ in found})
+                ),
+                "timing": measure(
+                    lambda: seat_map.best_seats(count),
+                    args.repeat
+                ),
+            })
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
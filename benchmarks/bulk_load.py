@@ -0,0 +1,175 @@
+"""
+Importing tickets with loaddata against the bulk_load command.
+
+Seeds a schedule and users, writes the same reservations and tickets as
+a Django JSON fixture and as an NDJSON file, then loads each into a
+fresh database. Reports the time taken, rows per second and the peak
+memory traced while loading:
+
+    python -m benchmarks.bulk_load --tickets 10000 100000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+
+from benchmarks.utils import (
+    benchmark_database,
+    print_report,
+    seed_schedule,
+    setup_django,
+)
+
+
+SEATS_PER_RESERVATION = 4
+
+
+def seed(users):
+    from django.contrib.auth import get_user_model
+
+    seed_schedule(domes=5, shows=10, sessions_per_dome=200)
+    get_user_model().objects.bulk_create(
+        (
+            get_user_model()(email=f"visitor{i}@example.com", password="!")
+            for i in range(users)
+        ),
+        batch_size=1000,
+    )
+
+
+def ticket_rows(count, users):
+    """Fill sessions seat by seat, four seats per reservation"""
+    from django.contrib.auth import get_user_model
+
+    from planetarium.models import ShowSession
+
+    user_ids = dict(get_user_model().objects.values_list("email", "pk"))
+    sessions = ShowSession.objects.select_related(
+        "astronomy_show", "planetarium_dome"
+    ).order_by("pk")
+    made = 0
+    for show_session in sessions.iterator():
+        dome = show_session.planetarium_dome
+        for index in range(dome.rows * dome.seats_in_row):
+            if made == count:
+                return
+            reservation = made // SEATS_PER_RESERVATION
+            email = f"visitor{reservation % users}@example.com"
+            yield {
+                "show_session": show_session.pk,
+                "astronomy_show": show_session.astronomy_show.title,
+                "planetarium_dome": dome.name,
+                "show_time": show_session.show_time.isoformat(),
+                "row": index // dome.seats_in_row + 1,
+                "seat": index % dome.seats_in_row + 1,
+                "user": email,
+                "user_id": str(user_ids[email]),
+                "reservation": reservation + 1,
+            }
+            made += 1
+
+
+def write_files(directory, count, users):
+    fixture = os.path.join(directory, "tickets.json")
+    ndjson = os.path.join(directory, "tickets.ndjson")
+    with open(fixture, "w") as json_file, open(ndjson, "w") as ndjson_file:
+        objects = []
+        for pk, row in enumerate(ticket_rows(count, users), 1):
+            if (pk - 1) % SEATS_PER_RESERVATION == 0:
+                objects.append({
+                    "model": "planetarium.reservation",
+                    "pk": row["reservation"],
+                    "fields": {
+                        "created_at": "2030-01-01T00:00:00Z",
+                        "user": row["user_id"],
+                    },
+                })
+            objects.append({
+                "model": "planetarium.ticket",
+                "pk": pk,
+                "fields": {
+                    "row": row["row"],
+                    "seat": row["seat"],
+                    "show_session": row["show_session"],
+                    "reservation": row["reservation"],
+                },
+            })
+            del row["show_session"], row["user_id"]
+            ndjson_file.write(json.dumps(row) + "\n")
+        json.dump(objects, json_file)
+    return fixture, ndjson
+
+
+def run(command, *args):
+    from django.core.management import call_command
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    call_command(command, *args, stdout=StringIO(), stderr=StringIO())
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--tickets",
+        type=int,
+        nargs="+",
+        default=[10000, 50000],
+        help="tickets to import"
+    )
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from planetarium.models import Ticket
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.tickets:
+            result = {"tickets": count}
+            for name in ("loaddata", "bulk_load"):
+                with benchmark_database():
+                    seed(args.users)
+                    fixture, ndjson = write_files(
+                        directory, count, args.users
+                    )
+                    if name == "loaddata":
+                        elapsed, peak = run("loaddata", fixture)
+                    else:
+                        elapsed, peak = run(
+                            "bulk_load",
+                            "--tickets", ndjson,
+                            "--batch-size", str(args.batch_size)
+                        )
+                    loaded = Ticket.objects.count()
+                result[name] = {
+                    "loaded": loaded,
+                    "seconds": round(elapsed, 2),
+                    "rows_per_second": round(loaded / elapsed),
+                    "peak_memory_mb": round(peak / 2 ** 20, 1),
+                }
+            result["speedup"] = round(
+                result["loaddata"]["seconds"]
+                / result["bulk_load"]["seconds"],
+                2
+            )
+            results.append(result)
+
+    print_report({"batch_size": args.batch_size, "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Requests per second with and without database connection pooling.
+
+Serves one seeded PostgreSQL database with a WSGI server on a fixed
+pool of worker threads, once per connection mode, and drives each with
+the same virtual users:
+
+- "per_request" opens a connection for every request (CONN_MAX_AGE=0,
+  what production did before pooling);
+- "persistent" keeps a connection per worker thread (CONN_MAX_AGE);
+- "pool" shares a psycopg pool between the threads.
+
+Point DJANGO_SETTINGS_MODULE at settings using PostgreSQL:
+
+    python -m benchmarks.db_pool --users 50 --threads 8 --pool-size 4
+
+Prints the load test report of each mode, and the change from
+per_request to the others, as JSON.
+"""
+
+import argparse
+
+from benchmarks.load_test import (
+    SCENARIOS,
+    compare,
+    run_users,
+    seed_load_test,
+    start_server,
+    summarize_endpoints,
+)
+from benchmarks.utils import benchmark_database, print_report, setup_django
+
+
+def connection_modes(options, pool_size):
+    """The database settings of every mode, on top of `options`"""
+    options = {
+        name: value for name, value in options.items() if name != "pool"
+    }
+    return {
+        "per_request": {"CONN_MAX_AGE": 0, "OPTIONS": options},
+        "persistent": {
+            "CONN_MAX_AGE": 60,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": options,
+        },
+        "pool": {
+            "CONN_MAX_AGE": 0,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                **options,
+                "pool": {"min_size": pool_size, "max_size": pool_size},
+            },
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scenario", choices=SCENARIOS, default="browse")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--domes", type=int, default=10)
+    parser.add_argument("--sessions-per-dome", type=int, default=200)
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=8,
+        help="WSGI worker threads"
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=4,
+        help="connections in the pool"
+    )
+    args = parser.parse_args()
+
+    setup_django()
+
+    with benchmark_database() as connection:
+        if connection.vendor != "postgresql":
+            parser.error("DJANGO_SETTINGS_MODULE must use PostgreSQL.")
+        tokens, context = seed_load_test(
+            args.users,
+            args.domes,
+            args.sessions_per_dome
+        )
+        context["read_api"] = "/api/planetarium"
+        database = connection.settings_dict["NAME"]
+        modes = connection_modes(
+            connection.settings_dict["OPTIONS"],
+            args.pool_size
+        )
+        connection.close()
+
+        report = {
+            "scenario": args.scenario,
+            "users": args.users,
+            "iterations": args.iterations,
+            "seed": args.seed,
+            "wsgi_threads": args.threads,
+            "pool_size": args.pool_size,
+        }
+        for mode, database_settings in modes.items():
+            server, port = start_server(
+                database,
+                threads=args.threads,
+                database_settings=database_settings
+            )
+            try:
+                samples, elapsed = run_users(
+                    port,
+                    tokens,
+                    context,
+                    SCENARIOS[args.scenario],
+                    args.iterations,
+                    args.seed
+                )
+            finally:
+                server.terminate()
+                server.wait()
+            report[mode] = {
+                "duration_s": round(elapsed, 3),
+                **summarize_endpoints(samples, elapsed),
+            }
+        report["change"] = {
+            mode: {
+                **compare(
+                    {"endpoints": {"total": report[mode]["total"]}},
+                    {"endpoints": {"total": report["per_request"]["total"]}}
+                ),
+                **compare(report[mode], report["per_request"]),
+            }
+            for mode in ("persistent", "pool")
+        }
+
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
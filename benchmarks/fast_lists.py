@@ -0,0 +1,129 @@
+"""
+Serializing and rendering a list page, with and without fast lists.
+
+"model" is the ModelSerializer and JSONRenderer path; "fast" is the
+.values() rows, ValuesListSerializer and FastJSONRenderer path that
+PLANETARIUM_FAST_LISTS turns on. Both start from the viewset's list
+queryset and produce the same bytes, which is checked first.
+
+    python -m benchmarks.fast_lists --page-sizes 10 100 1000
+"""
+
+import argparse
+
+from benchmarks.utils import (
+    benchmark_database,
+    measure,
+    print_report,
+    seed_schedule,
+    seed_tickets,
+    setup_django,
+)
+
+
+def list_view(viewset_class, user):
+    """A viewset set up to serve a list request from `user`"""
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    request = APIRequestFactory().get("/")
+    request.user = user
+    view = viewset_class(action="list", format_kwarg=None)
+    view.request = Request(request)
+    view.request.user = user
+    view.args, view.kwargs = (), {}
+    return view
+
+
+def render_model(view, page_size):
+    from rest_framework.renderers import JSONRenderer
+
+    page = view.filter_queryset(view.get_queryset())[:page_size]
+    data = view.get_serializer(page, many=True).data
+    return JSONRenderer().render(data)
+
+
+def render_fast(view, page_size):
+    from planetarium.fast_lists import FastJSONRenderer
+
+    serializer = view.fast_list_serializer_class(
+        context=view.get_serializer_context()
+    )
+    page = serializer.values(view.filter_queryset(view.get_queryset()))
+    data = serializer.to_representation(page[:page_size])
+    return FastJSONRenderer().render(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--domes", type=int, default=5)
+    parser.add_argument("--sessions-per-dome", type=int, default=400)
+    parser.add_argument("--tickets-per-session", type=int, default=10)
+    parser.add_argument(
+        "--page-sizes",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000]
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+
+    from planetarium.fast_lists import orjson
+    from planetarium.views import (
+        AstronomyShowViewSet,
+        ShowSessionViewSet,
+        TicketViewSet,
+    )
+
+    with benchmark_database() as connection:
+        seed_schedule(
+            domes=args.domes,
+            shows=max(args.page_sizes),
+            sessions_per_dome=args.sessions_per_dome
+        )
+        seed_tickets(tickets_per_session=args.tickets_per_session)
+        admin = get_user_model().objects.create_superuser(
+            email="admin@example.com",
+            password="!"
+        )
+
+        report = {
+            "backend": connection.vendor,
+            "orjson": orjson is not None,
+        }
+        for name, viewset_class in (
+            ("astronomy_shows", AstronomyShowViewSet),
+            ("show_sessions", ShowSessionViewSet),
+            ("tickets", TicketViewSet),
+        ):
+            view = list_view(viewset_class, admin)
+            report[name] = {}
+            for page_size in args.page_sizes:
+                model = render_model(view, page_size)
+                assert render_fast(view, page_size) == model, name
+                timings = {
+                    "bytes": len(model),
+                    "model": measure(
+                        lambda: render_model(view, page_size),
+                        args.repeat
+                    ),
+                    "fast": measure(
+                        lambda: render_fast(view, page_size),
+                        args.repeat
+                    ),
+                }
+                timings["speedup"] = round(
+                    timings["model"]["median_ms"]
+                    / timings["fast"]["median_ms"],
+                    2
+                )
+                report[name][page_size] = timings
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,513 @@
+"""
+HTTP load test for browsing and the booking rush on a popular session.
+
+Seeds a throwaway database, serves it from a separate process with
+Django's threaded WSGI server (or, with --interface asgi, uvicorn and
+the async read endpoints) and drives it with concurrent virtual users.
+Prints p50/p95/p99 latency, requests per second and error rate per
+endpoint as JSON. The run is reproducible for a given --seed.
+
+    python -m benchmarks.load_test --scenario rush --output rush.json
+    python -m benchmarks.load_test --scenario rush --baseline rush.json
+    python -m benchmarks.load_test --scenario browse --interface asgi
+
+Point DJANGO_SETTINGS_MODULE at settings using PostgreSQL to load test
+a local Postgres instead of SQLite.
+"""
+
+import argparse
+import http.client
+import json
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from benchmarks.utils import (
+    benchmark_database,
+    print_report,
+    seed_schedule,
+    setup_django,
+)
+
+
+API = "/api/planetarium"
+# Where each interface serves the catalog and schedule reads from.
+READ_APIS = {
+    "wsgi": API,
+    "asgi": f"{API}/async",
+}
+
+# Relative weights of the actions a virtual user picks from.
+SCENARIOS = {
+    "browse": {
+        "astronomy_show_list": 3,
+        "show_session_list": 3,
+        "show_session_detail": 2,
+        "seat_map": 2,
+    },
+    "rush": {
+        "seat_map": 1,
+        "book": 1,
+    },
+    "mixed": {
+        "astronomy_show_list": 2,
+        "show_session_list": 2,
+        "show_session_detail": 1,
+        "seat_map": 3,
+        "book": 2,
+    },
+}
+
+# Responses that are a normal outcome of the request; anything else
+# counts as an error. A 409 is a lost race for a seat.
+EXPECTED_STATUSES = {
+    "book": {201, 409},
+}
+
+
+def serve_wsgi(threads):
+    """
+    Django's threaded WSGI server, printing its port once listening.
+
+    With threads set, requests run on a fixed pool of that many worker
+    threads, as with gunicorn --threads, instead of a thread each.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from django.core.servers.basehttp import (
+        ThreadedWSGIServer,
+        WSGIRequestHandler,
+    )
+    from django.core.wsgi import get_wsgi_application
+
+    class QuietWSGIRequestHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    class Server(ThreadedWSGIServer):
+        request_queue_size = 1024
+
+        def process_request(self, request, client_address):
+            if not threads:
+                return super().process_request(request, client_address)
+            self.workers.submit(
+                self.process_request_thread,
+                request,
+                client_address
+            )
+
+        def _close_connections(self):
+            # Worker threads outlive their requests, as gunicorn's do, so
+            # leave closing database connections to CONN_MAX_AGE.
+            if not threads:
+                super()._close_connections()
+
+    server = Server(("127.0.0.1", 0), QuietWSGIRequestHandler)
+    server.workers = ThreadPoolExecutor(threads) if threads else None
+    server.set_app(get_wsgi_application())
+    print(server.server_address[1], flush=True)
+    server.serve_forever()
+
+
+def serve_asgi():
+    """uvicorn in a single process, printing its port once listening"""
+    import uvicorn
+    from django.core.asgi import get_asgi_application
+
+    config = uvicorn.Config(
+        get_asgi_application(),
+        lifespan="off",
+        access_log=False,
+        log_level="warning",
+    )
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(config.backlog)
+    print(sock.getsockname()[1], flush=True)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(database, options):
+    """Serve the API from a seeded database with the given options"""
+    setup_django()
+
+    from django.conf import settings
+    from django.db import connections
+    from django.test.utils import override_settings
+
+    database_settings = {"NAME": database, **options["database_settings"]}
+    settings.DATABASES["default"].update(database_settings)
+    connections["default"].settings_dict.update(database_settings)
+    override_settings(**options["settings"]).enable()
+    if options["interface"] == "asgi":
+        serve_asgi()
+    else:
+        serve_wsgi(options["threads"])
+
+
+def start_server(database, interface="wsgi", threads=None,
+                 database_settings=None):
+    """
+    Run serve() in a child process so clients do not share its GIL.
+
+    database_settings override the default database's settings, e.g.
+    its CONN_MAX_AGE or OPTIONS.
+    """
+    from django.conf import settings
+
+    options = {
+        "interface": interface,
+        "threads": threads,
+        "database_settings": database_settings or {},
+        "settings": {
+            "DEBUG": False,
+            "ALLOWED_HOSTS": ["127.0.0.1"],
+            "REST_FRAMEWORK": {
+                **settings.REST_FRAMEWORK,
+                "DEFAULT_THROTTLE_CLASSES": (),
+            },
+        },
+    }
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.load_test",
+            "--serve",
+            database,
+            json.dumps(options),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    port = process.stdout.readline().strip()
+    if not port:
+        process.wait()
+        raise RuntimeError("The load test server failed to start")
+    return process, int(port)
+
+
+def seed_users(count):
+    """Create visitors and return an access token for each"""
+    from django.contrib.auth import get_user_model
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    users = get_user_model().objects.bulk_create(
+        get_user_model()(email=f"load{index}@example.com", password="!")
+        for index in range(count)
+    )
+    return [str(AccessToken.for_user(user)) for user in users]
+
+
+def free_seats(seat_map):
+    """(row, seat) pairs of the free seats in a seat-map response"""
+    seats = []
+    index = 0
+    for position, length in enumerate(seat_map["runs"]):
+        if position % 2 == 0:
+            seats.extend(
+                divmod(number, seat_map["seats_in_row"])
+                for number in range(index, index + length)
+            )
+        index += length
+    return [(row + 1, seat + 1) for row, seat in seats]
+
+
+class VirtualUser:
+    """One client: a token, a seeded random generator and its actions"""
+
+    def __init__(self, port, token, rng, context, record):
+        self.port = port
+        self.token = token
+        self.rng = rng
+        self.context = context
+        self.record = record
+
+    def request(self, name, method, path, body=None):
+        headers = {"Authorization": f"Bearer {self.token}"}
+        if body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        connection = http.client.HTTPConnection("127.0.0.1", self.port)
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body, headers)
+            response = connection.getresponse()
+            data = response.read()
+            status = response.status
+        except OSError:
+            data, status = b"", None
+        finally:
+            connection.close()
+        self.record(name, status, (time.perf_counter() - start) * 1000)
+        if status == 200 and method == "GET":
+            return json.loads(data)
+        return None
+
+    def astronomy_show_list(self):
+        self.request(
+            "astronomy_show_list",
+            "GET",
+            f"{self.context['read_api']}/astronomy-shows/"
+            f"?page={self.rng.randint(1, 3)}"
+        )
+
+    def show_session_list(self):
+        day = self.context["today"] + timedelta(
+            days=self.rng.randint(0, 6)
+        )
+        self.request(
+            "show_session_list",
+            "GET",
+            f"{self.context['read_api']}/show-sessions/"
+            f"?date={day.isoformat()}"
+        )
+
+    def show_session_detail(self):
+        show_session = self.rng.choice(self.context["show_sessions"])
+        self.request(
+            "show_session_detail",
+            "GET",
+            f"{self.context['read_api']}/show-sessions/{show_session}/"
+        )
+
+    def seat_map(self):
+        return self.request(
+            "seat_map",
+            "GET",
+            f"{self.context['read_api']}/show-sessions/"
+            f"{self.context['popular']}/seat-map/"
+        )
+
+    def book(self):
+        # Book from the seats that looked free a moment ago, as a real
+        # client would, so conflicts come from genuine races.
+        seat_map = self.context["last_seat_map"] or self.seat_map()
+        seats = free_seats(seat_map) if seat_map else []
+        if not seats:
+            return
+        count = min(len(seats), self.rng.randint(1, 4))
+        chosen = self.rng.sample(seats, count)
+        self.request(
+            "book",
+            "POST",
+            f"{API}/reservations/book/",
+            {
+                "show_session": self.context["popular"],
+                "tickets": [
+                    {"row": row, "seat": seat} for row, seat in chosen
+                ],
+            },
+        )
+
+    def run(self, weights, iterations, barrier):
+        actions = list(weights)
+        barrier.wait()
+        for _ in range(iterations):
+            action = self.rng.choices(actions, list(weights.values()))[0]
+            result = getattr(self, action)()
+            if action == "seat_map" and result:
+                self.context["last_seat_map"] = result
+
+
+def percentile(timings, fraction):
+    """Nearest-rank percentile of sorted timings"""
+    index = max(int(len(timings) * fraction + 0.5) - 1, 0)
+    return round(timings[min(index, len(timings) - 1)], 3)
+
+
+def summarize(samples, elapsed):
+    timings = sorted(sample[1] for sample in samples)
+    statuses = defaultdict(int)
+    for status, _, _ in samples:
+        statuses[str(status)] += 1
+    errors = sum(1 for sample in samples if sample[2])
+    return {
+        "requests": len(samples),
+        "rps": round(len(samples) / elapsed, 2),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4),
+        "statuses": dict(sorted(statuses.items())),
+        "p50_ms": percentile(timings, 0.50),
+        "p95_ms": percentile(timings, 0.95),
+        "p99_ms": percentile(timings, 0.99),
+        "max_ms": round(timings[-1], 3),
+    }
+
+
+def seed_load_test(users, domes, sessions_per_dome):
+    """Seed the schedule and visitors; return their tokens and a context"""
+    from django.utils import timezone
+
+    from planetarium.models import ShowSession
+
+    seed_schedule(domes=domes, sessions_per_dome=sessions_per_dome)
+    tokens = seed_users(users)
+    show_sessions = list(
+        ShowSession.objects.filter(
+            show_time__gte=timezone.now()
+        ).order_by("show_time", "id").values_list("pk", flat=True)[:100]
+    )
+    context = {
+        "today": timezone.localdate(),
+        "show_sessions": show_sessions,
+        "popular": show_sessions[0],
+    }
+    return tokens, context
+
+
+def run_users(port, tokens, context, weights, iterations, seed):
+    """
+    Run a virtual user per token against the server until all finish.
+
+    Returns the samples recorded per endpoint and the elapsed seconds.
+    """
+    samples = defaultdict(list)
+    lock = threading.Lock()
+
+    def record(name, status, elapsed_ms):
+        expected = EXPECTED_STATUSES.get(name, {200})
+        with lock:
+            samples[name].append(
+                (status, elapsed_ms, status not in expected)
+            )
+
+    barrier = threading.Barrier(len(tokens) + 1)
+    threads = [
+        threading.Thread(
+            target=VirtualUser(
+                port,
+                token,
+                random.Random(f"{seed}-{index}"),
+                {**context, "last_seat_map": None},
+                record,
+            ).run,
+            args=(weights, iterations, barrier),
+        )
+        for index, token in enumerate(tokens)
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+
+def summarize_endpoints(samples, elapsed):
+    return {
+        "total": summarize(
+            [sample for name in samples for sample in samples[name]],
+            elapsed
+        ),
+        "endpoints": {
+            name: summarize(samples[name], elapsed)
+            for name in sorted(samples)
+        },
+    }
+
+
+def compare(report, baseline):
+    """Relative change of every endpoint's numbers against a baseline"""
+    changes = {}
+    for name, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous:
+            continue
+        changes[name] = {
+            key: round(current[key] / previous[key] - 1, 4)
+            for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+            if previous[key]
+        }
+        changes[name]["error_rate"] = round(
+            current["error_rate"] - previous["error_rate"], 4
+        )
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scenario", choices=SCENARIOS, default="mixed")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--domes", type=int, default=10)
+    parser.add_argument("--sessions-per-dome", type=int, default=200)
+    parser.add_argument("--interface", choices=READ_APIS, default="wsgi")
+    parser.add_argument(
+        "--threads",
+        type=int,
+        help="WSGI worker threads (default: a thread per request)"
+    )
+    parser.add_argument("--output", help="also write the report here")
+    parser.add_argument("--baseline", help="report of a previous run")
+    parser.add_argument("--serve", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        database, options = args.serve
+        serve(database, json.loads(options))
+        return
+
+    setup_django()
+
+    from planetarium.models import ShowSession
+
+    with benchmark_database() as connection:
+        tokens, context = seed_load_test(
+            args.users,
+            args.domes,
+            args.sessions_per_dome
+        )
+        context["read_api"] = READ_APIS[args.interface]
+        database = connection.settings_dict["NAME"]
+        # Let the server own the database while the test runs.
+        connection.close()
+
+        server, port = start_server(database, args.interface, args.threads)
+        try:
+            samples, elapsed = run_users(
+                port,
+                tokens,
+                context,
+                SCENARIOS[args.scenario],
+                args.iterations,
+                args.seed
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+        booked = ShowSession.objects.get(pk=context["popular"]).tickets.count()
+        report = {
+            "scenario": args.scenario,
+            "interface": args.interface,
+            "backend": connection.vendor,
+            "users": args.users,
+            "iterations": args.iterations,
+            "seed": args.seed,
+            "duration_s": round(elapsed, 3),
+            "seats_booked": booked,
+            **summarize_endpoints(samples, elapsed),
+        }
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            report["change"] = compare(report, json.load(file))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
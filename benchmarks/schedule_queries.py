@@ -0,0 +1,88 @@
+"""
+Query plans and timings for the show session schedule filters.
+
+Seeds a throwaway database, then explains and times the "this week in
+dome X" query with and without the show_time indexes.
+
+    python -m benchmarks.schedule_queries
+"""
+
+import argparse
+from datetime import timedelta
+
+from benchmarks.utils import (
+    benchmark_database,
+    measure,
+    print_report,
+    seed_schedule,
+    setup_django,
+)
+
+
+INDEX_NAMES = ("showsession_show_time_idx", "showsession_dome_time_idx")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--domes", type=int, default=20)
+    parser.add_argument("--sessions-per-dome", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.utils import timezone
+
+    from planetarium.filters import ShowSessionFilter
+    from planetarium.models import ShowSession
+
+    with benchmark_database() as connection:
+        domes = seed_schedule(
+            domes=args.domes,
+            sessions_per_dome=args.sessions_per_dome
+        )
+        now = timezone.now()
+        params = {
+            "planetarium_dome": str(domes[len(domes) // 2].id),
+            "date_from": (now + timedelta(days=30)).isoformat(),
+            "date_to": (now + timedelta(days=37)).isoformat(),
+        }
+
+        def this_week_in_dome():
+            return ShowSessionFilter(
+                params,
+                ShowSession.objects.order_by("show_time", "id")
+            ).qs
+
+        def run():
+            list(this_week_in_dome())
+
+        indexes = [
+            index for index in ShowSession._meta.indexes
+            if index.name in INDEX_NAMES
+        ]
+        report = {
+            "backend": connection.vendor,
+            "sessions": ShowSession.objects.count(),
+            "filters": params,
+            "results": this_week_in_dome().count(),
+        }
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.remove_index(ShowSession, index)
+        report["without_indexes"] = {
+            "plan": this_week_in_dome().explain(),
+            "timing": measure(run, args.repeat),
+        }
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.add_index(ShowSession, index)
+        report["with_indexes"] = {
+            "plan": this_week_in_dome().explain(),
+            "timing": measure(run, args.repeat),
+        }
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Per-request cost of the throttle, DRF's timestamp history against the
+sliding-window counters.
+
+For each number of requests a client already made in the window, times
+allow_request() of DRF's UserRateThrottle ("history") and of
+ScopedSlidingWindowThrottle ("sliding_window") on their caches, and
+reports how many bytes each keeps there for the client:
+
+    python -m benchmarks.throttling --requests 10 100 1000 10000
+
+Run it with production settings to measure against Redis.
+"""
+
+import argparse
+import pickle
+
+from benchmarks.utils import measure, print_report, setup_django
+
+
+def throttle_classes(rate):
+    from rest_framework.throttling import UserRateThrottle
+
+    from planetarium.throttling import ScopedSlidingWindowThrottle
+
+    class HistoryThrottle(UserRateThrottle):
+        pass
+
+    HistoryThrottle.rate = rate
+
+    class SlidingWindowThrottle(ScopedSlidingWindowThrottle):
+        THROTTLE_RATES = {"user": rate}
+
+    return {
+        "history": HistoryThrottle,
+        "sliding_window": SlidingWindowThrottle,
+    }
+
+
+def fill_history(throttle, made):
+    """Store `made` requests for the client, return the keys used"""
+    throttle.cache.set(
+        throttle.key,
+        [throttle.now] * made,
+        throttle.duration
+    )
+    return [throttle.key]
+
+
+def fill_sliding_window(throttle, made):
+    window = int(throttle.now // throttle.duration)
+    keys = [f"{throttle.key}:{window - 1}", f"{throttle.key}:{window}"]
+    throttle.get_cache().set(keys[1], made, 2 * throttle.duration)
+    return keys
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000, 10000],
+        help="requests the client already made in the window"
+    )
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    request = Request(APIRequestFactory().get("/"))
+    request.user = get_user_model()(email="throttle@benchmark.test")
+    fill = {"history": fill_history, "sliding_window": fill_sliding_window}
+
+    results = []
+    for made in args.requests:
+        # Room for every timed request, so none of them is rejected.
+        rate = f"{made + args.repeat + 1}/hour"
+        result = {"requests_in_window": made}
+        for name, throttle_class in throttle_classes(rate).items():
+            throttle = throttle_class()
+            throttle.allow_request(request, None)
+            keys = fill[name](throttle, made)
+            cache = throttle.cache if name == "history" else (
+                throttle.get_cache()
+            )
+
+            result[name] = measure(
+                lambda: throttle_class().allow_request(request, None),
+                repeat=args.repeat
+            )
+            result[name]["stored_bytes"] = sum(
+                len(pickle.dumps(value))
+                for value in cache.get_many(keys).values()
+            )
+            cache.delete_many(keys)
+        result["speedup"] = round(
+            result["history"]["median_ms"]
+            / result["sliding_window"]["median_ms"],
+            2
+        )
+        results.append(result)
+
+    print_report({"repeat": args.repeat, "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Ticket lookup by show title and buyer email, before and after.
+
+"before" is the original join-and-ILIKE query; "after" narrows through
+the show and user tables first, as TicketViewSet now does.
+
+    python -m benchmarks.ticket_lookup
+"""
+
+import argparse
+
+from benchmarks.utils import (
+    benchmark_database,
+    measure,
+    print_report,
+    seed_schedule,
+    seed_tickets,
+    setup_django,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--domes", type=int, default=5)
+    parser.add_argument("--sessions-per-dome", type=int, default=200)
+    parser.add_argument("--tickets-per-session", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from planetarium.filters import (
+        tickets_by_show_title,
+        tickets_by_user_email,
+    )
+    from planetarium.models import Ticket
+
+    with benchmark_database() as connection:
+        seed_schedule(
+            domes=args.domes,
+            sessions_per_dome=args.sessions_per_dome
+        )
+        seed_tickets(tickets_per_session=args.tickets_per_session)
+
+        page = slice(0, 10)
+        lookups = {
+            "title": {
+                "before": lambda: Ticket.objects.filter(
+                    show_session__astronomy_show__title__icontains="show 17"
+                ),
+                "after": lambda: Ticket.objects.filter(
+                    tickets_by_show_title("show 17")
+                ),
+            },
+            "email": {
+                "before": lambda: Ticket.objects.filter(
+                    reservation__user__email__icontains="visitor1234@"
+                ),
+                "after": lambda: Ticket.objects.filter(
+                    tickets_by_user_email("visitor1234@")
+                ),
+            },
+        }
+        report = {
+            "backend": connection.vendor,
+            "tickets": Ticket.objects.count(),
+        }
+        for name, variants in lookups.items():
+            report[name] = {}
+            for variant, queryset in variants.items():
+                report[name][variant] = {
+                    "matches": queryset().count(),
+                    "plan": queryset().explain(),
+                    "first_page": measure(
+                        lambda: list(queryset()[page]),
+                        args.repeat
+                    ),
+                    "count": measure(
+                        lambda: queryset().count(),
+                        args.repeat
+                    ),
+                }
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Helpers shared by the benchmark scripts."""
+
+import json
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    sys.path.insert(0, str(BASE_DIR))
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        pass
+    else:
+        load_dotenv(BASE_DIR / ".env")
+    os.environ.setdefault(
+        "DJANGO_SETTINGS_MODULE",
+        "planetarium_service.settings.dev"
+    )
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def benchmark_database():
+    """Run the block against a freshly migrated throwaway database"""
+    from django.db import connection
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(
+        verbosity=0,
+        autoclobber=True,
+        serialize=False
+    )
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def measure(func, repeat=50):
+    """Call func repeatedly and return timing statistics in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "min_ms": round(timings[0], 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 4),
+    }
+
+
+def print_report(report):
+    print(json.dumps(report, indent=2, default=str))
+
+
+def seed_schedule(domes=20, shows=50, sessions_per_dome=2000, rows=20,
+                  seats_in_row=25):
+    """Create a catalog and a schedule spread over the coming months"""
+    from django.utils import timezone
+
+    from planetarium.models import (
+        AstronomyShow,
+        PlanetariumDome,
+        ShowSession,
+        ShowTheme,
+    )
+
+    themes = ShowTheme.objects.bulk_create(
+        ShowTheme(name=f"Theme {index}") for index in range(10)
+    )
+    show_objects = AstronomyShow.objects.bulk_create(
+        AstronomyShow(
+            title=f"Show {index}",
+            description=f"Description of astronomy show number {index}",
+        )
+        for index in range(shows)
+    )
+    AstronomyShow.show_theme.through.objects.bulk_create(
+        AstronomyShow.show_theme.through(
+            astronomyshow_id=show.id,
+            showtheme_id=themes[index % len(themes)].id,
+        )
+        for index, show in enumerate(show_objects)
+    )
+    dome_objects = PlanetariumDome.objects.bulk_create(
+        PlanetariumDome(
+            name=f"Dome {index}",
+            rows=rows,
+            seats_in_row=seats_in_row,
+        )
+        for index in range(domes)
+    )
+    start = timezone.now()
+    ShowSession.objects.bulk_create(
+        (
+            ShowSession(
+                astronomy_show=show_objects[(index + number) % shows],
+                planetarium_dome=dome,
+                show_time=start + timedelta(hours=2 * number),
+            )
+            for index, dome in enumerate(dome_objects)
+            for number in range(sessions_per_dome)
+        ),
+        batch_size=1000,
+    )
+    return dome_objects
+
+
+def seed_tickets(users=2000, tickets_per_session=100, seats_per_reservation=4):
+    """Sell seats in every seeded session to a pool of users"""
+    from django.contrib.auth import get_user_model
+
+    from planetarium.models import Reservation, ShowSession, Ticket
+
+    user_objects = get_user_model().objects.bulk_create(
+        (
+            get_user_model()(
+                email=f"visitor{index}@example.com",
+                password="!",
+            )
+            for index in range(users)
+        ),
+        batch_size=1000,
+    )
+    sessions = ShowSession.objects.select_related("planetarium_dome")
+    counter = 0
+    for show_session in sessions.iterator():
+        seats_in_row = show_session.planetarium_dome.seats_in_row
+        reservations = Reservation.objects.bulk_create(
+            Reservation(user=user_objects[(counter + index) % users])
+            for index in range(
+                -(-tickets_per_session // seats_per_reservation)
+            )
+        )
+        counter += len(reservations)
+        Ticket.objects.bulk_create(
+            Ticket(
+                row=index // seats_in_row + 1,
+                seat=index % seats_in_row + 1,
+                show_session=show_session,
+                reservation=reservations[index // seats_per_reservation],
+            )
+            for index in range(tickets_per_session)
+        )
+    return user_objects
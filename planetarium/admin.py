@@ -4,6 +4,7 @@ from planetarium.models import (
     AstronomyShow,
     PlanetariumDome,
     Reservation,
+    SeatHold,
     ShowSession,
     ShowTheme,
     Ticket,
@@ -12,6 +13,33 @@ from planetarium.models import (
 admin.site.register(ShowTheme)
 admin.site.register(AstronomyShow)
 admin.site.register(PlanetariumDome)
-admin.site.register(ShowSession)
-admin.site.register(Reservation)
-admin.site.register(Ticket)
+
+
+@admin.register(ShowSession)
+class ShowSessionAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "show_time", "tickets_sold")
+    list_select_related = ("astronomy_show", "planetarium_dome")
+
+
+@admin.register(Reservation)
+class ReservationAdmin(admin.ModelAdmin):
+    list_select_related = ("user",)
+
+
+@admin.register(Ticket)
+class TicketAdmin(admin.ModelAdmin):
+    list_select_related = (
+        "show_session__astronomy_show",
+        "show_session__planetarium_dome",
+    )
+    raw_id_fields = ("show_session", "reservation")
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_display = ("token", "show_session", "row", "seat", "expires_at")
+    list_select_related = (
+        "show_session__astronomy_show",
+        "show_session__planetarium_dome",
+    )
+    raw_id_fields = ("show_session", "user")
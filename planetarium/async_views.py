@@ -0,0 +1,343 @@
+"""
+Async read-only endpoints for the catalog and the schedule.
+
+They mirror the list and retrieve actions of the astronomy show, dome
+and show session viewsets and the seat map, with the same serializers,
+filters, page shape, authentication and response cache, but query
+through the async ORM. Served by the ASGI application, a request that
+waits on the database or a slow client does not hold a worker thread.
+"""
+
+import time
+from math import ceil
+
+from asgiref.sync import sync_to_async
+from django.http import (
+    Http404,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from accounts.authentication import CachedJWTAuthentication
+from planetarium.cache import AsyncCachedResponseMixin
+from planetarium.fieldsets import (
+    apply_fieldset,
+    get_fieldset,
+    narrow_queryset,
+)
+from planetarium.filters import ShowSessionFilter
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    SeatHold,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+from planetarium.search import get_search_backend
+from planetarium.seat_events import (
+    SEAT_EVENT_KEEPALIVE,
+    SEAT_EVENT_RETRY_MS,
+    SEAT_EVENT_STREAM_TIMEOUT,
+    SEAT_EVENT_WAIT,
+    await_events,
+    format_server_sent_event,
+    get_seat_event_broker,
+    seat_event_params,
+)
+from planetarium.seat_map import aget_seat_map
+from planetarium.serializers import (
+    AstronomyShowListSerializer,
+    AstronomyShowRetrieveSerializer,
+    PlanetariumDomeSerializer,
+    ShowSessionListSerializer,
+    ShowSessionRetrieveSerializer,
+)
+
+
+class AsyncReadView(View):
+    """
+    Authenticates and throttles like the DRF views, then awaits read().
+
+    API errors become the same JSON bodies and statuses DRF returns.
+    """
+
+    http_method_names = ["get", "head", "options"]
+    authentication = CachedJWTAuthentication()
+    throttle_scope = "catalog"
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            await self.check_request(request)
+            return await self.read(request, *args, **kwargs)
+        except Http404:
+            return self.handle_exception(exceptions.NotFound())
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    async def check_request(self, request):
+        # Authenticating loads the user, a single query.
+        result = await sync_to_async(self.authentication.authenticate)(
+            request
+        )
+        if result is None:
+            raise exceptions.NotAuthenticated()
+        request.user, request.auth = result
+        for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+            throttle = throttle_class()
+            allowed = await sync_to_async(throttle.allow_request)(
+                request,
+                self
+            )
+            if not allowed:
+                raise exceptions.Throttled(throttle.wait())
+
+    async def read(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    def render(self, data, status=200):
+        return JsonResponse(data, status=status, encoder=JSONEncoder)
+
+    def handle_exception(self, exc):
+        if isinstance(exc.detail, (list, dict)):
+            data = exc.detail
+        else:
+            data = {"detail": exc.detail}
+        response = self.render(data, status=exc.status_code)
+        if exc.status_code == 401:
+            response["WWW-Authenticate"] = (
+                self.authentication.authenticate_header(request=None)
+            )
+        if isinstance(exc, exceptions.Throttled) and exc.wait:
+            response["Retry-After"] = str(ceil(exc.wait))
+        return response
+
+
+async def apaginate(request, queryset):
+    """
+    PageNumberPagination for async views.
+
+    Returns the page's objects and the count, next and previous links.
+    """
+    page_size = api_settings.PAGE_SIZE
+    try:
+        number = int(request.GET.get("page", 1))
+    except ValueError:
+        raise exceptions.NotFound("Invalid page.")
+    count = await queryset.acount()
+    if not 1 <= number <= max(ceil(count / page_size), 1):
+        raise exceptions.NotFound("Invalid page.")
+    offset = (number - 1) * page_size
+    objects = [
+        obj async for obj in queryset[offset:offset + page_size]
+    ]
+
+    url = request.build_absolute_uri()
+    next_url = previous_url = None
+    if offset + page_size < count:
+        next_url = replace_query_param(url, "page", number + 1)
+    if number == 2:
+        previous_url = remove_query_param(url, "page")
+    elif number > 2:
+        previous_url = replace_query_param(url, "page", number - 1)
+    return objects, {
+        "count": count,
+        "next": next_url,
+        "previous": previous_url,
+    }
+
+
+class AsyncCatalogView(AsyncCachedResponseMixin, AsyncReadView):
+    """A paginated list at the collection URL and a detail view at pk"""
+
+    queryset = None
+    list_serializer_class = None
+    retrieve_serializer_class = None
+
+    def get_queryset(self, action):
+        return self.queryset.all()
+
+    def filter_queryset(self, request, queryset):
+        return queryset
+
+    def get_serializer(self, request, serializer_class, *args, **kwargs):
+        serializer = serializer_class(*args, **kwargs)
+        apply_fieldset(serializer, *get_fieldset(request.GET))
+        return serializer
+
+    def narrow_queryset(self, request, queryset, serializer_class):
+        return narrow_queryset(
+            queryset,
+            self.get_serializer(request, serializer_class)
+        )
+
+    async def read(self, request, pk=None):
+        if pk is None:
+            return await self.cached_response(
+                request,
+                "list",
+                lambda: self.list(request)
+            )
+        return await self.cached_response(
+            request,
+            "retrieve",
+            lambda: self.retrieve(request, pk)
+        )
+
+    async def list(self, request):
+        queryset = self.narrow_queryset(
+            request,
+            self.filter_queryset(request, self.get_queryset("list")),
+            self.list_serializer_class
+        )
+        if not queryset.ordered:
+            queryset = queryset.order_by("pk")
+        objects, page = await apaginate(request, queryset)
+        serializer = self.get_serializer(
+            request,
+            self.list_serializer_class,
+            objects,
+            many=True,
+            context={"request": request}
+        )
+        return {**page, "results": serializer.data}
+
+    async def retrieve(self, request, pk):
+        queryset = self.narrow_queryset(
+            request,
+            self.get_queryset("retrieve"),
+            self.retrieve_serializer_class
+        )
+        try:
+            obj = await queryset.aget(pk=pk)
+        except queryset.model.DoesNotExist:
+            raise Http404
+        return self.get_serializer(
+            request,
+            self.retrieve_serializer_class,
+            obj
+        ).data
+
+
+class AsyncAstronomyShowView(AsyncCatalogView):
+    cache_models = (AstronomyShow, ShowTheme)
+    queryset = AstronomyShow.objects.all()
+    list_serializer_class = AstronomyShowListSerializer
+    retrieve_serializer_class = AstronomyShowRetrieveSerializer
+
+    def filter_queryset(self, request, queryset):
+        term = request.GET.get("search", "").strip()
+        if not term:
+            return queryset
+        return get_search_backend(queryset.db).search(queryset, term)
+
+
+class AsyncPlanetariumDomeView(AsyncCatalogView):
+    cache_models = (PlanetariumDome,)
+    queryset = PlanetariumDome.objects.all()
+    list_serializer_class = PlanetariumDomeSerializer
+    retrieve_serializer_class = PlanetariumDomeSerializer
+
+
+class AsyncShowSessionView(AsyncCatalogView):
+    cache_models = (
+        ShowSession,
+        AstronomyShow,
+        ShowTheme,
+        PlanetariumDome,
+        Ticket,
+        SeatHold,
+    )
+    queryset = ShowSession.objects.all()
+    list_serializer_class = ShowSessionListSerializer
+    retrieve_serializer_class = ShowSessionRetrieveSerializer
+
+    def filter_queryset(self, request, queryset):
+        filterset = ShowSessionFilter(
+            request.GET,
+            queryset=queryset,
+            request=request
+        )
+        if not filterset.is_valid():
+            raise exceptions.ValidationError(filterset.errors)
+        return filterset.qs
+
+
+class AsyncSeatMapView(AsyncReadView):
+    """ShowSessionViewSet.seat_map for async clients"""
+
+    async def read(self, request, pk):
+        broker = get_seat_event_broker()
+        try:
+            last_event_id = await broker.alast_event_id(pk)
+            seat_map = await aget_seat_map(pk)
+        except ShowSession.DoesNotExist:
+            raise Http404
+        if request.GET.get("encoding") == "binary":
+            response = HttpResponse(
+                seat_map.to_bytes(),
+                content_type="application/octet-stream"
+            )
+            response["X-Seat-Map-Rows"] = seat_map.rows
+            response["X-Seat-Map-Seats-In-Row"] = seat_map.seats_in_row
+            response["X-Seat-Map-Last-Event-Id"] = last_event_id
+            return response
+        return self.render({
+            "show_session": pk,
+            "last_event_id": last_event_id,
+            **seat_map.summary(),
+        })
+
+
+class AsyncSeatEventsView(AsyncReadView):
+    """
+    ShowSessionViewSet.seat_events for async clients.
+
+    With Accept: text/event-stream the changes are streamed as
+    server-sent events instead, until ?timeout (at most five minutes);
+    the client then reconnects with Last-Event-ID.
+    """
+
+    async def read(self, request, pk):
+        stream = "text/event-stream" in request.headers.get("Accept", "")
+        after, timeout = seat_event_params(
+            request.GET,
+            request.headers,
+            SEAT_EVENT_STREAM_TIMEOUT if stream else SEAT_EVENT_WAIT
+        )
+        if not await ShowSession.objects.filter(pk=pk).aexists():
+            raise Http404
+        if after is None:
+            after = await get_seat_event_broker().alast_event_id(pk)
+        if stream:
+            return StreamingHttpResponse(
+                self.stream(pk, after, timeout),
+                content_type="text/event-stream",
+                headers={"Cache-Control": "no-cache"}
+            )
+        last_event_id, events = await await_events(pk, after, timeout)
+        return self.render({
+            "show_session": pk,
+            "last_event_id": last_event_id,
+            "events": events,
+        })
+
+    async def stream(self, pk, after, timeout):
+        deadline = time.monotonic() + timeout
+        yield f"retry: {SEAT_EVENT_RETRY_MS}\n\n"
+        while (remaining := deadline - time.monotonic()) > 0:
+            after, events = await await_events(
+                pk,
+                after,
+                min(remaining, SEAT_EVENT_KEEPALIVE)
+            )
+            for event in events:
+                yield format_server_sent_event(event)
+            if not events:
+                yield ": keep-alive\n\n"
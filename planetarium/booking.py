@@ -0,0 +1,239 @@
+import uuid
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from planetarium.cache import bump_generation
+from planetarium.models import Reservation, SeatHold, ShowSession, Ticket
+from planetarium.seat_map import invalidate_seat_map, update_seat_map
+
+
+BOOKING_ATTEMPTS = 3
+SEAT_HOLD_TTL = timedelta(minutes=10)
+SWEEP_BATCH_SIZE = 1000
+
+
+class SeatsUnavailable(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested seats are already taken."
+    default_code = "seats_unavailable"
+
+    def __init__(self, seats):
+        super().__init__()
+        self.seats = sorted(seats)
+        self.detail = {
+            "detail": self.default_detail,
+            "seats": [
+                {"row": row, "seat": seat}
+                for row, seat in self.seats
+            ],
+        }
+
+
+class HoldExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "The seat hold does not exist or has expired."
+    default_code = "hold_expired"
+
+    def __init__(self, seats=()):
+        super().__init__()
+        self.seats = sorted(seats)
+        if self.seats:
+            self.detail = {
+                "detail": "Some seats of the hold have expired.",
+                "seats": [
+                    {"row": row, "seat": seat}
+                    for row, seat in self.seats
+                ],
+            }
+
+
+def _seats_condition(seats):
+    return reduce(or_, (Q(row=row, seat=seat) for row, seat in seats))
+
+
+def active_holds():
+    return SeatHold.objects.filter(expires_at__gt=timezone.now())
+
+
+def taken_seats(show_session, seats):
+    """
+    Return the subset of (row, seat) pairs sold or held for a session.
+
+    Expired holds do not count.
+    """
+    if not seats:
+        return []
+    condition = _seats_condition(seats)
+    sold = Ticket.objects.filter(show_session=show_session).filter(
+        condition
+    ).order_by().values_list("row", "seat")
+    held = active_holds().filter(show_session=show_session).filter(
+        condition
+    ).order_by().values_list("row", "seat")
+    return list(sold.union(held))
+
+
+def _clear_holds(user, show_session, seats):
+    # Drops expired holds and the user's own holds on these seats, so
+    # they neither block the user nor collide with new rows.
+    SeatHold.objects.filter(show_session=show_session).filter(
+        _seats_condition(seats)
+    ).filter(
+        Q(expires_at__lte=timezone.now()) | Q(user=user)
+    ).delete()
+
+
+def _lock_show_session(show_session):
+    # Serializes buyers of the same session on backends with row locks.
+    # SQLite has no row locks and relies on its database-wide write lock.
+    list(
+        ShowSession.objects.select_for_update().filter(
+            pk=show_session.pk
+        ).values_list("pk", flat=True)
+    )
+
+
+def claim_seats(user, show_session, seats):
+    """
+    Make sure (row, seat) pairs of a session are free for user.
+
+    Call it in the transaction that then takes the seats. It locks the
+    session, uses up the user's own holds on the seats and raises
+    SeatsUnavailable listing the seats sold or held by someone else.
+    """
+    _lock_show_session(show_session)
+    _clear_holds(user, show_session, seats)
+    taken = taken_seats(show_session, seats)
+    if taken:
+        raise SeatsUnavailable(taken)
+
+
+def book_seats(user, show_session, seats, attempts=BOOKING_ATTEMPTS):
+    """
+    Create a reservation and a ticket for each (row, seat) pair.
+
+    Raises SeatsUnavailable listing the lost seats when any of them is
+    already sold or held by someone else; the user's own holds on them
+    are used up. A unique constraint conflict with a concurrent buyer
+    is retried, so the caller never sees an IntegrityError.
+    """
+    seats = list(seats)
+    for _ in range(attempts):
+        try:
+            with transaction.atomic():
+                claim_seats(user, show_session, seats)
+                reservation = Reservation.objects.create(user=user)
+                tickets = Ticket.objects.bulk_create(
+                    Ticket(
+                        row=row,
+                        seat=seat,
+                        show_session=show_session,
+                        reservation=reservation,
+                    )
+                    for row, seat in seats
+                )
+                bump_generation(Ticket, SeatHold)
+                transaction.on_commit(
+                    lambda: update_seat_map(show_session.pk, seats, True)
+                )
+            return reservation, tickets
+        except IntegrityError:
+            continue
+    raise SeatsUnavailable(taken_seats(show_session, seats) or seats)
+
+
+def hold_seats(user, show_session, seats, ttl=SEAT_HOLD_TTL):
+    """
+    Hold (row, seat) pairs for a user until they are confirmed or expire.
+
+    The transaction only covers creating the holds; nothing stays locked
+    during checkout. Raises SeatsUnavailable like book_seats. Returns
+    the created holds, which share one token.
+    """
+    seats = list(seats)
+    try:
+        with transaction.atomic():
+            claim_seats(user, show_session, seats)
+            token = uuid.uuid4()
+            expires_at = timezone.now() + ttl
+            holds = SeatHold.objects.bulk_create(
+                SeatHold(
+                    token=token,
+                    row=row,
+                    seat=seat,
+                    show_session=show_session,
+                    user=user,
+                    expires_at=expires_at,
+                )
+                for row, seat in seats
+            )
+            bump_generation(SeatHold)
+            transaction.on_commit(
+                lambda: update_seat_map(show_session.pk, seats, True)
+            )
+    except IntegrityError:
+        raise SeatsUnavailable(taken_seats(show_session, seats) or seats)
+    return holds
+
+
+def confirm_hold(user, token):
+    """
+    Turn a user's unexpired hold into a reservation with its tickets.
+
+    Raises HoldExpired when the hold does not exist, listing the seats
+    no longer held when any of them expired; nothing is booked then.
+    """
+    holds = list(
+        SeatHold.objects.filter(user=user, token=token).values_list(
+            "show_session_id",
+            "row",
+            "seat",
+            "expires_at"
+        )
+    )
+    if not holds:
+        raise HoldExpired()
+    now = timezone.now()
+    expired = [
+        (row, seat) for _, row, seat, expires_at in holds
+        if expires_at <= now
+    ]
+    if expired:
+        raise HoldExpired(expired)
+    show_session = ShowSession(pk=holds[0][0])
+    reservation, _ = book_seats(
+        user,
+        show_session,
+        [(row, seat) for _, row, seat, _ in holds]
+    )
+    return reservation
+
+
+def sweep_expired_holds(batch_size=SWEEP_BATCH_SIZE):
+    """
+    Delete expired holds in batches and return how many were deleted.
+
+    Seat maps of the affected sessions are rebuilt on their next read.
+    """
+    deleted = 0
+    while True:
+        batch = list(
+            SeatHold.objects.filter(
+                expires_at__lte=timezone.now()
+            ).values_list("pk", "show_session_id")[:batch_size]
+        )
+        if not batch:
+            return deleted
+        SeatHold.objects.filter(pk__in=[pk for pk, _ in batch]).delete()
+        bump_generation(SeatHold)
+        invalidate_seat_map(*{show_session_id for _, show_session_id in batch})
+        deleted += len(batch)
+        if len(batch) < batch_size:
+            return deleted
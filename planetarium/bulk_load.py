@@ -0,0 +1,462 @@
+"""
+Streaming bulk loads of catalog, schedule and ticket data.
+
+Rows are read one at a time from CSV or NDJSON files (optionally
+gzipped), validated in batches and inserted with bulk_create, one
+transaction per batch. Related objects are referenced by name and
+resolved through lookup maps, so memory use depends on the batch size
+and the size of the catalog and schedule, not on the number of rows.
+
+Columns, by kind (NDJSON uses the same keys):
+
+- themes: name
+- shows: title, description, themes (names separated by "|" in CSV,
+  a list in NDJSON)
+- domes: name, rows, seats_in_row
+- sessions: astronomy_show (title), planetarium_dome (name), show_time
+- tickets: astronomy_show, planetarium_dome, show_time, row, seat,
+  user (email) and optionally reservation, any id grouping the tickets
+  of a reservation. Tickets of a reservation must be on consecutive
+  rows; without the column, consecutive tickets of one user for one
+  show session share a reservation. Tickets for seats already sold
+  are skipped, checked with one query per batch.
+
+bulk_create skips save() and signals, so the loaders bump the cache
+generations and reset the seat maps of what they loaded themselves.
+Seats sold are still counted by the ticket table's triggers.
+"""
+
+import csv
+import gzip
+import json
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from planetarium.cache import bump_generation
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+from planetarium.seat_map import invalidate_seat_map
+
+
+BULK_LOAD_BATCH_SIZE = 1000
+THEME_SEPARATOR = "|"
+
+
+class BulkLoadError(Exception):
+    """A batch could not be inserted; earlier batches stay loaded"""
+
+
+def read_rows(path):
+    """Yield (line number, row) from a .csv or .ndjson/.jsonl file"""
+    name = path.removesuffix(".gz")
+    opener = gzip.open if path.endswith(".gz") else open
+    if not name.endswith((".csv", ".ndjson", ".jsonl")):
+        raise ValueError(f"{path}: expected a .csv, .ndjson or .jsonl file.")
+    with opener(path, "rt", encoding="utf-8", newline="") as file:
+        if name.endswith(".csv"):
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError:
+                yield number, None
+
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+class LookupMaps:
+    """
+    Ids of the catalog and schedule by the names rows refer to them by.
+
+    Each map is read from the database the first time it is needed and
+    kept up to date with what the loaders insert.
+    """
+
+    def __init__(self):
+        self._themes = self._shows = self._domes = self._sessions = None
+
+    @property
+    def themes(self):
+        if self._themes is None:
+            self._themes = dict(ShowTheme.objects.values_list("name", "pk"))
+        return self._themes
+
+    @property
+    def shows(self):
+        if self._shows is None:
+            self._shows = dict(
+                AstronomyShow.objects.values_list("title", "pk")
+            )
+        return self._shows
+
+    @property
+    def domes(self):
+        """Dome name to (id, rows, seats_in_row)"""
+        if self._domes is None:
+            self._domes = {
+                name: (pk, rows, seats_in_row)
+                for pk, name, rows, seats_in_row in (
+                    PlanetariumDome.objects.values_list(
+                        "pk", "name", "rows", "seats_in_row"
+                    )
+                )
+            }
+        return self._domes
+
+    @property
+    def sessions(self):
+        """(show id, dome id, show time) to id"""
+        if self._sessions is None:
+            self._sessions = {
+                (show_id, dome_id, show_time): pk
+                for pk, show_id, dome_id, show_time in (
+                    ShowSession.objects.values_list(
+                        "pk",
+                        "astronomy_show_id",
+                        "planetarium_dome_id",
+                        "show_time"
+                    ).iterator()
+                )
+            }
+        return self._sessions
+
+
+def _lookup(mapping, field, value, label):
+    try:
+        return mapping[value]
+    except (KeyError, TypeError):
+        raise ValidationError({field: f"Unknown {label} {value!r}."})
+
+
+def _show_time(value):
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValidationError(
+            {"show_time": f"Expected an ISO 8601 date and time, got "
+                          f"{value!r}."}
+        )
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class BulkLoader:
+    """
+    Load rows of one model in batches.
+
+    build() turns a row into an unsaved instance or raises
+    ValidationError; conflicts() checks the built batch against the
+    database and insert() writes what is left. Invalid rows are passed
+    to on_error(line, messages) and skipped.
+    """
+
+    model = None
+
+    def __init__(self, maps=None, batch_size=BULK_LOAD_BATCH_SIZE):
+        self.maps = maps or LookupMaps()
+        self.batch_size = batch_size
+        self.loaded = 0
+        self.skipped = 0
+
+    def prepare(self, batch):
+        """Look up whatever the rows of a batch refer to, in one go"""
+
+    def build(self, row):
+        raise NotImplementedError
+
+    def conflicts(self, built):
+        """
+        Map the lines of built (line, instance) pairs that clash with
+        rows already in the database to the reason.
+        """
+        return {}
+
+    def insert(self, objects):
+        self.model.objects.bulk_create(objects)
+
+    def loaded_models(self):
+        return (self.model,)
+
+    def finish(self):
+        if self.loaded:
+            bump_generation(*self.loaded_models())
+
+    def _build(self, values, exclude=()):
+        instance = self.model(**values)
+        instance.clean_fields(exclude=exclude)
+        return instance
+
+    def load(self, rows, on_error=None):
+        try:
+            for batch in _batches(rows, self.batch_size):
+                self.prepare(batch)
+                built = []
+                errors = []
+                for line, row in batch:
+                    try:
+                        if not isinstance(row, dict):
+                            raise ValidationError("Not a JSON object.")
+                        built.append((line, self.build(row)))
+                    except ValidationError as exc:
+                        errors.append((line, exc.messages))
+                conflicts = self.conflicts(built) if built else {}
+                errors += [
+                    (line, [message]) for line, message in conflicts.items()
+                ]
+                objects = [
+                    instance for line, instance in built
+                    if line not in conflicts
+                ]
+                self.skipped += len(errors)
+                if on_error:
+                    for line, messages in sorted(errors):
+                        on_error(line, messages)
+                if not objects:
+                    continue
+                try:
+                    with transaction.atomic():
+                        self.insert(objects)
+                except IntegrityError as exc:
+                    raise BulkLoadError(
+                        f"Lines {batch[0][0]}-{batch[-1][0]}: {exc}"
+                    )
+                self.loaded += len(objects)
+        finally:
+            self.finish()
+
+
+class ShowThemeLoader(BulkLoader):
+    model = ShowTheme
+
+    def build(self, row):
+        return self._build({"name": row.get("name")})
+
+    def insert(self, objects):
+        super().insert(objects)
+        self.maps.themes.update((theme.name, theme.pk) for theme in objects)
+
+
+class AstronomyShowLoader(BulkLoader):
+    model = AstronomyShow
+
+    def build(self, row):
+        show = self._build({
+            "title": row.get("title"),
+            "description": row.get("description"),
+        })
+        themes = row.get("themes") or []
+        if isinstance(themes, str):
+            themes = [
+                name.strip() for name in themes.split(THEME_SEPARATOR)
+                if name.strip()
+            ]
+        show.theme_ids = {
+            _lookup(self.maps.themes, "themes", name, "theme")
+            for name in themes
+        }
+        return show
+
+    def insert(self, objects):
+        super().insert(objects)
+        through = AstronomyShow.show_theme.through
+        through.objects.bulk_create(
+            through(astronomyshow_id=show.pk, showtheme_id=theme_id)
+            for show in objects
+            for theme_id in show.theme_ids
+        )
+        self.maps.shows.update((show.title, show.pk) for show in objects)
+
+
+class PlanetariumDomeLoader(BulkLoader):
+    model = PlanetariumDome
+
+    def build(self, row):
+        dome = self._build({
+            "name": row.get("name"),
+            "rows": row.get("rows"),
+            "seats_in_row": row.get("seats_in_row"),
+        })
+        if dome.rows < 1 or dome.seats_in_row < 1:
+            raise ValidationError("A dome needs at least one seat.")
+        return dome
+
+    def insert(self, objects):
+        super().insert(objects)
+        self.maps.domes.update(
+            (dome.name, (dome.pk, dome.rows, dome.seats_in_row))
+            for dome in objects
+        )
+
+
+class ShowSessionLoader(BulkLoader):
+    model = ShowSession
+
+    def build(self, row):
+        show_id = _lookup(
+            self.maps.shows,
+            "astronomy_show",
+            row.get("astronomy_show"),
+            "show"
+        )
+        dome_id, _, _ = _lookup(
+            self.maps.domes,
+            "planetarium_dome",
+            row.get("planetarium_dome"),
+            "dome"
+        )
+        return ShowSession(
+            astronomy_show_id=show_id,
+            planetarium_dome_id=dome_id,
+            show_time=_show_time(row.get("show_time")),
+        )
+
+    def insert(self, objects):
+        super().insert(objects)
+        self.maps.sessions.update(
+            (
+                (
+                    session.astronomy_show_id,
+                    session.planetarium_dome_id,
+                    session.show_time,
+                ),
+                session.pk,
+            )
+            for session in objects
+        )
+
+
+class TicketLoader(BulkLoader):
+    model = Ticket
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.show_session_ids = set()
+        # The reservation of the last ticket, as (key, reservation),
+        # carried over to the next batch.
+        self._reservation = (None, None)
+        self._users = {}
+        self._seats = set()
+
+    def prepare(self, batch):
+        emails = {
+            row.get("user") for _, row in batch if isinstance(row, dict)
+        }
+        self._users = dict(
+            get_user_model().objects.filter(
+                email__in=emails - {None}
+            ).values_list("email", "pk")
+        )
+        self._seats = set()
+
+    def build(self, row):
+        show_id = _lookup(
+            self.maps.shows,
+            "astronomy_show",
+            row.get("astronomy_show"),
+            "show"
+        )
+        dome_id, rows, seats_in_row = _lookup(
+            self.maps.domes,
+            "planetarium_dome",
+            row.get("planetarium_dome"),
+            "dome"
+        )
+        show_time = _show_time(row.get("show_time"))
+        try:
+            show_session_id = self.maps.sessions[
+                show_id, dome_id, show_time
+            ]
+        except KeyError:
+            raise ValidationError(
+                {"show_time": f"No show session at {show_time.isoformat()}."}
+            )
+        user_id = _lookup(self._users, "user", row.get("user"), "user")
+        ticket = self._build(
+            {"row": row.get("row"), "seat": row.get("seat")},
+            exclude=["show_session", "reservation"]
+        )
+        if not (
+            1 <= ticket.row <= rows
+            and 1 <= ticket.seat <= seats_in_row
+        ):
+            raise ValidationError(
+                f"Row {ticket.row}, seat {ticket.seat} is not in the dome."
+            )
+        seat = (show_session_id, ticket.row, ticket.seat)
+        if seat in self._seats:
+            raise ValidationError("Seat already sold in this batch.")
+        self._seats.add(seat)
+
+        ticket.show_session_id = show_session_id
+        key = row.get("reservation") or (user_id, show_session_id)
+        previous_key, reservation = self._reservation
+        if key != previous_key or reservation.user_id != user_id:
+            reservation = Reservation(user_id=user_id)
+            self._reservation = (key, reservation)
+        ticket.reservation = reservation
+        return ticket
+
+    def conflicts(self, built):
+        # One query for the batch: tickets in its sessions on any of its
+        # rows and seats, narrowed down to its exact seats here.
+        sold = set(
+            Ticket.objects.filter(
+                show_session_id__in={t.show_session_id for _, t in built},
+                row__in={ticket.row for _, ticket in built},
+                seat__in={ticket.seat for _, ticket in built},
+            ).order_by().values_list("show_session_id", "row", "seat")
+        )
+        return {
+            line: "Seat already sold."
+            for line, ticket in built
+            if (ticket.show_session_id, ticket.row, ticket.seat) in sold
+        }
+
+    def insert(self, objects):
+        # Unsaved instances are not hashable, so dedupe by identity.
+        reservations = {
+            id(ticket.reservation): ticket.reservation for ticket in objects
+            if ticket.reservation.pk is None
+        }
+        Reservation.objects.bulk_create(reservations.values())
+        super().insert(objects)
+        self.show_session_ids.update(
+            ticket.show_session_id for ticket in objects
+        )
+
+    def loaded_models(self):
+        return (Ticket, Reservation, ShowSession)
+
+    def finish(self):
+        super().finish()
+        if self.show_session_ids:
+            invalidate_seat_map(*self.show_session_ids)
+
+
+LOADERS = {
+    "themes": ShowThemeLoader,
+    "shows": AstronomyShowLoader,
+    "domes": PlanetariumDomeLoader,
+    "sessions": ShowSessionLoader,
+    "tickets": TicketLoader,
+}
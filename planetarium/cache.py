@@ -0,0 +1,215 @@
+import hashlib
+import time
+from contextlib import nullcontext
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from planetarium.replicas import use_primary, written_recently
+
+
+GENERATION_CACHE_KEY = "generation:{label}"
+RESPONSE_CACHE_KEY = "response:{digest}"
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+
+
+def _generation_key(model):
+    return GENERATION_CACHE_KEY.format(label=model._meta.label_lower)
+
+
+def get_generations(*models):
+    """
+    Return the current generation of each model.
+
+    A generation is the time in nanoseconds the model last changed. A
+    model without a generation yet (or whose counter was evicted)
+    starts at the current time, so it never repeats an old value.
+    """
+    keys = [_generation_key(model) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, time.time_ns(), timeout=None)
+            generations[key] = cache.get(key)
+    return tuple(generations[key] for key in keys)
+
+
+async def aget_generations(*models):
+    """get_generations() for async views"""
+    keys = [_generation_key(model) for model in models]
+    generations = await cache.aget_many(keys)
+    for key in keys:
+        if key not in generations:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            generations[key] = await cache.aget(key)
+    return tuple(generations[key] for key in keys)
+
+
+def _increment(keys):
+    # Moves each counter forward to the current time (by at least one,
+    # atomically), so generations double as modification times.
+    now = time.time_ns()
+    current = cache.get_many(keys)
+    for key in keys:
+        try:
+            cache.incr(key, max(now - current.get(key, now), 1))
+        except ValueError:
+            cache.add(key, now, timeout=None)
+
+
+def bump_generation(*models):
+    """
+    Invalidate every cache entry that depends on the given models.
+
+    Inside a transaction the counters are bumped again on commit, so a
+    response cached by a concurrent request before the commit is not
+    served under the new generation.
+    """
+    keys = [_generation_key(model) for model in models]
+    _increment(keys)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _increment(keys))
+
+
+def _digest(parts):
+    return hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def _validators(generations, digest):
+    # The ETag and the Last-Modified timestamp of a cached response.
+    # Last-Modified has whole seconds, so it is only sent once the
+    # second of the newest change is over; a later change then always
+    # moves it forward. Until then the ETag alone validates.
+    last_modified = max(generations, default=0) // 10 ** 9
+    if last_modified >= time.time_ns() // 10 ** 9:
+        last_modified = None
+    return f'"{digest}"', last_modified
+
+
+class CachedResponseMixin:
+    """
+    Cache list and retrieve responses keyed by model generations.
+
+    cache_models lists every model the response is built from; a change
+    to any of them bumps its generation and so changes the cache key.
+    Set cache_per_user when the response depends on the request user;
+    such responses also vary on the Authorization header, so shared
+    caches keep them apart.
+
+    The cache key doubles as the response's ETag and the newest
+    generation as its Last-Modified, so a conditional GET for an
+    unchanged response gets a 304 from the generations alone.
+    """
+
+    cache_models = ()
+    cache_actions = ("list", "retrieve")
+    cache_per_user = False
+    cache_timeout = RESPONSE_CACHE_TIMEOUT
+
+    def get_response_digest(self, request, generations):
+        parts = [
+            self.basename,
+            self.action,
+            request.build_absolute_uri(),
+            request.accepted_renderer.format,
+            *generations,
+        ]
+        if self.cache_per_user:
+            parts += [request.user.pk, request.user.is_staff]
+        return _digest(parts)
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        if self.action not in self.cache_actions:
+            return handler(request, *args, **kwargs)
+        generations = get_generations(*self.cache_models)
+        digest = self.get_response_digest(request, generations)
+        etag, last_modified = _validators(generations, digest)
+        not_modified = get_conditional_response(
+            request._request,
+            etag=etag,
+            last_modified=last_modified
+        )
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            self._vary(not_modified)
+            return not_modified
+
+        key = RESPONSE_CACHE_KEY.format(digest=digest)
+        data = cache.get(key)
+        if data is not None:
+            response = Response(data)
+        else:
+            # Right after a change, a replica may not have it yet.
+            with (
+                use_primary() if written_recently(generations)
+                else nullcontext()
+            ):
+                response = handler(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(key, response.data, self.cache_timeout)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = http_date(last_modified)
+        self._vary(response)
+        return response
+
+    def _vary(self, response):
+        if self.cache_per_user:
+            patch_vary_headers(response, ["Authorization"])
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            super().retrieve,
+            request,
+            *args,
+            **kwargs
+        )
+
+
+class AsyncCachedResponseMixin:
+    """
+    CachedResponseMixin for async views, with async cache calls.
+
+    cached_response() awaits handler() for the response data on a cache
+    miss and passes the data to render() to build the response.
+    """
+
+    cache_models = ()
+    cache_timeout = RESPONSE_CACHE_TIMEOUT
+
+    async def cached_response(self, request, action, handler):
+        generations = await aget_generations(*self.cache_models)
+        digest = _digest([
+            type(self).__name__,
+            action,
+            request.build_absolute_uri(),
+            *generations,
+        ])
+        etag, last_modified = _validators(generations, digest)
+        not_modified = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified
+        )
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
+
+        key = RESPONSE_CACHE_KEY.format(digest=digest)
+        data = await cache.aget(key)
+        if data is None:
+            data = await handler()
+            await cache.aset(key, data, self.cache_timeout)
+        response = self.render(data)
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
@@ -0,0 +1,101 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from planetarium.cache import bump_generation
+from planetarium.models import Reservation, Ticket
+from planetarium.seat_map import update_seat_map
+
+
+CANCELLATION_CUTOFF = timedelta(hours=5)
+DELETE_BATCH_SIZE = 500
+
+
+def first_show_time(reservations):
+    """Earliest show time across the sessions of the given reservations"""
+    return Ticket.objects.filter(reservation__in=reservations).aggregate(
+        first_show_time=Min("show_session__show_time")
+    )["first_show_time"]
+
+
+def reservations_past_cutoff(reservations):
+    """Ids of reservations with a show starting within the cutoff"""
+    return list(
+        reservations.filter(
+            tickets__show_session__show_time__lt=(
+                timezone.now() + CANCELLATION_CUTOFF
+            )
+        ).values_list("pk", flat=True).distinct()
+    )
+
+
+def _delete_rows(model, pks):
+    """
+    Delete rows by primary key with plain DELETE statements.
+
+    Unlike QuerySet.delete() no instances are collected, so no per-row
+    signals fire; database triggers still run, and for tickets they are
+    what keeps ShowSession.tickets_sold in step.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    deleted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), DELETE_BATCH_SIZE):
+            batch = pks[start:start + DELETE_BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(
+                f"DELETE FROM {table} WHERE {column} IN ({placeholders})",
+                batch
+            )
+            deleted += cursor.rowcount
+    return deleted
+
+
+def cancel_reservations(reservations, show_session=None):
+    """
+    Delete the tickets of reservations in one transaction.
+
+    With show_session only the tickets for that session are deleted;
+    a reservation is deleted once it has no tickets left. Caches are
+    invalidated here once for the whole batch. Returns the number of
+    reservations and tickets deleted.
+    """
+    with transaction.atomic():
+        reservation_ids = list(reservations.values_list("pk", flat=True))
+        tickets = Ticket.objects.filter(reservation__in=reservation_ids)
+        if show_session is not None:
+            tickets = tickets.filter(show_session=show_session)
+        ticket_ids = []
+        freed = defaultdict(list)
+        for pk, show_session_id, row, seat in tickets.values_list(
+            "pk",
+            "show_session_id",
+            "row",
+            "seat"
+        ):
+            ticket_ids.append(pk)
+            freed[show_session_id].append((row, seat))
+
+        ticket_count = _delete_rows(Ticket, ticket_ids)
+        reservation_count = _delete_rows(
+            Reservation,
+            list(
+                Reservation.objects.filter(
+                    pk__in=reservation_ids,
+                    tickets__isnull=True
+                ).values_list("pk", flat=True)
+            )
+        )
+
+        bump_generation(Reservation, Ticket)
+
+        def update_seat_maps():
+            for show_session_id, seats in freed.items():
+                update_seat_map(show_session_id, seats, False)
+
+        transaction.on_commit(update_seat_maps)
+    return reservation_count, ticket_count
@@ -0,0 +1,41 @@
+"""
+Database connection checks and pool metrics.
+
+With the psycopg pool (the "pool" option of a PostgreSQL database),
+every process keeps its own pool; pool_stats() reports the one of the
+process it runs in.
+"""
+
+import time
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def ping_database(alias=DEFAULT_DB_ALIAS):
+    """Run a trivial query and return how long it took in milliseconds"""
+    start = time.perf_counter()
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def pool_stats(alias=DEFAULT_DB_ALIAS):
+    """
+    The connection pool's measures and counters, or None without one.
+
+    On top of psycopg's stats (pool_size, pool_available,
+    requests_waiting, requests_wait_ms, ...), in_use counts the
+    connections handed out and saturation is their share of pool_max:
+    at 1 further requests queue for a connection.
+    """
+    pool = getattr(connections[alias], "pool", None)
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    in_use = stats["pool_size"] - stats["pool_available"]
+    return {
+        **stats,
+        "in_use": in_use,
+        "saturation": round(in_use / stats["pool_max"], 3),
+    }
@@ -0,0 +1,179 @@
+"""
+Opt-in fast path for the hot list endpoints.
+
+With PLANETARIUM_FAST_LISTS on, a viewset's list action fetches rows
+with .values() and builds its results with a ValuesListSerializer
+instead of instantiating models and running a ModelSerializer field by
+field, and renders them with orjson when it is installed. The response
+bytes are the same either way.
+"""
+
+from operator import itemgetter
+
+from django.conf import settings
+from rest_framework.generics import GenericAPIView
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from planetarium.fieldsets import EXPAND_PARAM, FIELDS_PARAM
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ValuesListSerializer:
+    """
+    Builds list results from .values() rows.
+
+    fields maps every output field, in order, to the lookup or query
+    expression it is read from. get_converters() maps output fields to
+    functions applied to their values, and prepare() can fetch anything
+    else a page needs first. A subclass must give the same results as
+    the ModelSerializer it stands in for.
+
+    names limits the output to some of the fields, in the given order.
+    """
+
+    fields = {}
+
+    def __init__(self, context=None, names=None):
+        self.context = context or {}
+        self.names = list(self.fields if names is None else names)
+        self.lookups = [
+            value if isinstance(value, str) else name
+            for name, value in map(self._field, self.names)
+        ]
+        self.row_values = itemgetter(*self.lookups) if self.names else None
+
+    def _field(self, name):
+        return name, self.fields[name]
+
+    def values(self, queryset, *extra):
+        """The queryset's rows as dicts, with `extra` lookups as well"""
+        fields = dict(map(self._field, self.names))
+        lookups = [
+            value for value in fields.values() if isinstance(value, str)
+        ]
+        lookups += [lookup for lookup in extra if lookup not in lookups]
+        return queryset.prefetch_related(None).values(
+            "pk",
+            *lookups,
+            **{
+                name: value for name, value in fields.items()
+                if not isinstance(value, str)
+            }
+        )
+
+    def prepare(self, rows):
+        pass
+
+    def get_converters(self):
+        return {}
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        self.prepare(rows)
+        names, row_values = self.names, self.row_values
+        if len(names) < 2:
+            results = [
+                {name: row_values(row) for name in names} for row in rows
+            ]
+        else:
+            results = [dict(zip(names, row_values(row))) for row in rows]
+        for name, convert in self.get_converters().items():
+            if name not in names:
+                continue
+            for result in results:
+                result[name] = convert(result[name])
+        return results
+
+
+def _unsupported(value):
+    raise TypeError
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer on orjson, byte for byte.
+
+    Falls back to JSONRenderer without orjson, for indented or
+    non-default output, and for data orjson cannot render the same way
+    (datetimes, decimals and other types DRF's encoder converts).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=_unsupported,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped like JSONRenderer does, to stay a JavaScript subset.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9",
+            b"\\u2029"
+        )
+
+
+class FastListMixin:
+    """
+    Serve list actions through fast_list_serializer_class when
+    PLANETARIUM_FAST_LISTS is on.
+
+    Filtering, pagination (including keyset pagination), the response
+    cache and ?fields= work as before; they just see dicts for rows.
+    """
+
+    fast_list_serializer_class = None
+
+    def use_fast_list(self):
+        return (
+            self.action == "list"
+            and self.fast_list_serializer_class is not None
+            and getattr(settings, "PLANETARIUM_FAST_LISTS", False)
+        )
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if not self.use_fast_list():
+            return renderers
+        return [
+            FastJSONRenderer() if type(renderer) is JSONRenderer else renderer
+            for renderer in renderers
+        ]
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_list():
+            return super().list(request, *args, **kwargs)
+        params = self.request.query_params
+        names = None
+        if FIELDS_PARAM in params or EXPAND_PARAM in params:
+            names = list(self.get_serializer().fields)
+        serializer = self.fast_list_serializer_class(
+            context=self.get_serializer_context(),
+            names=names
+        )
+        # Only the filter backends: .values() picks its own columns and
+        # joins, so narrowing the queryset to the fields is moot.
+        queryset = serializer.values(
+            GenericAPIView.filter_queryset(self, self.get_queryset()),
+            *getattr(self.paginator, "ordering", ())
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer.to_representation(page)
+            )
+        return Response(serializer.to_representation(queryset))
@@ -0,0 +1,263 @@
+"""
+Sparse fieldsets (?fields=) and on-demand expansion (?expand=).
+
+?fields=id,show_session.show_time keeps only the listed fields, a dot
+selecting inside a nested object. ?expand=show_session swaps a related
+id for the nested object, for the fields a serializer lists in
+Meta.expandable_fields; expanding show_session.reservation expands
+show_session as well.
+
+The queryset behind a response follows the fields that are left: it
+joins, prefetches and loads only the columns they read, so relations
+and large text columns nobody asked for are never fetched.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def parse_paths(value):
+    """
+    Turn "id,show_session.show_time" into a tree of field names.
+
+    Each name maps to the tree of names selected inside it, or to None
+    when it is selected as a whole.
+    """
+    tree = {}
+    for path in value.split(","):
+        names = [name.strip() for name in path.split(".")]
+        if not all(names):
+            continue
+        node = tree
+        for name in names[:-1]:
+            if node.get(name, {}) is None:
+                break
+            node = node.setdefault(name, {})
+        else:
+            node[names[-1]] = None
+    return tree
+
+
+def get_fieldset(params):
+    """The fields and expand trees of a request's query parameters"""
+    fields = params.get(FIELDS_PARAM)
+    return (
+        parse_paths(fields) if fields is not None else None,
+        parse_paths(params.get(EXPAND_PARAM, "")),
+    )
+
+
+def _nested(field):
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    if isinstance(field, serializers.BaseSerializer):
+        return field
+    return None
+
+
+def apply_fieldset(serializer, fields=None, expand=None, prefix=""):
+    """
+    Expand and trim a serializer's fields, and those of the serializers
+    nested in it, to the given trees.
+
+    Raises ValidationError for names it does not have or cannot expand.
+    """
+    serializer = _nested(serializer)
+    expandable = getattr(
+        getattr(serializer, "Meta", None),
+        "expandable_fields",
+        {}
+    )
+    for name in expand or {}:
+        if name not in expandable:
+            raise ValidationError({
+                EXPAND_PARAM: f"Cannot expand {prefix}{name}."
+            })
+        serializer.fields[name] = expandable[name](read_only=True)
+    if fields is not None:
+        for name in fields:
+            if name not in serializer.fields:
+                raise ValidationError({
+                    FIELDS_PARAM: f"Unknown field {prefix}{name}."
+                })
+        for name in list(serializer.fields):
+            if name not in fields:
+                del serializer.fields[name]
+
+    for name, field in serializer.fields.items():
+        nested_fields = (fields or {}).get(name)
+        nested_expand = (expand or {}).get(name)
+        if nested_fields is None and not nested_expand:
+            continue
+        if _nested(field) is None:
+            raise ValidationError({
+                FIELDS_PARAM: f"{prefix}{name} has no fields to select."
+            })
+        apply_fieldset(
+            field,
+            nested_fields,
+            nested_expand,
+            f"{prefix}{name}."
+        )
+
+
+class _QueryPlan:
+    """The columns, joins and prefetches of one model a response reads"""
+
+    def __init__(self, model):
+        self.model = model
+        # None when something reads attributes we cannot see into.
+        self.columns = set()
+        self.joins = {}
+        self.prefetches = {}
+
+    def add_serializer(self, serializer):
+        serializer = _nested(serializer)
+        field_sources = getattr(
+            getattr(serializer, "Meta", None),
+            "field_sources",
+            {}
+        )
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in field_sources:
+                for source in field_sources[name]:
+                    self.add_source(source.split("."))
+            elif field.source == "*":
+                if _nested(field) is not None:
+                    self.add_serializer(field)
+                else:
+                    self.columns = None
+            else:
+                self.add_source(field.source_attrs, field)
+
+    def add_source(self, attrs, field=None):
+        """Add what reading attrs (and rendering field) needs"""
+        name, rest = attrs[0], attrs[1:]
+        try:
+            model_field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            self.columns = None
+            return
+        column = model_field.concrete and not model_field.many_to_many
+        if column and self.columns is not None:
+            self.columns.add(model_field.name)
+        if not model_field.is_relation:
+            return
+
+        if isinstance(field, serializers.ManyRelatedField):
+            field = field.child_relation
+        primary_key = field is None or isinstance(
+            field,
+            serializers.PrimaryKeyRelatedField
+        )
+        if column and primary_key and not rest:
+            return
+        if model_field.many_to_many or model_field.one_to_many:
+            plans = self.prefetches
+        else:
+            plans = self.joins
+        plan = plans.setdefault(name, _QueryPlan(model_field.related_model))
+        if model_field.one_to_many and plan.columns is not None:
+            # The prefetch matches rows on it.
+            plan.columns.add(model_field.field.name)
+
+        if rest:
+            plan.add_source(rest, field)
+        elif _nested(field) is not None:
+            plan.add_serializer(field)
+        elif isinstance(field, serializers.SlugRelatedField):
+            plan.add_source(field.slug_field.split("__"))
+        elif not primary_key:
+            plan.columns = None
+
+    def lookups(self, prefix=""):
+        """Paths for select_related(), only() and prefetch_related()"""
+        columns = {self.model._meta.pk.name}
+        if self.columns is None:
+            columns.update(
+                field.name for field in self.model._meta.concrete_fields
+            )
+        else:
+            columns.update(self.columns)
+        select = []
+        only = [prefix + column for column in sorted(columns)]
+        prefetch = [
+            Prefetch(
+                prefix + name,
+                queryset=plan.apply(plan.model._default_manager.all())
+            )
+            for name, plan in self.prefetches.items()
+        ]
+        for name, plan in self.joins.items():
+            joined = plan.lookups(f"{prefix}{name}__")
+            select += [prefix + name, *joined[0]]
+            only += joined[1]
+            prefetch += joined[2]
+        return select, only, prefetch
+
+    def apply(self, queryset):
+        select, only, prefetch = self.lookups()
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        return queryset.only(*only).prefetch_related(*prefetch)
+
+
+def narrow_queryset(queryset, serializer, sources=()):
+    """
+    Join, prefetch and load the columns serializer reads, and no more.
+
+    sources are dotted attribute paths read on top of that (by
+    permissions or pagination, say). A field whose source is a property
+    or a method lists what it reads in the serializer's
+    Meta.field_sources; otherwise its whole row is loaded.
+    """
+    plan = _QueryPlan(queryset.model)
+    plan.add_serializer(serializer)
+    for source in sources:
+        plan.add_source(source.split("."))
+    return plan.apply(queryset)
+
+
+class FieldsetMixin:
+    """
+    Honour ?fields= and ?expand= in the list and retrieve actions.
+
+    fieldset_sources lists the dotted attribute paths the viewset reads
+    besides its serializer, e.g. in permission checks.
+    """
+
+    fieldset_actions = ("list", "retrieve")
+    fieldset_sources = ()
+
+    def get_fieldset(self):
+        if not hasattr(self, "_fieldset"):
+            self._fieldset = get_fieldset(self.request.query_params)
+        return self._fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.action in self.fieldset_actions:
+            apply_fieldset(serializer, *self.get_fieldset())
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in self.fieldset_actions:
+            return queryset
+        return narrow_queryset(
+            queryset,
+            self.get_serializer(),
+            [
+                *self.fieldset_sources,
+                *getattr(self.paginator, "ordering", ()),
+            ]
+        )
@@ -0,0 +1,121 @@
+from datetime import datetime, time, timedelta
+
+import django_filters
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.filters import SearchFilter
+
+from planetarium.models import (
+    AstronomyShow,
+    Reservation,
+    SeatHold,
+    ShowSession,
+)
+
+
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    pass
+
+
+class ShowSessionFilter(django_filters.FilterSet):
+    date_from = django_filters.IsoDateTimeFilter(
+        field_name="show_time",
+        lookup_expr="gte"
+    )
+    date_to = django_filters.IsoDateTimeFilter(
+        field_name="show_time",
+        lookup_expr="lt"
+    )
+    date = django_filters.DateFilter(method="filter_date")
+    astronomy_show = NumberInFilter(field_name="astronomy_show")
+    planetarium_dome = NumberInFilter(field_name="planetarium_dome")
+    theme = NumberInFilter(
+        field_name="astronomy_show__show_theme",
+        distinct=True
+    )
+    has_free_seats = django_filters.BooleanFilter(
+        method="filter_has_free_seats"
+    )
+
+    class Meta:
+        model = ShowSession
+        fields = [
+            "date_from",
+            "date_to",
+            "date",
+            "astronomy_show",
+            "planetarium_dome",
+            "theme",
+            "has_free_seats",
+        ]
+
+    def filter_date(self, queryset, name, value):
+        # A range on show_time (unlike __date) can use its index.
+        start = timezone.make_aware(datetime.combine(value, time.min))
+        return queryset.filter(
+            show_time__gte=start,
+            show_time__lt=start + timedelta(days=1)
+        )
+
+    def filter_has_free_seats(self, queryset, name, value):
+        # Seats held for checkout are not free either.
+        seats_held = SeatHold.objects.filter(
+            show_session=OuterRef("pk"),
+            expires_at__gt=timezone.now()
+        ).order_by().values("show_session").annotate(
+            count=Count("pk")
+        ).values("count")
+        queryset = queryset.alias(
+            seats_taken=(
+                F("tickets_sold") + Coalesce(Subquery(seats_held), 0)
+            ),
+            capacity=(
+                F("planetarium_dome__rows")
+                * F("planetarium_dome__seats_in_row")
+            ),
+        )
+        if value:
+            return queryset.filter(seats_taken__lt=F("capacity"))
+        return queryset.filter(seats_taken__gte=F("capacity"))
+
+
+def tickets_by_show_title(title):
+    """
+    Match tickets whose show title contains the given text.
+
+    The substring match runs against the small show table (trigram
+    indexed on PostgreSQL) and tickets are then found by their indexed
+    show_session_id, instead of matching every joined ticket row.
+    """
+    shows = AstronomyShow.objects.filter(title__icontains=title)
+    return Q(show_session__in=ShowSession.objects.filter(
+        astronomy_show__in=shows.values("pk")
+    ).values("pk"))
+
+
+def tickets_by_user_email(email):
+    """Match tickets whose buyer's email contains the given text"""
+    users = get_user_model().objects.filter(email__icontains=email)
+    return Q(reservation__in=Reservation.objects.filter(
+        user__in=users.values("pk")
+    ).values("pk"))
+
+
+class TicketSearchFilter(SearchFilter):
+    """
+    ?search= over show title, buyer email, and exact row or seat numbers.
+
+    Every term must match one of them, as with SearchFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        for term in self.get_search_terms(request):
+            condition = tickets_by_show_title(term) | tickets_by_user_email(
+                term
+            )
+            if term.isdigit():
+                condition |= Q(row=int(term)) | Q(seat=int(term))
+            queryset = queryset.filter(condition)
+        return queryset
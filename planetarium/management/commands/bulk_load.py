@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from planetarium.bulk_load import (
+    BULK_LOAD_BATCH_SIZE,
+    LOADERS,
+    BulkLoadError,
+    LookupMaps,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream catalog, schedule and ticket rows from CSV or NDJSON "
+        "files into the database in batches. See planetarium.bulk_load "
+        "for the columns of each kind."
+    )
+
+    def add_arguments(self, parser):
+        for kind in LOADERS:
+            parser.add_argument(
+                f"--{kind}",
+                metavar="PATH",
+                help=f"A .csv, .ndjson or .jsonl file of {kind}, "
+                     f"optionally gzipped."
+            )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BULK_LOAD_BATCH_SIZE,
+            help="Rows validated and inserted per transaction."
+        )
+
+    def handle(self, *args, **options):
+        paths = {
+            kind: options[kind] for kind in LOADERS if options[kind]
+        }
+        if not paths:
+            raise CommandError(
+                "Pass at least one of "
+                + ", ".join(f"--{kind}" for kind in LOADERS) + "."
+            )
+        maps = LookupMaps()
+        # In dependency order, so rows can refer to those loaded before.
+        for kind, path in paths.items():
+            loader = LOADERS[kind](maps, batch_size=options["batch_size"])
+
+            def report_error(line, messages, path=path):
+                self.stderr.write(f"{path}:{line}: {' '.join(messages)}")
+
+            start = time.perf_counter()
+            try:
+                loader.load(read_rows(path), on_error=report_error)
+            except (BulkLoadError, OSError, ValueError) as exc:
+                raise CommandError(
+                    f"{path}: {exc} ({loader.loaded} {kind} loaded)"
+                )
+            elapsed = time.perf_counter() - start
+            self.stdout.write(self.style.SUCCESS(
+                f"{kind}: {loader.loaded} loaded, {loader.skipped} skipped "
+                f"in {elapsed:.1f}s "
+                f"({loader.loaded / max(elapsed, 1e-9):,.0f} rows/s)"
+            ))
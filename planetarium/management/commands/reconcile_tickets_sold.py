@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from planetarium.cache import bump_generation
+from planetarium.models import ShowSession, Ticket
+
+
+RECONCILE_BATCH_SIZE = 1000
+
+
+def counted_tickets_sold():
+    """Subquery counting the tickets of the outer show session"""
+    tickets = Ticket.objects.filter(
+        show_session=OuterRef("pk")
+    ).order_by().values("show_session").annotate(
+        count=Count("pk")
+    ).values("count")
+    return Coalesce(Subquery(tickets), 0)
+
+
+def reconcile_tickets_sold(fix=True, batch_size=RECONCILE_BATCH_SIZE):
+    """
+    Compare ShowSession.tickets_sold with a count of the tickets.
+
+    Returns (show_session_id, stored, counted) for every session that
+    drifted; with fix, their counters are recounted in batches.
+    """
+    drift = list(
+        ShowSession.objects.alias(
+            counted=counted_tickets_sold()
+        ).exclude(
+            tickets_sold=F("counted")
+        ).annotate(
+            counted=F("counted")
+        ).order_by("pk").values_list("pk", "tickets_sold", "counted")
+    )
+    if fix:
+        for start in range(0, len(drift), batch_size):
+            ShowSession.objects.filter(
+                pk__in=[pk for pk, _, _ in drift[start:start + batch_size]]
+            ).update(tickets_sold=counted_tickets_sold())
+        if drift:
+            bump_generation(ShowSession)
+    return drift
+
+
+class Command(BaseCommand):
+    help = "Recount ShowSession.tickets_sold and report any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drift, without fixing it."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=RECONCILE_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        drift = reconcile_tickets_sold(
+            fix=not options["dry_run"],
+            batch_size=options["batch_size"]
+        )
+        for show_session_id, stored, counted in drift:
+            self.stdout.write(
+                f"Show session {show_session_id}: "
+                f"tickets_sold {stored}, counted {counted}"
+            )
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("No drift found."))
+        elif options["dry_run"]:
+            self.stdout.write(
+                self.style.WARNING(f"{len(drift)} show sessions drifted.")
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Fixed {len(drift)} show sessions.")
+            )
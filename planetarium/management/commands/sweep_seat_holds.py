@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from planetarium.booking import SWEEP_BATCH_SIZE, sweep_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Delete expired seat holds in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=SWEEP_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Keep sweeping, waiting this many seconds between runs."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = sweep_expired_holds(options["batch_size"])
+            self.stdout.write(f"Deleted {deleted} expired seat holds.")
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
@@ -1,17 +1,59 @@
 import time
 
-from django.core.management.base import BaseCommand
-from django.db import connections
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
 
 
 class Command(BaseCommand):
-    def handle(self, *args, **kwargs):
+    help = (
+        "Wait until the database answers a query, backing off between "
+        "attempts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="Give up after this many seconds (0 waits forever)."
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.5,
+            help="Seconds to wait after the first failed attempt."
+        )
+        parser.add_argument(
+            "--max-interval",
+            type=float,
+            default=5,
+            help="Longest wait between attempts."
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        interval = options["interval"]
+        deadline = time.monotonic() + options["timeout"]
         self.stdout.write("Waiting for database...")
-        db_conn = None
-        while not db_conn:
+        while True:
             try:
-                db_conn = connections["default"]
-                self.stdout.write(self.style.SUCCESS("Database available!"))
-            except Exception:
-                self.stdout.write("Database unavailable, waiting 1 second...")
-                time.sleep(1)
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+                break
+            except OperationalError as exc:
+                # Drop the broken connection so the next attempt
+                # reconnects.
+                connection.close_if_unusable_or_obsolete()
+                remaining = deadline - time.monotonic()
+                if options["timeout"] and remaining <= 0:
+                    raise CommandError(f"Database unavailable: {exc}")
+                if options["timeout"]:
+                    interval = min(interval, remaining)
+                self.stdout.write(
+                    f"Database unavailable, waiting {interval:g} seconds..."
+                )
+                time.sleep(interval)
+                interval = min(interval * 2, options["max_interval"])
+        self.stdout.write(self.style.SUCCESS("Database available!"))
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("planetarium", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="ticket",
+            options={"ordering": ["show_session", "row", "seat"]},
+        ),
+        migrations.RemoveConstraint(
+            model_name="ticket",
+            name="unique_row_seat_show_session",
+        ),
+        migrations.AddConstraint(
+            model_name="ticket",
+            constraint=models.UniqueConstraint(
+                fields=("show_session", "row", "seat"),
+                name="unique_row_seat_show_session",
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("planetarium", "0002_ticket_keyset_ordering"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="showsession",
+            index=models.Index(fields=["show_time"], name="showsession_show_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="showsession",
+            index=models.Index(
+                fields=["planetarium_dome", "show_time"],
+                name="showsession_dome_time_idx",
+            ),
+        ),
+    ]
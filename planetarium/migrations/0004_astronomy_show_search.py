@@ -0,0 +1,104 @@
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE planetarium_astronomyshow
+    ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    """
+    CREATE INDEX astronomyshow_search_idx
+    ON planetarium_astronomyshow USING GIN (search_vector)
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS astronomyshow_search_idx",
+    "ALTER TABLE planetarium_astronomyshow DROP COLUMN IF EXISTS "
+    "search_vector",
+]
+
+# External content FTS5 table kept in step with the show table by
+# triggers. Note: SQLite rebuilds a table (dropping its triggers) when a
+# migration alters it, so such a migration must recreate these;
+# test_fts_triggers_exist fails until it does.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE planetarium_astronomyshow_fts USING fts5(
+        title,
+        description,
+        content='planetarium_astronomyshow',
+        content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER planetarium_astronomyshow_fts_insert
+    AFTER INSERT ON planetarium_astronomyshow BEGIN
+        INSERT INTO planetarium_astronomyshow_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER planetarium_astronomyshow_fts_delete
+    AFTER DELETE ON planetarium_astronomyshow BEGIN
+        INSERT INTO planetarium_astronomyshow_fts(
+            planetarium_astronomyshow_fts, rowid, title, description
+        )
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER planetarium_astronomyshow_fts_update
+    AFTER UPDATE ON planetarium_astronomyshow BEGIN
+        INSERT INTO planetarium_astronomyshow_fts(
+            planetarium_astronomyshow_fts, rowid, title, description
+        )
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO planetarium_astronomyshow_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    INSERT INTO planetarium_astronomyshow_fts(planetarium_astronomyshow_fts)
+    VALUES ('rebuild')
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS planetarium_astronomyshow_fts_insert",
+    "DROP TRIGGER IF EXISTS planetarium_astronomyshow_fts_delete",
+    "DROP TRIGGER IF EXISTS planetarium_astronomyshow_fts_update",
+    "DROP TABLE IF EXISTS planetarium_astronomyshow_fts",
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("planetarium", "0003_show_session_schedule_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({
+                "postgresql": POSTGRES_FORWARD,
+                "sqlite": SQLITE_FORWARD,
+            }),
+            run_for_vendor({
+                "postgresql": POSTGRES_BACKWARD,
+                "sqlite": SQLITE_BACKWARD,
+            }),
+        ),
+    ]
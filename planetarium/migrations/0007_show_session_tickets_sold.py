@@ -0,0 +1,139 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:18
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# Row triggers count every insert, delete and move of a ticket,
+# including bulk_create and raw deletes, in the same transaction.
+POSTGRES_FORWARD = [
+    """
+    CREATE FUNCTION planetarium_ticket_count() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' OR TG_OP = 'UPDATE' THEN
+            UPDATE planetarium_showsession
+            SET tickets_sold = tickets_sold + 1
+            WHERE id = NEW.show_session_id;
+        END IF;
+        IF TG_OP = 'DELETE' OR TG_OP = 'UPDATE' THEN
+            UPDATE planetarium_showsession
+            SET tickets_sold = tickets_sold - 1
+            WHERE id = OLD.show_session_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER planetarium_ticket_count_insert_delete
+    AFTER INSERT OR DELETE ON planetarium_ticket
+    FOR EACH ROW EXECUTE FUNCTION planetarium_ticket_count()
+    """,
+    """
+    CREATE TRIGGER planetarium_ticket_count_update
+    AFTER UPDATE OF show_session_id ON planetarium_ticket
+    FOR EACH ROW
+    WHEN (OLD.show_session_id IS DISTINCT FROM NEW.show_session_id)
+    EXECUTE FUNCTION planetarium_ticket_count()
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    "DROP TRIGGER IF EXISTS planetarium_ticket_count_insert_delete "
+    "ON planetarium_ticket",
+    "DROP TRIGGER IF EXISTS planetarium_ticket_count_update "
+    "ON planetarium_ticket",
+    "DROP FUNCTION IF EXISTS planetarium_ticket_count()",
+]
+
+# As with the search triggers, a migration that makes SQLite rebuild the
+# ticket table drops these and must recreate them.
+SQLITE_FORWARD = [
+    """
+    CREATE TRIGGER planetarium_ticket_count_insert
+    AFTER INSERT ON planetarium_ticket BEGIN
+        UPDATE planetarium_showsession
+        SET tickets_sold = tickets_sold + 1
+        WHERE id = new.show_session_id;
+    END
+    """,
+    """
+    CREATE TRIGGER planetarium_ticket_count_delete
+    AFTER DELETE ON planetarium_ticket BEGIN
+        UPDATE planetarium_showsession
+        SET tickets_sold = tickets_sold - 1
+        WHERE id = old.show_session_id;
+    END
+    """,
+    """
+    CREATE TRIGGER planetarium_ticket_count_update
+    AFTER UPDATE OF show_session_id ON planetarium_ticket
+    WHEN old.show_session_id != new.show_session_id BEGIN
+        UPDATE planetarium_showsession
+        SET tickets_sold = tickets_sold - 1
+        WHERE id = old.show_session_id;
+        UPDATE planetarium_showsession
+        SET tickets_sold = tickets_sold + 1
+        WHERE id = new.show_session_id;
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS planetarium_ticket_count_insert",
+    "DROP TRIGGER IF EXISTS planetarium_ticket_count_delete",
+    "DROP TRIGGER IF EXISTS planetarium_ticket_count_update",
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+def count_tickets_sold(apps, schema_editor):
+    ShowSession = apps.get_model("planetarium", "ShowSession")
+    Ticket = apps.get_model("planetarium", "Ticket")
+    tickets_sold = (
+        Ticket.objects.filter(show_session=OuterRef("pk"))
+        .order_by()
+        .values("show_session")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    ShowSession.objects.update(
+        tickets_sold=Coalesce(Subquery(tickets_sold), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("planetarium", "0006_seat_hold"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="showsession",
+            name="tickets_sold",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_tickets_sold, migrations.RunPython.noop),
+        migrations.RunPython(
+            run_for_vendor(
+                {
+                    "postgresql": POSTGRES_FORWARD,
+                    "sqlite": SQLITE_FORWARD,
+                }
+            ),
+            run_for_vendor(
+                {
+                    "postgresql": POSTGRES_BACKWARD,
+                    "sqlite": SQLITE_BACKWARD,
+                }
+            ),
+        ),
+    ]
@@ -48,6 +48,34 @@ class ShowSession(models.Model):
         related_name="show_sessions"
     )
     show_time = models.DateTimeField()
+    # Kept up to date by database triggers on the ticket table.
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["show_time"],
+                name="showsession_show_time_idx"
+            ),
+            models.Index(
+                fields=["planetarium_dome", "show_time"],
+                name="showsession_dome_time_idx"
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Never write a possibly stale tickets_sold back over the count
+        # the triggers keep.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "tickets_sold"
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def tickets_available(self):
+        return self.planetarium_dome.capacity - self.tickets_sold
 
     def __str__(self):
         return f"{self.astronomy_show.title} - {self.planetarium_dome.name}"
@@ -83,14 +111,15 @@ class Ticket(models.Model):
         constraints = [
             models.UniqueConstraint(
                 fields=[
+                    "show_session",
                     "row",
-                    "seat",
-                    "show_session"
+                    "seat"
                 ],
                 name="unique_row_seat_show_session",
             )
         ]
         ordering = [
+            "show_session",
             "row",
             "seat"
         ]
@@ -101,3 +130,45 @@ class Ticket(models.Model):
             f"{self.show_session.planetarium_dome.name}, "
             f"row {self.row}, seat {self.seat}"
         )
+
+
+class SeatHold(models.Model):
+    """
+    A seat kept for a user during checkout until expires_at.
+
+    All seats held in one request share a token, which is confirmed
+    into a reservation. Expired rows are ignored and swept in batches.
+    """
+
+    token = models.UUIDField(db_index=True)
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    show_session = models.ForeignKey(
+        ShowSession,
+        on_delete=models.CASCADE,
+        related_name="seat_holds"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds"
+    )
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    "show_session",
+                    "row",
+                    "seat"
+                ],
+                name="unique_row_seat_show_session_hold",
+            )
+        ]
+
+    def __str__(self):
+        return (
+            f"Hold {self.token}: row {self.row}, seat {self.seat} "
+            f"until {self.expires_at}"
+        )
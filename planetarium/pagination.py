@@ -0,0 +1,159 @@
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over a unique tuple of ordering fields.
+
+    DRF's CursorPagination positions on the first ordering field plus an
+    offset. Here the cursor holds the full key of the boundary row, so
+    every page is a range scan on the ordering index with no OFFSET and
+    no COUNT(*).
+    """
+
+    ordering = ()
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.model = queryset.model
+        cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor[1])
+
+        queryset = queryset.order_by(*(
+            f"-{name}" if self.reverse else name
+            for name in self.ordering
+        ))
+        if cursor:
+            queryset = queryset.filter(self._beyond(cursor[0]))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = results
+        return results
+
+    def _beyond(self, key):
+        """Rows strictly after (or before, when reversed) the given key"""
+        lookup = "lt" if self.reverse else "gt"
+        condition = Q(pk__in=[])
+        equal = {}
+        for name, value in zip(self.ordering, key):
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        # The OR of the expanded tuple comparison is no index range on
+        # its own; bounding the first field too lets the planner start
+        # the scan at the cursor.
+        bound = Q(**{f"{self.ordering[0]}__{lookup}e": key[0]})
+        return bound & condition
+
+    def _key(self, row):
+        key = []
+        for name in self.ordering:
+            attname = self.model._meta.get_field(name).attname
+            if isinstance(row, dict):
+                value = row[name] if name in row else row[attname]
+            else:
+                value = getattr(row, attname)
+            if hasattr(value, "isoformat"):
+                value = value.isoformat()
+            key.append(value)
+        return key
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(b64decode(encoded.encode("ascii")))
+            key, reverse = cursor["k"], bool(cursor["r"])
+        except (BinasciiError, UnicodeError, ValueError, KeyError,
+                TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(key, list) or len(key) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            key = [
+                self.model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.ordering, key)
+            ]
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in key:
+            raise NotFound(self.invalid_cursor_message)
+        return key, reverse
+
+    def encode_cursor(self, cursor):
+        key, reverse = cursor
+        encoded = b64encode(
+            json.dumps({"k": key, "r": int(reverse)}).encode()
+        ).decode("ascii")
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            encoded
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor((self._key(self.page[-1]), False))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor((self._key(self.page[0]), True))
+
+
+class ShowSessionKeysetPagination(KeysetPagination):
+    ordering = ("show_time", "id")
+
+
+class TicketKeysetPagination(KeysetPagination):
+    ordering = ("show_session", "row", "seat")
+
+
+class KeysetPaginationMixin:
+    """
+    Let a request opt into keyset pagination.
+
+    Clients ask for it with ?pagination=cursor; the cursor links it
+    returns keep using it. A viewset can make it the default by setting
+    pagination_class to its keyset_pagination_class.
+    """
+
+    keyset_pagination_class = None
+
+    def use_keyset_pagination(self):
+        if self.keyset_pagination_class is None or not self.request:
+            return False
+        params = self.request.query_params
+        return (
+            params.get("pagination") == "cursor"
+            or KeysetPagination.cursor_query_param in params
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator") and self.use_keyset_pagination():
+            self._paginator = self.keyset_pagination_class()
+        return super().paginator
@@ -21,11 +21,11 @@ class IsOwnerOrAdmin(permissions.BasePermission):
             view,
             obj
     ):
-        if hasattr(obj, "user"):
-            return obj.user == request.user or request.user.is_staff
+        if hasattr(obj, "user_id"):
+            return obj.user_id == request.user.pk or request.user.is_staff
         elif hasattr(obj, "reservation"):
             return (
-                obj.reservation.user == request.user
+                obj.reservation.user_id == request.user.pk
                 or request.user.is_staff
             )
         return False
@@ -0,0 +1,143 @@
+"""
+Read replica routing with read-your-writes stickiness.
+
+ReplicaRouter sends reads to a replica only while a view has picked one
+for the current request, so everything else (writes, transactions,
+authentication, management commands) stays on the primary. Viewsets
+with ReplicaReadMixin pick a replica for their safe-method actions,
+unless the user wrote within PLANETARIUM_REPLICA_PIN_SECONDS: their
+reads then stay on the primary until the replicas have caught up.
+
+PLANETARIUM_DATABASE_REPLICAS lists the replica aliases; without any,
+every query goes to the primary.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+
+REPLICA_PIN_CACHE_KEY = "replica_pin:{user_id}"
+REPLICA_PIN_SECONDS = 10
+
+_read_database = ContextVar("read_database", default=None)
+
+
+def get_replicas():
+    return list(getattr(settings, "PLANETARIUM_DATABASE_REPLICAS", ()))
+
+
+def get_pin_seconds():
+    return getattr(
+        settings,
+        "PLANETARIUM_REPLICA_PIN_SECONDS",
+        REPLICA_PIN_SECONDS
+    )
+
+
+@contextmanager
+def read_from(alias):
+    """Route reads inside the block to `alias` (None: the primary)"""
+    token = _read_database.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_database.reset(token)
+
+
+def use_primary():
+    return read_from(None)
+
+
+def pin_to_primary(user):
+    """Keep the user's reads on the primary for the pin window"""
+    cache.set(
+        REPLICA_PIN_CACHE_KEY.format(user_id=user.pk),
+        True,
+        get_pin_seconds()
+    )
+
+
+def is_pinned(user):
+    return user.is_authenticated and cache.get(
+        REPLICA_PIN_CACHE_KEY.format(user_id=user.pk),
+        False
+    )
+
+
+def written_recently(generations):
+    """
+    Whether a model with these cache generations changed in the window.
+
+    Generations are modification times (see planetarium.cache), so a
+    response cached now from a replica that has not replayed the change
+    yet would be served stale under the new generation.
+    """
+    cutoff = time.time_ns() - get_pin_seconds() * 10 ** 9
+    return max(generations, default=0) > cutoff
+
+
+class ReplicaRouter:
+    """Database router reading from the replica picked for the request"""
+
+    def db_for_read(self, model, **hints):
+        return _read_database.get()
+
+    def db_for_write(self, model, **hints):
+        # Also for instances read from a replica, which would otherwise
+        # be saved back to it.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    Serve replica_actions from a replica, and pin writers to the primary.
+
+    Reads start after authentication and permission checks, which stay
+    on the primary. A successful unsafe request pins its user, so the
+    next reads see what they just wrote.
+    """
+
+    replica_actions = ("list", "retrieve")
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        replicas = get_replicas()
+        if (
+            replicas
+            and request.method in SAFE_METHODS
+            and self.action in self.replica_actions
+            and not is_pinned(request.user)
+        ):
+            self._replica_token = _read_database.set(random.choice(replicas))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica_token", None)
+        if token is not None:
+            _read_database.reset(token)
+            self._replica_token = None
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and get_replicas()
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,145 @@
+from django.conf import settings
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+
+
+class SearchBackend:
+    """
+    Full-text search over astronomy show titles and descriptions.
+
+    search() filters a queryset to the matching shows, annotates them
+    with search_rank (higher is better) and orders them by it.
+    """
+
+    def search(self, queryset, term):
+        raise NotImplementedError
+
+
+class LikeSearchBackend(SearchBackend):
+    """Fallback for databases without full-text search"""
+
+    def search(self, queryset, term):
+        condition = Q()
+        for token in term.split():
+            condition &= (
+                Q(title__icontains=token) | Q(description__icontains=token)
+            )
+        return queryset.filter(condition)
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Ranked search on the generated, GIN-indexed search_vector column"""
+
+    config = "english"
+
+    @staticmethod
+    def tsquery_expression(term):
+        # The to_tsquery() twin of SQLiteSearchBackend.match_expression:
+        # every token quoted, so operators in user input are literals,
+        # matched as a prefix and all of them required.
+        return " & ".join(
+            "'{}':*".format(token.replace("\\", "\\\\").replace("'", "''"))
+            for token in term.split()
+        )
+
+    def search(self, queryset, term):
+        from django.contrib.postgres.search import (
+            SearchQuery,
+            SearchRank,
+            SearchVectorField,
+        )
+
+        vector = RawSQL(
+            '"planetarium_astronomyshow"."search_vector"',
+            [],
+            output_field=SearchVectorField()
+        )
+        query = SearchQuery(
+            self.tsquery_expression(term),
+            config=self.config,
+            search_type="raw"
+        )
+        return queryset.alias(search_vector=vector).filter(
+            search_vector=query
+        ).annotate(
+            search_rank=SearchRank(vector, query)
+        ).order_by("-search_rank", "id")
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """Ranked search on the planetarium_astronomyshow_fts FTS5 table"""
+
+    table = "planetarium_astronomyshow_fts"
+    title_weight = 10.0
+    description_weight = 1.0
+
+    @staticmethod
+    def match_expression(term):
+        # Quote every token so FTS5 operators in user input are literals,
+        # and match it as a prefix.
+        return " ".join(
+            '"{}"*'.format(token.replace('"', '""'))
+            for token in term.split()
+        )
+
+    def search(self, queryset, term):
+        match = self.match_expression(term)
+        matching_ids = RawSQL(
+            f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s",
+            [match]
+        )
+        # bm25() is negative and lower is better, so negate it.
+        rank = RawSQL(
+            f"SELECT -bm25({self.table}, %s, %s) FROM {self.table} "
+            f"WHERE {self.table} MATCH %s "
+            f"AND rowid = planetarium_astronomyshow.id",
+            [self.title_weight, self.description_weight, match],
+            output_field=FloatField()
+        )
+        return queryset.filter(id__in=matching_ids).annotate(
+            search_rank=rank
+        ).order_by("-search_rank", "id")
+
+
+SEARCH_BACKENDS = {
+    "postgresql": PostgresSearchBackend,
+    "sqlite": SQLiteSearchBackend,
+}
+
+
+def get_search_backend(using="default"):
+    """
+    Return the search backend for a database.
+
+    PLANETARIUM_SEARCH_BACKEND (a dotted path) overrides the choice made
+    from the database vendor.
+    """
+    backend_path = getattr(settings, "PLANETARIUM_SEARCH_BACKEND", None)
+    if backend_path:
+        return import_string(backend_path)()
+    vendor = connections[using].vendor
+    return SEARCH_BACKENDS.get(vendor, LikeSearchBackend)()
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, "").strip()
+        if not term:
+            return queryset
+        return get_search_backend(queryset.db).search(queryset, term)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Full-text search in titles and descriptions.",
+                "schema": {"type": "string"},
+            },
+        ]
@@ -0,0 +1,322 @@
+"""
+Per show session feed of seat changes.
+
+Every change to a seat map is published as an event: seats "taken"
+(sold or held), seats "freed", or a "reset" telling clients to fetch
+the whole seat map again. Event ids grow with every event of a session
+and clients resume from the last id they saw; when the events after it
+are no longer kept, they get a reset instead.
+
+Delivery is not pushed: long polls and event streams read the broker
+every SEAT_EVENT_POLL_INTERVAL seconds until something new shows up, so
+an event reaches clients up to that long after it is published.
+"""
+
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import defaultdict, deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import ValidationError
+
+
+SEAT_EVENT_CACHE_KEY = "seat_events:{show_session_id}:{event_id}"
+SEAT_EVENT_LAST_ID_CACHE_KEY = "seat_events:{show_session_id}:last"
+SEAT_EVENT_TIMEOUT = 60 * 60
+SEAT_EVENT_BACKLOG = 500
+SEAT_EVENT_POLL_INTERVAL = 0.25
+# Seconds an event id may be taken before its event is readable; a gap
+# older than that is an event lost from the cache.
+SEAT_EVENT_PUBLISH_GRACE = 1
+# Longest a long-poll request waits, and a server-sent event stream
+# stays open before the client reconnects with Last-Event-ID.
+SEAT_EVENT_WAIT = 25
+SEAT_EVENT_STREAM_TIMEOUT = 60 * 5
+SEAT_EVENT_KEEPALIVE = 15
+SEAT_EVENT_RETRY_MS = 3000
+
+DEFAULT_BROKER = "planetarium.seat_events.CacheSeatEventBroker"
+
+
+def _first_event_id():
+    # Ids start from the current time in microseconds, so a feed that
+    # restarts (or whose counter was evicted) never reuses an old id.
+    return time.time_ns() // 1000
+
+
+def reset_event(event_id):
+    return {"id": event_id, "type": "reset", "seats": []}
+
+
+class SeatEventBroker:
+    """
+    Publishes seat events and reads them back after an event id.
+
+    read() returns the events after the given id, oldest first, and
+    the id to read after next: the last one returned, or the session's
+    last event id with a single reset event when some of them are lost.
+    """
+
+    backlog = SEAT_EVENT_BACKLOG
+
+    def publish(self, show_session_id, type, seats):
+        raise NotImplementedError
+
+    def last_event_id(self, show_session_id):
+        raise NotImplementedError
+
+    def read(self, show_session_id, after):
+        raise NotImplementedError
+
+    async def alast_event_id(self, show_session_id):
+        return await sync_to_async(self.last_event_id)(show_session_id)
+
+    async def aread(self, show_session_id, after):
+        return await sync_to_async(self.read)(show_session_id, after)
+
+
+class LocalSeatEventBroker(SeatEventBroker):
+    """In-process broker, for tests and single-process servers"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last_ids = {}
+        self.events = defaultdict(lambda: deque(maxlen=self.backlog))
+
+    def _last_event_id(self, show_session_id):
+        return self.last_ids.setdefault(show_session_id, _first_event_id())
+
+    def publish(self, show_session_id, type, seats):
+        with self.lock:
+            event_id = self._last_event_id(show_session_id) + 1
+            self.last_ids[show_session_id] = event_id
+            self.events[show_session_id].append(
+                {"id": event_id, "type": type, "seats": seats}
+            )
+        return event_id
+
+    def last_event_id(self, show_session_id):
+        with self.lock:
+            return self._last_event_id(show_session_id)
+
+    def read(self, show_session_id, after):
+        with self.lock:
+            last = self._last_event_id(show_session_id)
+            if after == last:
+                return last, []
+            events = [
+                event for event in self.events[show_session_id]
+                if event["id"] > after
+            ]
+        if after > last or len(events) != last - after:
+            return last, [reset_event(last)]
+        return last, events
+
+    async def alast_event_id(self, show_session_id):
+        return self.last_event_id(show_session_id)
+
+    async def aread(self, show_session_id, after):
+        return self.read(show_session_id, after)
+
+
+class CacheSeatEventBroker(SeatEventBroker):
+    """
+    Broker on the default cache, shared by every process using it.
+
+    Each session's last event id is an atomically incremented counter
+    and every event is stored under its id until it times out, along
+    with the time it was published. The id is taken before the event is
+    stored, so a reader may find ids whose events are not written yet;
+    it stops before them and reads them on its next poll, until they
+    are more than publish_grace seconds behind a later event.
+    """
+
+    timeout = SEAT_EVENT_TIMEOUT
+    publish_grace = SEAT_EVENT_PUBLISH_GRACE
+
+    @staticmethod
+    def _key(show_session_id, event_id):
+        return SEAT_EVENT_CACHE_KEY.format(
+            show_session_id=show_session_id,
+            event_id=event_id
+        )
+
+    @staticmethod
+    def _last_id_key(show_session_id):
+        return SEAT_EVENT_LAST_ID_CACHE_KEY.format(
+            show_session_id=show_session_id
+        )
+
+    def publish(self, show_session_id, type, seats):
+        key = self._last_id_key(show_session_id)
+        try:
+            event_id = cache.incr(key)
+        except ValueError:
+            cache.add(key, _first_event_id(), timeout=None)
+            event_id = cache.incr(key)
+        cache.set(
+            self._key(show_session_id, event_id),
+            (time.time(), {"id": event_id, "type": type, "seats": seats}),
+            self.timeout
+        )
+        return event_id
+
+    def last_event_id(self, show_session_id):
+        key = self._last_id_key(show_session_id)
+        last = cache.get(key)
+        if last is None:
+            cache.add(key, _first_event_id(), timeout=None)
+            last = cache.get(key)
+        return last
+
+    def _keys(self, show_session_id, last, after):
+        # None when the events after `after` can no longer all be kept.
+        if after > last or last - after > self.backlog:
+            return None
+        return [
+            self._key(show_session_id, event_id)
+            for event_id in range(after + 1, last + 1)
+        ]
+
+    def _result(self, after, last, keys, events):
+        if keys is None:
+            return last, [reset_event(last)]
+        ready = []
+        for index, key in enumerate(keys):
+            if key not in events:
+                break
+            ready.append(events[key][1])
+        else:
+            return last, ready
+        # An event is missing: still being published, unless a later
+        # one was stored well before now.
+        published = [events[key][0] for key in keys[index:] if key in events]
+        if published and min(published) < time.time() - self.publish_grace:
+            return last, [reset_event(last)]
+        return (ready[-1]["id"] if ready else after), ready
+
+    def read(self, show_session_id, after):
+        last = self.last_event_id(show_session_id)
+        keys = self._keys(show_session_id, last, after)
+        events = cache.get_many(keys) if keys else {}
+        return self._result(after, last, keys, events)
+
+    async def alast_event_id(self, show_session_id):
+        last = await cache.aget(self._last_id_key(show_session_id))
+        if last is None:
+            return await super().alast_event_id(show_session_id)
+        return last
+
+    async def aread(self, show_session_id, after):
+        last = await self.alast_event_id(show_session_id)
+        keys = self._keys(show_session_id, last, after)
+        events = await cache.aget_many(keys) if keys else {}
+        return self._result(after, last, keys, events)
+
+
+_brokers = {}
+
+
+def get_seat_event_broker():
+    """
+    Return the broker named by PLANETARIUM_SEAT_EVENT_BROKER (a dotted
+    path), by default the cache-backed one.
+    """
+    path = getattr(settings, "PLANETARIUM_SEAT_EVENT_BROKER", DEFAULT_BROKER)
+    if path not in _brokers:
+        _brokers[path] = import_string(path)()
+    return _brokers[path]
+
+
+def publish_seats(show_session_id, seats, taken):
+    get_seat_event_broker().publish(
+        show_session_id,
+        "taken" if taken else "freed",
+        [[row, seat] for row, seat in seats]
+    )
+
+
+def publish_reset(*show_session_ids):
+    broker = get_seat_event_broker()
+    for show_session_id in show_session_ids:
+        broker.publish(show_session_id, "reset", [])
+
+
+def _release_connections():
+    # Waiting only reads the broker, so database connections go back
+    # (to the pool, in production) instead of being held for the wait.
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+def wait_for_events(show_session_id, after, timeout):
+    """
+    Poll the broker until there are events after `after` or timeout.
+
+    The thread's database connections are closed before it starts
+    waiting; they are reopened if the request needs them again.
+    """
+    broker = get_seat_event_broker()
+    deadline = time.monotonic() + timeout
+    released = False
+    while True:
+        last, events = broker.read(show_session_id, after)
+        if events or time.monotonic() >= deadline:
+            return last, events
+        if not released:
+            _release_connections()
+            released = True
+        time.sleep(SEAT_EVENT_POLL_INTERVAL)
+
+
+async def await_events(show_session_id, after, timeout):
+    """wait_for_events() for async views"""
+    broker = get_seat_event_broker()
+    deadline = time.monotonic() + timeout
+    while True:
+        last, events = await broker.aread(show_session_id, after)
+        if events or time.monotonic() >= deadline:
+            return last, events
+        await asyncio.sleep(SEAT_EVENT_POLL_INTERVAL)
+
+
+def seat_event_params(params, headers, max_timeout=SEAT_EVENT_WAIT):
+    """
+    The event id to read after and the seconds to wait for a request.
+
+    The id comes from ?after= or a Last-Event-ID header and is None when
+    neither is given; ?timeout= defaults to and is capped at max_timeout.
+    """
+    errors = {}
+    after = headers.get("Last-Event-ID") or params.get("after")
+    if after is not None:
+        try:
+            after = int(after)
+        except ValueError:
+            errors["after"] = "Must be an event id."
+    try:
+        timeout = float(params.get("timeout", max_timeout))
+    except ValueError:
+        timeout = math.nan
+    if math.isnan(timeout):
+        errors["timeout"] = "Must be a number of seconds."
+    timeout = min(max(timeout, 0), max_timeout)
+    if errors:
+        raise ValidationError(errors)
+    return after, timeout
+
+
+def format_server_sent_event(event):
+    return (
+        f"id: {event['id']}\n"
+        f"event: {event['type']}\n"
+        f"data: {json.dumps({'seats': event['seats']})}\n\n"
+    )
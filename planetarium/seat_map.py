@@ -0,0 +1,371 @@
+import functools
+import re
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from planetarium.models import SeatHold, ShowSession, Ticket
+from planetarium.seat_events import publish_reset, publish_seats
+
+
+SEAT_MAP_CACHE_KEY = "seat_map:{show_session_id}"
+SEAT_MAP_VERSION_KEY = "seat_map_version:{show_session_id}"
+SEAT_MAP_LOCK_KEY = "seat_map_lock:{show_session_id}"
+SEAT_MAP_CACHE_TIMEOUT = 60 * 60
+# Seconds a worker waits for the lock to patch a cached map, and the
+# longest a crashed worker can keep it.
+SEAT_MAP_LOCK_WAIT = 0.05
+SEAT_MAP_LOCK_TIMEOUT = 5
+
+
+@functools.lru_cache
+def _rows_from_middle(rows):
+    # (distance from the middle row as a fraction, row), nearest first.
+    return tuple(sorted(
+        (abs(row - (rows + 1) / 2) / rows, row)
+        for row in range(1, rows + 1)
+    ))
+
+
+def _longest_free_run(bits, limit):
+    # Length of the longest run of free seats, up to limit, found by
+    # bisecting on whether a run of a given length exists; each probe
+    # is one regex search, so the map is never walked in Python.
+    low, high = 0, limit
+    while low < high:
+        size = (low + high + 1) // 2
+        if re.search(f"0{{{size}}}", bits):
+            low = size
+        else:
+            high = size - 1
+    return low
+
+
+class SeatMap:
+    """
+    Occupancy of a show session packed into a bitmap.
+
+    Seat (row, seat) is bit (row - 1) * seats_in_row + (seat - 1),
+    most significant bit first; a set bit means the seat is sold or held
+    for checkout.
+    """
+
+    def __init__(self, rows, seats_in_row, bitmap=None):
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        size = (rows * seats_in_row + 7) // 8
+        self.bitmap = bytearray(bitmap) if bitmap else bytearray(size)
+
+    @staticmethod
+    def _taken_seats(show_session):
+        sold = Ticket.objects.filter(
+            show_session=show_session
+        ).order_by().values_list("row", "seat")
+        held = SeatHold.objects.filter(
+            show_session=show_session,
+            expires_at__gt=timezone.now()
+        ).order_by().values_list("row", "seat")
+        return sold.union(held, all=True)
+
+    @classmethod
+    def build(cls, show_session):
+        dome = show_session.planetarium_dome
+        seat_map = cls(dome.rows, dome.seats_in_row)
+        for row, seat in cls._taken_seats(show_session):
+            seat_map.set(row, seat, True)
+        return seat_map
+
+    @classmethod
+    async def abuild(cls, show_session):
+        dome = show_session.planetarium_dome
+        seat_map = cls(dome.rows, dome.seats_in_row)
+        async for row, seat in cls._taken_seats(show_session):
+            seat_map.set(row, seat, True)
+        return seat_map
+
+    @property
+    def capacity(self):
+        return self.rows * self.seats_in_row
+
+    def _position(self, row, seat):
+        if not (0 < row <= self.rows and 0 < seat <= self.seats_in_row):
+            return None
+        index = (row - 1) * self.seats_in_row + seat - 1
+        return index >> 3, 0x80 >> (index & 7)
+
+    def is_taken(self, row, seat):
+        position = self._position(row, seat)
+        if position is None:
+            return False
+        byte, mask = position
+        return bool(self.bitmap[byte] & mask)
+
+    def set(self, row, seat, taken):
+        position = self._position(row, seat)
+        if position is None:
+            return
+        byte, mask = position
+        if taken:
+            self.bitmap[byte] |= mask
+        else:
+            self.bitmap[byte] &= ~mask
+
+    def taken_count(self):
+        return int.from_bytes(self.bitmap, "big").bit_count()
+
+    def _bits(self):
+        # The map as a "0"/"1" string, one character per seat.
+        return format(
+            int.from_bytes(self.bitmap, "big"),
+            f"0{len(self.bitmap) * 8}b"
+        )[:self.capacity]
+
+    def to_runs(self):
+        """
+        Run-length encode the seats in bitmap order.
+
+        Runs alternate between free and taken seats and always start
+        with a (possibly empty) run of free seats.
+        """
+        bits = self._bits()
+        runs = [len(run) for run in re.findall("0+|1+", bits)]
+        if not bits.startswith("0"):
+            runs.insert(0, 0)
+        return runs
+
+    def _row_bits(self):
+        # One bit string per row, so runs of free seats are found by
+        # the regex engine instead of seat by seat.
+        bits = self._bits()
+        width = self.seats_in_row
+        return [
+            bits[row * width:(row + 1) * width] for row in range(self.rows)
+        ]
+
+    def _best_block(self, lines, rows, size):
+        # (score, row, first seat) of the most central block of `size`
+        # free seats, where the score adds the block's distance from
+        # the middle row and from the middle seat, both as fractions.
+        fitting = re.compile(f"0{{{size},}}")
+        block = "0" * size
+        width = self.seats_in_row
+        middle = (width - size) / 2
+        ideal = round(middle)
+        best = None
+        # Rows come from the middle out; once a row's own distance
+        # scores worse than the best block, no later row can beat it.
+        for row_score, row in rows:
+            if best and row_score >= best[0]:
+                break
+            line = lines[row - 1]
+            if block not in line:
+                continue
+            for match in fitting.finditer(line):
+                start = min(max(ideal, match.start()), match.end() - size)
+                score = row_score + abs(start - middle) / width
+                if best is None or score < best[0]:
+                    best = (score, row, start + 1)
+                if match.start() >= ideal:
+                    # Later runs in the row only start further out.
+                    break
+        return best
+
+    def best_seats(self, count):
+        """
+        Pick `count` free seats as close to the middle as possible.
+
+        Returns (row, seat) pairs forming one contiguous block when any
+        row has room for it, otherwise blocks cut from the longest free
+        runs left. Returns None when too few seats are free.
+        """
+        if self.capacity - self.taken_count() < count:
+            return None
+        lines = self._row_bits()
+        rows = _rows_from_middle(self.rows)
+        size = _longest_free_run("1".join(lines), count)
+        if size == count:
+            _, row, start = self._best_block(lines, rows, count)
+            return [(row, seat) for seat in range(start, start + count)]
+
+        seats = []
+        while len(seats) < count:
+            size = min(size, count - len(seats))
+            best = self._best_block(lines, rows, size)
+            if best is None:
+                size -= 1
+                continue
+            _, row, start = best
+            seats.extend((row, seat) for seat in range(start, start + size))
+            line = lines[row - 1]
+            lines[row - 1] = (
+                line[:start - 1] + "1" * size + line[start - 1 + size:]
+            )
+        return sorted(seats)
+
+    def summary(self):
+        return {
+            "rows": self.rows,
+            "seats_in_row": self.seats_in_row,
+            "taken": self.taken_count(),
+            "runs": self.to_runs(),
+        }
+
+    def to_bytes(self):
+        return bytes(self.bitmap)
+
+    def to_cache(self):
+        return self.rows, self.seats_in_row, self.to_bytes()
+
+    @classmethod
+    def from_cache(cls, value):
+        rows, seats_in_row, bitmap = value
+        return cls(rows, seats_in_row, bitmap)
+
+
+def _cache_key(show_session_id):
+    return SEAT_MAP_CACHE_KEY.format(show_session_id=show_session_id)
+
+
+def _version_key(show_session_id):
+    return SEAT_MAP_VERSION_KEY.format(show_session_id=show_session_id)
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def get_seat_map(show_session_id):
+    """
+    Return the cached seat map, building it on a cache miss.
+
+    A cached map is only used while it carries the session's current
+    version. The version is read before the database, so a map built
+    from rows read before a change commits is never served after it.
+    """
+    key = _cache_key(show_session_id)
+    version_key = _version_key(show_session_id)
+    cached = cache.get_many([key, version_key])
+    version = cached.get(version_key)
+    if version is None:
+        cache.add(version_key, _new_version(), SEAT_MAP_CACHE_TIMEOUT)
+        version = cache.get(version_key)
+    elif key in cached and cached[key][0] == version:
+        return SeatMap.from_cache(cached[key][1])
+    show_session = ShowSession.objects.select_related(
+        "planetarium_dome"
+    ).get(pk=show_session_id)
+    seat_map = SeatMap.build(show_session)
+    cache.set(
+        key,
+        (version, seat_map.to_cache()),
+        SEAT_MAP_CACHE_TIMEOUT
+    )
+    return seat_map
+
+
+async def aget_seat_map(show_session_id):
+    """get_seat_map() for async views"""
+    key = _cache_key(show_session_id)
+    version_key = _version_key(show_session_id)
+    cached = await cache.aget_many([key, version_key])
+    version = cached.get(version_key)
+    if version is None:
+        await cache.aadd(version_key, _new_version(), SEAT_MAP_CACHE_TIMEOUT)
+        version = await cache.aget(version_key)
+    elif key in cached and cached[key][0] == version:
+        return SeatMap.from_cache(cached[key][1])
+    show_session = await ShowSession.objects.select_related(
+        "planetarium_dome"
+    ).aget(pk=show_session_id)
+    seat_map = await SeatMap.abuild(show_session)
+    await cache.aset(
+        key,
+        (version, seat_map.to_cache()),
+        SEAT_MAP_CACHE_TIMEOUT
+    )
+    return seat_map
+
+
+def _expire(show_session_ids):
+    # Moves each version on (atomically where it exists), so maps built
+    # before the change no longer match, then drops the maps.
+    for show_session_id in show_session_ids:
+        key = _version_key(show_session_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), SEAT_MAP_CACHE_TIMEOUT)
+    cache.delete_many([_cache_key(pk) for pk in show_session_ids])
+
+
+def _lock(show_session_id):
+    # Wait a little for the session's patch lock; False when another
+    # worker keeps holding it.
+    key = SEAT_MAP_LOCK_KEY.format(show_session_id=show_session_id)
+    deadline = time.monotonic() + SEAT_MAP_LOCK_WAIT
+    while not cache.add(key, True, SEAT_MAP_LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(SEAT_MAP_LOCK_WAIT / 10)
+    return True
+
+
+def _unlock(show_session_id):
+    cache.delete(SEAT_MAP_LOCK_KEY.format(show_session_id=show_session_id))
+
+
+def _patch(show_session_id, seats, taken):
+    # Set the seats' bits in the cached map and store it under the next
+    # version. Only an increment from the map's own version proves no
+    # other change moved the version meanwhile; otherwise the map is
+    # dropped and rebuilt on the next read.
+    key = _cache_key(show_session_id)
+    version_key = _version_key(show_session_id)
+    cached = cache.get_many([key, version_key])
+    version = cached.get(version_key)
+    if version is None or cached.get(key, (None,))[0] != version:
+        _expire([show_session_id])
+        return
+    try:
+        new_version = cache.incr(version_key)
+    except ValueError:
+        new_version = None
+    if new_version != version + 1:
+        _expire([show_session_id])
+        return
+    seat_map = SeatMap.from_cache(cached[key][1])
+    for row, seat in seats:
+        seat_map.set(row, seat, taken)
+    cache.set(
+        key,
+        (new_version, seat_map.to_cache()),
+        SEAT_MAP_CACHE_TIMEOUT
+    )
+
+
+def update_seat_map(show_session_id, seats, taken):
+    """
+    Record that seats of a session were taken or freed.
+
+    Call it once the change is committed. The cached map is patched
+    under a short per-session lock and stored under a new version, so
+    readers keep being served from the cache during a booking rush.
+    When the lock stays busy, or the version moved under the patch, the
+    map is expired instead and rebuilt on the next read. The change is
+    published to the session's seat event feed after the map is
+    updated, so a client never pairs a newer event id with an older map.
+    """
+    if _lock(show_session_id):
+        try:
+            _patch(show_session_id, seats, taken)
+        finally:
+            _unlock(show_session_id)
+    else:
+        _expire([show_session_id])
+    publish_seats(show_session_id, seats, taken)
+
+
+def invalidate_seat_map(*show_session_ids):
+    _expire(show_session_ids)
+    publish_reset(*show_session_ids)
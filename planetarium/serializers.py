@@ -1,7 +1,12 @@
+from collections import defaultdict
+
+from django.db.models import F, Prefetch, prefetch_related_objects
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from planetarium.booking import book_seats, confirm_hold, hold_seats
+from planetarium.fast_lists import ValuesListSerializer
 from planetarium.models import (
     AstronomyShow,
     PlanetariumDome,
@@ -12,6 +17,16 @@ from planetarium.models import (
 )
 
 
+def reservation_tickets_prefetch():
+    return Prefetch(
+        "tickets",
+        queryset=Ticket.objects.select_related(
+            "show_session__astronomy_show",
+            "show_session__planetarium_dome"
+        )
+    )
+
+
 class ShowThemeSerializer(serializers.ModelSerializer):
     class Meta:
         model = ShowTheme
@@ -45,6 +60,31 @@ class AstronomyShowListSerializer(AstronomyShowSerializer):
     )
 
 
+class AstronomyShowValuesListSerializer(ValuesListSerializer):
+    """AstronomyShowListSerializer from .values() rows"""
+
+    fields = {
+        "id": "id",
+        "title": "title",
+        "description": "description",
+        "show_theme": "id",
+    }
+
+    def prepare(self, rows):
+        if "show_theme" not in self.names:
+            return
+        # The same query prefetch_related("show_theme") runs, so theme
+        # names come in the same order.
+        self.show_themes = defaultdict(list)
+        for show_id, name in ShowTheme.objects.filter(
+            astronomy_shows__in=[row["id"] for row in rows]
+        ).values_list("astronomy_shows", "name"):
+            self.show_themes[show_id].append(name)
+
+    def get_converters(self):
+        return {"show_theme": lambda pk: self.show_themes.get(pk, [])}
+
+
 class AstronomyShowRetrieveSerializer(AstronomyShowSerializer):
     show_theme = ShowThemeSerializer(many=True)
 
@@ -61,6 +101,7 @@ class PlanetariumDomeSerializer(serializers.ModelSerializer):
             "seats_in_row",
             "capacity"
         ]
+        field_sources = {"capacity": ["rows", "seats_in_row"]}
 
     @extend_schema_field(serializers.IntegerField())
     def get_capacity(self, obj: PlanetariumDome) -> int:
@@ -78,6 +119,13 @@ class ShowSessionSerializer(serializers.ModelSerializer):
         ]
 
 
+TICKETS_AVAILABLE_SOURCES = [
+    "tickets_sold",
+    "planetarium_dome.rows",
+    "planetarium_dome.seats_in_row",
+]
+
+
 class ShowSessionListSerializer(ShowSessionSerializer):
     astronomy_show = serializers.CharField(
         source="astronomy_show.title",
@@ -87,11 +135,49 @@ class ShowSessionListSerializer(ShowSessionSerializer):
         source="planetarium_dome.name",
         read_only=True
     )
+    tickets_available = serializers.IntegerField(read_only=True)
+
+    class Meta(ShowSessionSerializer.Meta):
+        fields = ShowSessionSerializer.Meta.fields + [
+            "tickets_sold",
+            "tickets_available"
+        ]
+        field_sources = {"tickets_available": TICKETS_AVAILABLE_SOURCES}
+
+
+class ShowSessionValuesListSerializer(ValuesListSerializer):
+    """ShowSessionListSerializer from .values() rows"""
+
+    fields = {
+        "id": "id",
+        "astronomy_show": "astronomy_show__title",
+        "planetarium_dome": "planetarium_dome__name",
+        "show_time": "show_time",
+        "tickets_sold": "tickets_sold",
+        "tickets_available": (
+            F("planetarium_dome__rows") * F("planetarium_dome__seats_in_row")
+            - F("tickets_sold")
+        ),
+    }
+
+    def get_converters(self):
+        show_time = serializers.DateTimeField()
+        # Look the current timezone up once per page, not once per row.
+        show_time.timezone = show_time.default_timezone()
+        return {"show_time": show_time.to_representation}
 
 
 class ShowSessionRetrieveSerializer(ShowSessionSerializer):
     astronomy_show = AstronomyShowRetrieveSerializer()
     planetarium_dome = PlanetariumDomeSerializer()
+    tickets_available = serializers.IntegerField(read_only=True)
+
+    class Meta(ShowSessionSerializer.Meta):
+        fields = ShowSessionSerializer.Meta.fields + [
+            "tickets_sold",
+            "tickets_available"
+        ]
+        field_sources = {"tickets_available": TICKETS_AVAILABLE_SOURCES}
 
 
 class ReservationSerializer(serializers.ModelSerializer):
@@ -112,7 +198,73 @@ class ReservationSerializer(serializers.ModelSerializer):
         ]
 
 
+class ReservationTicketSerializer(serializers.ModelSerializer):
+    astronomy_show = serializers.CharField(
+        source="show_session.astronomy_show.title",
+        read_only=True
+    )
+    planetarium_dome = serializers.CharField(
+        source="show_session.planetarium_dome.name",
+        read_only=True
+    )
+    show_time = serializers.DateTimeField(
+        source="show_session.show_time",
+        read_only=True
+    )
+
+    class Meta:
+        model = Ticket
+        fields = [
+            "id",
+            "row",
+            "seat",
+            "show_session",
+            "astronomy_show",
+            "planetarium_dome",
+            "show_time"
+        ]
+
+
+class ReservationDetailSerializer(ReservationSerializer):
+    tickets = ReservationTicketSerializer(many=True, read_only=True)
+
+    class Meta(ReservationSerializer.Meta):
+        fields = ReservationSerializer.Meta.fields + ["tickets"]
+
+
+class UpcomingTicketSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Ticket
+        fields = [
+            "id",
+            "row",
+            "seat",
+            "reservation"
+        ]
+
+
+class UpcomingShowSessionSerializer(ShowSessionListSerializer):
+    tickets = UpcomingTicketSerializer(
+        source="user_tickets",
+        many=True,
+        read_only=True
+    )
+
+    class Meta(ShowSessionListSerializer.Meta):
+        fields = ShowSessionListSerializer.Meta.fields + ["tickets"]
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    show_session = serializers.PrimaryKeyRelatedField(
+        queryset=ShowSession.objects.select_related(
+            "astronomy_show",
+            "planetarium_dome"
+        )
+    )
+    reservation = serializers.PrimaryKeyRelatedField(
+        queryset=Reservation.objects.select_related("user")
+    )
+
     class Meta:
         model = Ticket
         fields = [
@@ -139,18 +291,14 @@ class TicketSerializer(serializers.ModelSerializer):
         seat = data.get("seat")
         show_session = data.get("show_session")
         dome = show_session.planetarium_dome
-        if not (0 < row < dome.rows):
+        if not (0 < row <= dome.rows):
             raise serializers.ValidationError(
                 {"row": f"Row {row} is out of range."}
             )
-        if not (0 < seat < dome.seats_in_row):
+        if not (0 < seat <= dome.seats_in_row):
             raise serializers.ValidationError(
                 {"seat": f"Seat {seat} is out of range."}
             )
-        if Ticket.objects.filter(row=row, seat=seat).exists():
-            raise serializers.ValidationError(
-                {"seat": f"Seat {seat} is already taken."}
-            )
         return data
 
 
@@ -186,6 +334,117 @@ class TicketListSerializer(serializers.ModelSerializer):
         ]
 
 
+class TicketValuesListSerializer(ValuesListSerializer):
+    """TicketListSerializer from .values() rows"""
+
+    fields = {
+        "id": "id",
+        "row": "row",
+        "seat": "seat",
+        "user": "reservation__user__email",
+        "astronomy_show": "show_session__astronomy_show__title",
+    }
+
+
 class TickerRetrieveSerializer(TicketSerializer):
-    show_session = ShowSessionRetrieveSerializer()
-    reservation = ReservationSerializer()
+    class Meta(TicketSerializer.Meta):
+        expandable_fields = {
+            "show_session": ShowSessionRetrieveSerializer,
+            "reservation": ReservationSerializer,
+        }
+
+
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField(min_value=1)
+    seat = serializers.IntegerField(min_value=1)
+
+
+class ReservationBookingSerializer(serializers.Serializer):
+    show_session = serializers.PrimaryKeyRelatedField(
+        queryset=ShowSession.objects.select_related("planetarium_dome"),
+        write_only=True
+    )
+    tickets = SeatSerializer(many=True, allow_empty=False)
+
+    def validate(self, data):
+        show_session = data["show_session"]
+        dome = show_session.planetarium_dome
+        seats = [(item["row"], item["seat"]) for item in data["tickets"]]
+
+        if len(set(seats)) != len(seats):
+            raise serializers.ValidationError(
+                {"tickets": "The same seat is requested more than once."}
+            )
+        for row, seat in seats:
+            if not (0 < row <= dome.rows):
+                raise serializers.ValidationError(
+                    {"tickets": f"Row {row} is out of range."}
+                )
+            if not (0 < seat <= dome.seats_in_row):
+                raise serializers.ValidationError(
+                    {"tickets": f"Seat {seat} is out of range."}
+                )
+        return data
+
+    def create(self, validated_data):
+        reservation, _ = book_seats(
+            validated_data["user"],
+            validated_data["show_session"],
+            [(item["row"], item["seat"]) for item in validated_data["tickets"]]
+        )
+        return reservation
+
+    def to_representation(self, instance):
+        prefetch_related_objects([instance], reservation_tickets_prefetch())
+        return ReservationDetailSerializer(instance).data
+
+
+class SeatHoldSerializer(ReservationBookingSerializer):
+    def create(self, validated_data):
+        return hold_seats(
+            validated_data["user"],
+            validated_data["show_session"],
+            [(item["row"], item["seat"]) for item in validated_data["tickets"]]
+        )
+
+    def to_representation(self, instance):
+        return {
+            "hold": str(instance[0].token),
+            "show_session": instance[0].show_session_id,
+            "expires_at": serializers.DateTimeField().to_representation(
+                instance[0].expires_at
+            ),
+            "tickets": [
+                {"row": hold.row, "seat": hold.seat} for hold in instance
+            ],
+        }
+
+
+class SeatHoldConfirmSerializer(serializers.Serializer):
+    hold = serializers.UUIDField(write_only=True)
+
+    def create(self, validated_data):
+        return confirm_hold(validated_data["user"], validated_data["hold"])
+
+    def to_representation(self, instance):
+        prefetch_related_objects([instance], reservation_tickets_prefetch())
+        return ReservationDetailSerializer(instance).data
+
+
+class ReservationBulkCancelSerializer(serializers.Serializer):
+    reservations = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        required=False
+    )
+    show_session = serializers.PrimaryKeyRelatedField(
+        queryset=ShowSession.objects.all(),
+        required=False
+    )
+
+    def validate(self, data):
+        if ("reservations" in data) == ("show_session" in data):
+            raise serializers.ValidationError(
+                "Provide either reservations or show_session."
+            )
+        return data
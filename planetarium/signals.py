@@ -1,10 +1,105 @@
-from django.core.cache import cache
-from django.db.models.signals import post_delete, post_save
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save,
+)
 from django.dispatch import receiver
 
-from planetarium.models import Ticket
+from planetarium.cache import bump_generation
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+from planetarium.seat_map import invalidate_seat_map, update_seat_map
 
 
-@receiver([post_delete, post_save], sender=Ticket)
-def invalidate_ticket_cache(sender, instance, **kwargs): # noqa
-    cache.delete("ticket_view:*")
+CACHED_MODELS = [
+    ShowTheme,
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    Reservation,
+    Ticket,
+]
+
+
+def invalidate_model_cache(sender, **kwargs): # noqa
+    bump_generation(sender)
+
+
+for model in CACHED_MODELS:
+    post_save.connect(invalidate_model_cache, sender=model)
+    post_delete.connect(invalidate_model_cache, sender=model)
+
+
+@receiver(m2m_changed, sender=AstronomyShow.show_theme.through)
+def invalidate_show_theme_cache(sender, action, **kwargs): # noqa
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_generation(AstronomyShow)
+
+
+@receiver([post_delete, post_save], sender=get_user_model())
+def invalidate_user_cache(sender, update_fields=None, **kwargs): # noqa
+    # Logging in only touches last_login, which no cached view shows.
+    if update_fields and set(update_fields) == {"last_login"}:
+        return
+    bump_generation(sender)
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_ticket_seat(sender, instance, **kwargs): # noqa
+    instance._previous_seat = None
+    if not instance._state.adding:
+        instance._previous_seat = Ticket.objects.filter(
+            pk=instance.pk
+        ).values_list("show_session_id", "row", "seat").first()
+
+
+@receiver(post_save, sender=Ticket)
+def take_seat_in_seat_map(sender, instance, **kwargs): # noqa
+    previous = getattr(instance, "_previous_seat", None)
+
+    def update():
+        if previous:
+            show_session_id, row, seat = previous
+            update_seat_map(show_session_id, [(row, seat)], False)
+        update_seat_map(
+            instance.show_session_id,
+            [(instance.row, instance.seat)],
+            True
+        )
+
+    transaction.on_commit(update)
+
+
+@receiver(post_delete, sender=Ticket)
+def free_seat_in_seat_map(sender, instance, **kwargs): # noqa
+    transaction.on_commit(
+        lambda: update_seat_map(
+            instance.show_session_id,
+            [(instance.row, instance.seat)],
+            False
+        )
+    )
+
+
+@receiver(post_save, sender=ShowSession)
+def reset_show_session_seat_map(sender, instance, created, **kwargs): # noqa
+    if not created:
+        transaction.on_commit(lambda: invalidate_seat_map(instance.pk))
+
+
+@receiver(post_save, sender=PlanetariumDome)
+def reset_dome_seat_maps(sender, instance, created, **kwargs): # noqa
+    if not created:
+        show_session_ids = list(
+            instance.show_sessions.values_list("pk", flat=True)
+        )
+        transaction.on_commit(lambda: invalidate_seat_map(*show_session_ids))
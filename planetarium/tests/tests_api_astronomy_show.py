@@ -0,0 +1,134 @@
+import re
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from planetarium.models import AstronomyShow
+from planetarium.search import PostgresSearchBackend, SQLiteSearchBackend
+from planetarium.tests.tests_api_ticket import (
+    BaseApiTests,
+    sample_astronomy_show,
+)
+
+
+ASTRONOMY_SHOW_URL = reverse("planetarium:astronomyshow-list")
+
+
+class AstronomyShowSearchTests(BaseApiTests):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="search@test.com",
+            password="TestPass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.galaxies = sample_astronomy_show(
+            title="Colliding Galaxies",
+            description="Watch two spiral systems merge.",
+        )
+        self.planets = sample_astronomy_show(
+            title="Planets of the Solar System",
+            description="From Mercury to distant galaxies and back.",
+        )
+        self.moon = sample_astronomy_show(
+            title="The Moon",
+            description="Phases and eclipses.",
+        )
+
+    def search(self, term):
+        res = self.client.get(ASTRONOMY_SHOW_URL, {"search": term})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [show["id"] for show in res.data["results"]]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(
+            self.search("galaxies"),
+            [self.galaxies.id, self.planets.id]
+        )
+
+    def test_prefix_and_stemmed_matches(self):
+        self.assertEqual(self.search("eclipse"), [self.moon.id])
+        self.assertEqual(self.search("merc"), [self.planets.id])
+
+    def test_all_tokens_must_match(self):
+        self.assertEqual(self.search("spiral galaxies"), [self.galaxies.id])
+
+    def test_operators_in_input_are_literal(self):
+        self.assertEqual(self.search('moon" OR "planets'), [])
+        self.assertEqual(self.search("NEAR(moon)"), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.moon.title = "Lunar Landing"
+        self.moon.save()
+        self.galaxies.delete()
+
+        self.assertEqual(self.search("lunar"), [self.moon.id])
+        self.assertEqual(self.search("galaxies"), [self.planets.id])
+
+    @override_settings(
+        PLANETARIUM_SEARCH_BACKEND="planetarium.search.LikeSearchBackend"
+    )
+    def test_configured_backend(self):
+        self.assertEqual(
+            sorted(self.search("galax")),
+            sorted([self.galaxies.id, self.planets.id])
+        )
+
+    def test_match_expression_quotes_tokens(self):
+        self.assertEqual(
+            SQLiteSearchBackend.match_expression('black "hole'),
+            '"black"* """hole"*'
+        )
+
+    def test_query_builders_agree(self):
+        """Test both databases get the same prefix AND of literal tokens"""
+        sqlite_token = re.compile(r'"((?:[^"]|"")*)"\*')
+        postgres_token = re.compile(r"'((?:[^'\\]|''|\\.)*)':\*")
+        for term in ("galaxies", "spiral  galax", 'black "hole',
+                     "it's a\\b", 'moon" OR "planets', "NEAR(moon)"):
+            sqlite = SQLiteSearchBackend.match_expression(term)
+            postgres = PostgresSearchBackend.tsquery_expression(term)
+            self.assertEqual(
+                [
+                    sqlite_token.fullmatch(part)[1].replace('""', '"')
+                    for part in sqlite.split(" ")
+                ],
+                term.split(),
+                term
+            )
+            self.assertEqual(
+                [
+                    re.sub(
+                        r"''|\\(.)",
+                        lambda match: match[1] or "'",
+                        postgres_token.fullmatch(part)[1]
+                    )
+                    for part in postgres.split(" & ")
+                ],
+                term.split(),
+                term
+            )
+
+    @skipUnless(connection.vendor == "sqlite", "checks SQLite triggers")
+    def test_fts_triggers_exist(self):
+        """Test no migration rebuilt the show table without its triggers"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = 'planetarium_astronomyshow'"
+            )
+            triggers = {name for name, in cursor.fetchall()}
+        self.assertLessEqual(
+            {
+                "planetarium_astronomyshow_fts_insert",
+                "planetarium_astronomyshow_fts_delete",
+                "planetarium_astronomyshow_fts_update",
+            },
+            triggers
+        )
+
+    def test_no_search_returns_all(self):
+        self.assertEqual(len(self.search("")), AstronomyShow.objects.count())
@@ -0,0 +1,571 @@
+import threading
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.db.models.signals import post_delete
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from planetarium.booking import book_seats, sweep_expired_holds
+from planetarium.cache import get_generations
+from planetarium.models import Reservation, SeatHold, Ticket
+from planetarium.seat_map import get_seat_map
+from planetarium.tests.tests_api_ticket import (
+    BaseApiTests,
+    sample_planetarium_dome,
+    sample_show_session,
+    sample_ticket,
+    sample_user,
+)
+
+
+BOOK_URL = reverse("planetarium:reservation-book")
+BULK_CANCEL_URL = reverse("planetarium:reservation-bulk-cancel")
+CONFIRM_URL = reverse("planetarium:reservation-confirm")
+HOLD_URL = reverse("planetarium:reservation-hold")
+RESERVATION_URL = reverse("planetarium:reservation-list")
+UPCOMING_URL = reverse("planetarium:reservation-upcoming")
+
+
+def reservation_detail_url(reservation_id):
+    return reverse("planetarium:reservation-detail", args=[reservation_id])
+
+
+class BookingApiTests(BaseApiTests):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="booking@test.com",
+            password="TestPass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.show_session = sample_show_session(
+            planetarium_dome=sample_planetarium_dome(
+                rows=10,
+                seats_in_row=10
+            )
+        )
+
+    def book(self, seats, show_session=None):
+        payload = {
+            "show_session": (show_session or self.show_session).id,
+            "tickets": [{"row": row, "seat": seat} for row, seat in seats],
+        }
+        return self.client.post(BOOK_URL, payload, format="json")
+
+    def test_book_creates_reservation_with_tickets(self):
+        """Test booking several seats creates one reservation"""
+        res = self.book([(1, 1), (1, 2), (2, 5)])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 3)
+        reservation = Reservation.objects.get(id=res.data["id"])
+        self.assertEqual(reservation.user, self.user)
+        self.assertEqual(reservation.tickets.count(), 3)
+
+    def test_book_rejects_taken_seats(self):
+        """Test booking fails atomically and lists the lost seats"""
+        sample_ticket(row=1, seat=2, show_session=self.show_session)
+
+        res = self.book([(1, 1), (1, 2)])
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data["seats"], [{"row": 1, "seat": 2}])
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_book_same_seat_in_another_session(self):
+        """Test a seat sold for one session is free in another"""
+        sample_ticket(row=1, seat=1)
+        res = self.book([(1, 1)])
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_book_last_row_and_seat(self):
+        res = self.book([(10, 10)])
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_book_rejects_duplicate_seats(self):
+        res = self.book([(1, 1), (1, 1)])
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_book_rejects_out_of_range_seats(self):
+        res = self.book([(1, 1), (1, 50)])
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_book_query_count_does_not_depend_on_seats(self):
+        """Test booking 1 or 6 seats costs the same number of queries"""
+        with CaptureQueriesContext(connection) as one_seat:
+            self.book([(1, 1)])
+        with CaptureQueriesContext(connection) as six_seats:
+            self.book([(3, seat) for seat in range(1, 7)])
+
+        self.assertEqual(len(one_seat), len(six_seats))
+
+    def test_book_unauthenticated(self):
+        self.client.force_authenticate(user=None)
+        res = self.book([(1, 1)])
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class SeatHoldApiTests(BaseApiTests):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="holder@test.com",
+            password="TestPass123",
+        )
+        self.other = sample_user()
+        self.client.force_authenticate(user=self.user)
+        self.show_session = sample_show_session(
+            planetarium_dome=sample_planetarium_dome(
+                rows=10,
+                seats_in_row=10
+            )
+        )
+
+    def hold(self, seats):
+        payload = {
+            "show_session": self.show_session.id,
+            "tickets": [{"row": row, "seat": seat} for row, seat in seats],
+        }
+        return self.client.post(HOLD_URL, payload, format="json")
+
+    def hold_for(self, user, seats, expires_in=timedelta(minutes=10)):
+        token = uuid.uuid4()
+        return SeatHold.objects.bulk_create(
+            SeatHold(
+                token=token,
+                row=row,
+                seat=seat,
+                show_session=self.show_session,
+                user=user,
+                expires_at=timezone.now() + expires_in,
+            )
+            for row, seat in seats
+        )
+
+    def test_hold_seats(self):
+        """Test a hold returns its token and shows in the seat map"""
+        res = self.hold([(1, 1), (1, 2)])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            res.data["tickets"],
+            [{"row": 1, "seat": 1}, {"row": 1, "seat": 2}]
+        )
+        self.assertEqual(
+            SeatHold.objects.filter(token=res.data["hold"]).count(),
+            2
+        )
+        self.assertFalse(Ticket.objects.exists())
+        seat_map = get_seat_map(self.show_session.id)
+        self.assertTrue(seat_map.is_taken(1, 2))
+        self.assertFalse(seat_map.is_taken(1, 3))
+
+    def test_seats_held_by_others_are_unavailable(self):
+        """Test another user's hold blocks holding and booking"""
+        self.hold_for(self.other, [(1, 2)])
+
+        res = self.hold([(1, 1), (1, 2)])
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data["seats"], [{"row": 1, "seat": 2}])
+
+        res = self.client.post(
+            BOOK_URL,
+            {
+                "show_session": self.show_session.id,
+                "tickets": [{"row": 1, "seat": 2}],
+            },
+            format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(SeatHold.objects.count(), 1)
+
+    def test_sold_seats_are_unavailable(self):
+        sample_ticket(row=1, seat=1, show_session=self.show_session)
+        res = self.hold([(1, 1)])
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+    def test_expired_hold_is_replaced(self):
+        """Test an expired hold neither blocks nor collides"""
+        self.hold_for(self.other, [(1, 1)], expires_in=-timedelta(seconds=1))
+
+        res = self.hold([(1, 1)])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.get().user, self.user)
+
+    def test_hold_own_seats_again(self):
+        self.hold([(1, 1)])
+        res = self.hold([(1, 1), (1, 2)])
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.count(), 2)
+
+    def test_confirm_hold(self):
+        """Test confirming turns the hold into a reservation"""
+        hold = self.hold([(2, 3), (2, 4)]).data["hold"]
+
+        res = self.client.post(CONFIRM_URL, {"hold": hold})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        reservation = Reservation.objects.get(id=res.data["id"])
+        self.assertEqual(reservation.user, self.user)
+        self.assertEqual(
+            set(reservation.tickets.values_list("row", "seat")),
+            {(2, 3), (2, 4)}
+        )
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertTrue(get_seat_map(self.show_session.id).is_taken(2, 4))
+
+    def test_confirm_expired_hold(self):
+        hold = self.hold_for(
+            self.user,
+            [(1, 1)],
+            expires_in=-timedelta(seconds=1)
+        )[0]
+        res = self.client.post(CONFIRM_URL, {"hold": hold.token})
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_confirm_partly_expired_hold(self):
+        """Test no seat is booked when some seats of the hold expired"""
+        held, expired = self.hold_for(
+            self.user,
+            [(1, 1), (1, 2)]
+        )
+        expired.expires_at = timezone.now() - timedelta(seconds=1)
+        expired.save()
+
+        res = self.client.post(CONFIRM_URL, {"hold": held.token})
+
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+        self.assertEqual(res.data["seats"], [{"row": 1, "seat": 2}])
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_confirm_hold_of_another_user(self):
+        hold = self.hold_for(self.other, [(1, 1)])[0]
+        res = self.client.post(CONFIRM_URL, {"hold": hold.token})
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+
+    def test_hold_unauthenticated(self):
+        self.client.force_authenticate(user=None)
+        res = self.hold([(1, 1)])
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_sweep_expired_holds(self):
+        """Test the sweeper deletes expired holds in batches"""
+        self.hold_for(self.user, [(1, 1)])
+        self.hold_for(
+            self.other,
+            [(2, seat) for seat in range(1, 6)],
+            expires_in=-timedelta(seconds=1)
+        )
+        self.assertTrue(get_seat_map(self.show_session.id).is_taken(1, 1))
+
+        with CaptureQueriesContext(connection) as queries:
+            deleted = sweep_expired_holds(batch_size=2)
+
+        self.assertEqual(deleted, 5)
+        # Three batches of one select and one delete each.
+        self.assertEqual(len(queries), 6)
+        self.assertEqual(SeatHold.objects.get().row, 1)
+        seat_map = get_seat_map(self.show_session.id)
+        self.assertTrue(seat_map.is_taken(1, 1))
+        self.assertFalse(seat_map.is_taken(2, 1))
+
+
+class CancellationApiTests(BaseApiTests):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_user(
+            email="cancel@test.com",
+            password="TestPass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin)
+        dome = sample_planetarium_dome(rows=10, seats_in_row=10)
+        self.soon = sample_show_session(
+            planetarium_dome=dome,
+            show_time=timezone.now() + timedelta(hours=2),
+        )
+        self.later = sample_show_session(
+            planetarium_dome=dome,
+            show_time=timezone.now() + timedelta(days=2),
+        )
+
+    def reserve(self, show_session, seats, user=None):
+        reservation, _ = book_seats(
+            user or self.admin,
+            show_session,
+            seats
+        )
+        return reservation
+
+    def test_destroy_before_cutoff(self):
+        reservation = self.reserve(self.later, [(1, 1), (1, 2)])
+        res = self.client.delete(reservation_detail_url(reservation.id))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_destroy_after_cutoff(self):
+        reservation = self.reserve(self.soon, [(1, 1)])
+        res = self.client.delete(reservation_detail_url(reservation.id))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_destroy_cutoff_check_query_count(self):
+        """Test the cutoff check does not load each ticket's session"""
+        small = self.reserve(self.later, [(1, 1)])
+        large = self.reserve(self.later, [(2, seat) for seat in range(1, 9)])
+
+        with CaptureQueriesContext(connection) as small_queries:
+            self.client.delete(reservation_detail_url(small.id))
+        with CaptureQueriesContext(connection) as large_queries:
+            self.client.delete(reservation_detail_url(large.id))
+
+        self.assertEqual(len(small_queries), len(large_queries))
+
+    def test_bulk_cancel_reservations(self):
+        first = self.reserve(self.later, [(1, 1), (1, 2)])
+        second = self.reserve(self.later, [(2, 1)], user=sample_user())
+        kept = self.reserve(self.later, [(3, 1)])
+
+        res = self.client.post(
+            BULK_CANCEL_URL,
+            {"reservations": [first.id, second.id]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"reservations": 2, "tickets": 3})
+        self.assertEqual(
+            list(Reservation.objects.values_list("id", flat=True)),
+            [kept.id]
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_bulk_cancel_respects_cutoff(self):
+        late = self.reserve(self.soon, [(1, 1)])
+        early = self.reserve(self.later, [(1, 1)])
+
+        res = self.client.post(
+            BULK_CANCEL_URL,
+            {"reservations": [late.id, early.id]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["reservations"], [str(late.id)])
+        self.assertEqual(Reservation.objects.count(), 2)
+
+    def test_bulk_cancel_show_session(self):
+        """Test cancelling a session skips the cutoff and per-row signals"""
+        for row in range(1, 6):
+            self.reserve(self.soon, [(row, 1), (row, 2)])
+        kept = self.reserve(self.later, [(1, 1)])
+        generations = get_generations(Reservation, Ticket)
+        receiver = mock.Mock()
+        post_delete.connect(receiver, sender=Ticket)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Ticket)
+
+        res = self.client.post(
+            BULK_CANCEL_URL,
+            {"show_session": self.soon.id},
+            format="json",
+        )
+
+        self.assertEqual(res.data, {"reservations": 5, "tickets": 10})
+        self.assertEqual(list(Reservation.objects.all()), [kept])
+        receiver.assert_not_called()
+        # The raw deletes leave the counter to the ticket triggers.
+        self.soon.refresh_from_db()
+        self.later.refresh_from_db()
+        self.assertEqual(self.soon.tickets_sold, 0)
+        self.assertEqual(self.later.tickets_sold, 1)
+        self.assertNotEqual(get_generations(Reservation, Ticket), generations)
+
+    def test_bulk_cancel_show_session_keeps_other_sessions(self):
+        reservation = self.reserve(self.soon, [(1, 1)])
+        kept = sample_ticket(
+            row=2,
+            seat=1,
+            show_session=self.later,
+            reservation=reservation,
+        )
+        cancelled = self.reserve(self.soon, [(2, 2)])
+
+        res = self.client.post(
+            BULK_CANCEL_URL,
+            {"show_session": self.soon.id},
+            format="json",
+        )
+
+        self.assertEqual(res.data, {"reservations": 1, "tickets": 2})
+        self.assertEqual(list(Ticket.objects.all()), [kept])
+        self.later.refresh_from_db()
+        self.assertEqual(self.later.tickets_sold, 1)
+        self.assertFalse(Reservation.objects.filter(pk=cancelled.pk).exists())
+
+    def test_bulk_cancel_requires_one_target(self):
+        res = self.client.post(BULK_CANCEL_URL, {}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_cancel_admin_only(self):
+        self.client.force_authenticate(user=sample_user())
+        res = self.client.post(
+            BULK_CANCEL_URL,
+            {"show_session": self.soon.id},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ReservationReadApiTests(BaseApiTests):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="reader@test.com",
+            password="TestPass123",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def reserve(self, count, tickets_per_reservation, show_time=None):
+        for _ in range(count):
+            show_session = sample_show_session(
+                planetarium_dome=sample_planetarium_dome(
+                    rows=5,
+                    seats_in_row=5
+                ),
+                show_time=show_time or timezone.now() + timedelta(days=1),
+            )
+            book_seats(
+                self.user,
+                show_session,
+                [(1, seat) for seat in range(1, tickets_per_reservation + 1)]
+            )
+
+    def test_list_embeds_tickets(self):
+        self.reserve(1, 2)
+
+        res = self.client.get(RESERVATION_URL)
+
+        reservation = res.data["results"][0]
+        self.assertEqual(len(reservation["tickets"]), 2)
+        ticket = reservation["tickets"][0]
+        self.assertEqual(
+            set(ticket),
+            {
+                "id",
+                "row",
+                "seat",
+                "show_session",
+                "astronomy_show",
+                "planetarium_dome",
+                "show_time",
+            }
+        )
+
+    def test_retrieve_embeds_tickets(self):
+        self.reserve(1, 3)
+        reservation = Reservation.objects.get()
+
+        res = self.client.get(reservation_detail_url(reservation.id))
+
+        self.assertEqual(len(res.data["tickets"]), 3)
+
+    def test_list_query_count_is_constant(self):
+        """Test listing reservations costs the same for 1 or 20 tickets"""
+        self.reserve(1, 1)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(RESERVATION_URL)
+        Reservation.objects.all().delete()
+
+        self.reserve(5, 4)
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.get(RESERVATION_URL)
+
+        self.assertEqual(res.data["count"], 5)
+        self.assertEqual(len(few), len(many))
+
+    def test_upcoming_shows(self):
+        """Test upcoming lists only the user's future sessions and seats"""
+        self.reserve(2, 2)
+        self.reserve(1, 1, show_time=timezone.now() - timedelta(days=1))
+        sample_ticket()
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(UPCOMING_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 2)
+        self.assertEqual(len(res.data["results"][0]["tickets"]), 2)
+        self.assertEqual(len(queries), 3)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    buyers = 8
+
+    def test_parallel_bookings_never_double_book(self):
+        """Test parallel buyers of overlapping seats get 201 or 409 only"""
+        show_session = sample_show_session(
+            planetarium_dome=sample_planetarium_dome(rows=5, seats_in_row=5)
+        )
+        users = [
+            get_user_model().objects.create_user(
+                email=f"buyer{index}@test.com",
+                password="TestPass123",
+            )
+            for index in range(self.buyers)
+        ]
+        barrier = threading.Barrier(self.buyers)
+        statuses = []
+
+        def buy(user, seats):
+            client = APIClient(raise_request_exception=False)
+            client.force_authenticate(user=user)
+            barrier.wait()
+            try:
+                res = client.post(
+                    BOOK_URL,
+                    {
+                        "show_session": show_session.id,
+                        "tickets": [
+                            {"row": row, "seat": seat}
+                            for row, seat in seats
+                        ],
+                    },
+                    format="json",
+                )
+                statuses.append(res.status_code)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(
+                target=buy,
+                args=(user, [(1, index % 3 + 1), (1, index % 3 + 2)])
+            )
+            for index, user in enumerate(users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(statuses), self.buyers)
+        self.assertTrue(
+            set(statuses) <= {
+                status.HTTP_201_CREATED,
+                status.HTTP_409_CONFLICT
+            },
+            statuses
+        )
+        self.assertIn(status.HTTP_201_CREATED, statuses)
+        sold = list(
+            Ticket.objects.filter(
+                show_session=show_session
+            ).values_list("row", "seat")
+        )
+        self.assertEqual(len(sold), len(set(sold)))
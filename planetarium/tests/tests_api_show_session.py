@@ -0,0 +1,536 @@
+import json
+from base64 import b64encode
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from planetarium.booking import book_seats
+from planetarium.cancellation import cancel_reservations
+from planetarium.models import Reservation, ShowSession, Ticket
+from planetarium.seat_map import SeatMap, get_seat_map, update_seat_map
+from planetarium.tests.tests_api_ticket import (
+    BaseApiTests,
+    page_query_plan,
+    sample_astronomy_show,
+    sample_planetarium_dome,
+    sample_reservation,
+    sample_show_session,
+    sample_ticket,
+)
+
+
+SHOW_SESSION_URL = reverse("planetarium:showsession-list")
+
+
+def show_session_detail_url(show_session_id):
+    return reverse("planetarium:showsession-detail", args=[show_session_id])
+
+
+def best_seats_url(show_session_id):
+    return reverse(
+        "planetarium:showsession-best-seats",
+        args=[show_session_id]
+    )
+
+
+def seat_map_url(show_session_id):
+    return reverse(
+        "planetarium:showsession-seat-map",
+        args=[show_session_id]
+    )
+
+
+class SeatMapTests(TestCase):
+    def test_bitmap_layout(self):
+        """Test seats are packed row by row, most significant bit first"""
+        seat_map = SeatMap(rows=2, seats_in_row=5)
+        seat_map.set(1, 1, True)
+        seat_map.set(2, 4, True)
+
+        self.assertEqual(
+            seat_map.to_bytes(),
+            bytes([0b10000000, 0b10000000])
+        )
+        self.assertTrue(seat_map.is_taken(2, 4))
+        self.assertFalse(seat_map.is_taken(2, 5))
+        self.assertEqual(seat_map.taken_count(), 2)
+
+    def test_runs_start_with_free_seats(self):
+        seat_map = SeatMap(rows=1, seats_in_row=6)
+        seat_map.set(1, 1, True)
+        seat_map.set(1, 2, True)
+        seat_map.set(1, 5, True)
+
+        self.assertEqual(seat_map.to_runs(), [0, 2, 2, 1, 1])
+
+    def test_out_of_range_seats_are_ignored(self):
+        seat_map = SeatMap(rows=2, seats_in_row=2)
+        seat_map.set(3, 1, True)
+        self.assertEqual(seat_map.taken_count(), 0)
+
+
+class BestSeatsTests(TestCase):
+    def test_block_in_the_middle_of_an_empty_dome(self):
+        seat_map = SeatMap(rows=5, seats_in_row=10)
+        self.assertEqual(
+            seat_map.best_seats(4),
+            [(3, 4), (3, 5), (3, 6), (3, 7)]
+        )
+
+    def test_block_moves_around_taken_seats(self):
+        """Test the nearest free block wins, in the same row if possible"""
+        seat_map = SeatMap(rows=3, seats_in_row=10)
+        for seat in range(4, 9):
+            seat_map.set(2, seat, True)
+
+        self.assertEqual(seat_map.best_seats(3), [(2, 1), (2, 2), (2, 3)])
+
+        seat_map.set(2, 2, True)
+        self.assertEqual(seat_map.best_seats(3), [(1, 5), (1, 6), (1, 7)])
+
+    def test_split_blocks_when_no_row_has_room(self):
+        """Test the group is split over the longest free runs"""
+        seat_map = SeatMap(rows=2, seats_in_row=5)
+        for row, seat in [(1, 3), (2, 2), (2, 5)]:
+            seat_map.set(row, seat, True)
+
+        self.assertEqual(
+            seat_map.best_seats(5),
+            [(1, 1), (1, 2), (1, 4), (2, 3), (2, 4)]
+        )
+
+    def test_not_enough_free_seats(self):
+        seat_map = SeatMap(rows=1, seats_in_row=3)
+        seat_map.set(1, 2, True)
+        self.assertIsNone(seat_map.best_seats(3))
+
+
+class SeatMapApiTests(BaseApiTests):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="seats@test.com",
+            password="TestPass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.show_session = sample_show_session(
+            planetarium_dome=sample_planetarium_dome(rows=3, seats_in_row=4)
+        )
+
+    def test_seat_map_runs(self):
+        sample_ticket(row=1, seat=2, show_session=self.show_session)
+        sample_ticket(row=3, seat=4, show_session=self.show_session)
+
+        res = self.client.get(seat_map_url(self.show_session.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["rows"], 3)
+        self.assertEqual(res.data["seats_in_row"], 4)
+        self.assertEqual(res.data["taken"], 2)
+        self.assertEqual(res.data["runs"], [1, 1, 9, 1])
+
+    def test_seat_map_binary(self):
+        sample_ticket(row=1, seat=1, show_session=self.show_session)
+
+        res = self.client.get(
+            seat_map_url(self.show_session.id),
+            {"encoding": "binary"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/octet-stream")
+        self.assertEqual(res["X-Seat-Map-Rows"], "3")
+        self.assertEqual(res.content, bytes([0b10000000, 0]))
+
+    def test_seat_map_is_cached(self):
+        """Test a cached seat map is served without database queries"""
+        self.client.get(seat_map_url(self.show_session.id))
+
+        with self.assertNumQueries(0):
+            res = self.client.get(seat_map_url(self.show_session.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_seat_map_patched_after_changes(self):
+        """Test ticket changes patch the cached seat map in place"""
+        get_seat_map(self.show_session.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket = sample_ticket(
+                row=2,
+                seat=2,
+                show_session=self.show_session
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            book_seats(self.user, self.show_session, [(1, 1), (1, 2)])
+
+        with self.assertNumQueries(0):
+            seat_map = get_seat_map(self.show_session.id)
+        self.assertEqual(seat_map.taken_count(), 3)
+        self.assertTrue(seat_map.is_taken(2, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+
+        with self.assertNumQueries(0):
+            seat_map = get_seat_map(self.show_session.id)
+        self.assertFalse(seat_map.is_taken(2, 2))
+        self.assertEqual(seat_map.taken_count(), 2)
+
+    def test_seat_map_expired_when_it_cannot_be_patched(self):
+        """Test a busy lock or a moved version expires the map instead"""
+        get_seat_map(self.show_session.id)
+        cache.add(f"seat_map_lock:{self.show_session.id}", True)
+
+        sample_ticket(row=2, seat=2, show_session=self.show_session)
+        update_seat_map(self.show_session.id, [(2, 2)], True)
+        cache.delete(f"seat_map_lock:{self.show_session.id}")
+
+        with CaptureQueriesContext(connection) as queries:
+            seat_map = get_seat_map(self.show_session.id)
+        self.assertTrue(queries)
+        self.assertTrue(seat_map.is_taken(2, 2))
+
+        incr = cache.incr
+
+        def incr_twice(key, delta=1):
+            # Another worker expires the map between the read and the
+            # increment of the patch.
+            incr(key, delta)
+            return incr(key, delta)
+
+        sample_ticket(row=3, seat=3, show_session=self.show_session)
+        with mock.patch.object(cache, "incr", side_effect=incr_twice):
+            update_seat_map(self.show_session.id, [(3, 3)], True)
+
+        with CaptureQueriesContext(connection) as queries:
+            seat_map = get_seat_map(self.show_session.id)
+        self.assertTrue(queries)
+        self.assertTrue(seat_map.is_taken(3, 3))
+
+    def test_seat_map_built_before_a_change_is_not_served(self):
+        """Test a rebuild racing a committed change does not stick"""
+        build = SeatMap.build
+
+        def build_then_commit_a_change(show_session):
+            seat_map = build(show_session)
+            # The change commits after the rebuild read the database.
+            sample_ticket(row=3, seat=3, show_session=self.show_session)
+            update_seat_map(self.show_session.id, [(3, 3)], True)
+            return seat_map
+
+        with mock.patch.object(
+            SeatMap,
+            "build",
+            side_effect=build_then_commit_a_change
+        ):
+            stale = get_seat_map(self.show_session.id)
+
+        self.assertFalse(stale.is_taken(3, 3))
+        self.assertTrue(get_seat_map(self.show_session.id).is_taken(3, 3))
+
+    def test_best_seats(self):
+        sample_ticket(row=2, seat=2, show_session=self.show_session)
+
+        res = self.client.get(
+            best_seats_url(self.show_session.id),
+            {"count": 3}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data["contiguous"])
+        self.assertEqual(
+            res.data["tickets"],
+            [{"row": 1, "seat": seat} for seat in (1, 2, 3)]
+        )
+
+    def test_best_seats_split(self):
+        for seat in (2, 3):
+            sample_ticket(row=2, seat=seat, show_session=self.show_session)
+        for row in (1, 3):
+            sample_ticket(row=row, seat=3, show_session=self.show_session)
+
+        res = self.client.get(
+            best_seats_url(self.show_session.id),
+            {"count": 3}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.data["contiguous"])
+        self.assertEqual(len(res.data["tickets"]), 3)
+
+    def test_best_seats_not_enough_free(self):
+        res = self.client.get(
+            best_seats_url(self.show_session.id),
+            {"count": 13}
+        )
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+    def test_best_seats_invalid_count(self):
+        for count in ("0", "many"):
+            res = self.client.get(
+                best_seats_url(self.show_session.id),
+                {"count": count}
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_seat_map_not_found(self):
+        res = self.client.get(seat_map_url(0))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ShowSessionKeysetPaginationTests(BaseApiTests):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="pages@test.com",
+            password="TestPass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        show = sample_astronomy_show()
+        dome = sample_planetarium_dome()
+        start = timezone.now()
+        ShowSession.objects.bulk_create(
+            ShowSession(
+                astronomy_show=show,
+                planetarium_dome=dome,
+                show_time=start + timedelta(hours=index // 3),
+            )
+            for index in range(25)
+        )
+
+    def test_walk_pages_in_key_order(self):
+        """Test cursor pages cover every session once, in key order"""
+        expected = list(
+            ShowSession.objects.order_by(
+                "show_time",
+                "id"
+            ).values_list("id", flat=True)
+        )
+        seen = []
+        url = SHOW_SESSION_URL + "?pagination=cursor"
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", res.data)
+            self.assertFalse(
+                any("COUNT(" in query["sql"] for query in queries)
+            )
+            seen += [session["id"] for session in res.data["results"]]
+            url = res.data["next"]
+
+        self.assertEqual(seen, expected)
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get(SHOW_SESSION_URL, {"pagination": "cursor"})
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+
+        self.assertIsNone(first.data["previous"])
+        self.assertEqual(back.data["results"], first.data["results"])
+
+    @skipUnless(connection.vendor == "sqlite", "reads SQLite query plans")
+    def test_cursor_page_is_an_index_range(self):
+        """Test a cursor page starts at the cursor on the show_time index"""
+        first = self.client.get(SHOW_SESSION_URL, {"pagination": "cursor"})
+        second = self.client.get(first.data["next"])
+
+        for url, bound in ((first.data["next"], ">="),
+                           (second.data["previous"], "<=")):
+            sql, plan = page_query_plan(
+                self.client,
+                url,
+                "planetarium_showsession"
+            )
+            self.assertIn(
+                f'WHERE ("planetarium_showsession"."show_time" {bound} ',
+                sql
+            )
+            self.assertRegex(
+                plan[0],
+                r"^SEARCH planetarium_showsession USING INDEX "
+                r"showsession_show_time_idx \(show_time[<>]\?\)$"
+            )
+            self.assertFalse(any("TEMP B-TREE" in step for step in plan))
+
+    def test_page_number_pagination_is_default(self):
+        res = self.client.get(SHOW_SESSION_URL)
+        self.assertEqual(res.data["count"], 25)
+
+    def test_invalid_cursor(self):
+        res = self.client.get(SHOW_SESSION_URL, {"cursor": "garbage"})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_bad_value_types(self):
+        for key in (["notadate", 1], [None, 1], ["2030-01-01", "x"],
+                    ["2030-01-01", [1]]):
+            cursor = b64encode(json.dumps({"k": key, "r": 0}).encode())
+            res = self.client.get(SHOW_SESSION_URL, {"cursor": cursor})
+            self.assertEqual(
+                res.status_code,
+                status.HTTP_404_NOT_FOUND,
+                key
+            )
+
+
+class ShowSessionFilterTests(BaseApiTests):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="filters@test.com",
+            password="TestPass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.now = timezone.now()
+        self.dome = sample_planetarium_dome(rows=1, seats_in_row=1)
+        self.show = sample_astronomy_show()
+        self.today = sample_show_session(
+            astronomy_show=self.show,
+            planetarium_dome=self.dome,
+            show_time=self.now,
+        )
+        self.next_week = sample_show_session(
+            show_time=self.now + timedelta(days=7)
+        )
+
+    def filtered_ids(self, **params):
+        res = self.client.get(SHOW_SESSION_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return {session["id"] for session in res.data["results"]}
+
+    def test_filter_by_date_range(self):
+        ids = self.filtered_ids(
+            date_from=(self.now + timedelta(days=1)).isoformat(),
+            date_to=(self.now + timedelta(days=8)).isoformat(),
+        )
+        self.assertEqual(ids, {self.next_week.id})
+
+    def test_filter_by_date(self):
+        day = timezone.localdate(self.next_week.show_time)
+        self.assertEqual(
+            self.filtered_ids(date=day.isoformat()),
+            {self.next_week.id}
+        )
+
+    def test_filter_by_show_dome_and_theme(self):
+        theme = self.show.show_theme.first()
+        self.assertEqual(
+            self.filtered_ids(astronomy_show=self.show.id),
+            {self.today.id}
+        )
+        self.assertEqual(
+            self.filtered_ids(planetarium_dome=self.dome.id),
+            {self.today.id}
+        )
+        self.assertEqual(self.filtered_ids(theme=theme.id), {self.today.id})
+
+    def test_filter_has_free_seats(self):
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.today,
+            reservation=sample_reservation(),
+        )
+        self.assertEqual(
+            self.filtered_ids(has_free_seats="true"),
+            {self.next_week.id}
+        )
+        self.assertEqual(
+            self.filtered_ids(has_free_seats="false"),
+            {self.today.id}
+        )
+
+
+class TicketsSoldTests(BaseApiTests):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="counter@test.com",
+            password="TestPass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.show_session = sample_show_session(
+            planetarium_dome=sample_planetarium_dome(rows=3, seats_in_row=4)
+        )
+
+    def tickets_sold(self, show_session=None):
+        show_session = show_session or self.show_session
+        return ShowSession.objects.get(pk=show_session.pk).tickets_sold
+
+    def test_counter_follows_bulk_booking_and_cancellation(self):
+        """Test bulk inserts and raw deletes keep the counter right"""
+        reservation, _ = book_seats(
+            self.user,
+            self.show_session,
+            [(1, 1), (1, 2), (2, 1)]
+        )
+        self.assertEqual(self.tickets_sold(), 3)
+
+        cancel_reservations(Reservation.objects.filter(pk=reservation.pk))
+        self.assertEqual(self.tickets_sold(), 0)
+
+    def test_counter_follows_ticket_changes(self):
+        other = sample_show_session()
+        ticket = sample_ticket(show_session=self.show_session)
+        self.assertEqual(self.tickets_sold(), 1)
+
+        ticket.show_session = other
+        ticket.save()
+        self.assertEqual(self.tickets_sold(), 0)
+        self.assertEqual(self.tickets_sold(other), 1)
+
+        ticket.reservation.delete()
+        self.assertEqual(self.tickets_sold(other), 0)
+
+    def test_saving_session_keeps_counter(self):
+        """Test a stale copy of the session does not reset the counter"""
+        stale = ShowSession.objects.get(pk=self.show_session.pk)
+        sample_ticket(show_session=self.show_session)
+
+        stale.show_time = timezone.now()
+        stale.save()
+
+        self.assertEqual(self.tickets_sold(), 1)
+
+    def test_counters_in_list_and_detail(self):
+        book_seats(self.user, self.show_session, [(1, 1), (3, 4)])
+
+        res = self.client.get(SHOW_SESSION_URL)
+        listed = next(
+            item for item in res.data["results"]
+            if item["id"] == self.show_session.id
+        )
+        self.assertEqual(listed["tickets_sold"], 2)
+        self.assertEqual(listed["tickets_available"], 10)
+
+        res = self.client.get(show_session_detail_url(self.show_session.id))
+        self.assertEqual(res.data["tickets_sold"], 2)
+        self.assertEqual(res.data["tickets_available"], 10)
+
+    def test_reconcile_tickets_sold(self):
+        """Test the command reports drift and recounts drifted sessions"""
+        sample_ticket(show_session=self.show_session)
+        ShowSession.objects.filter(pk=self.show_session.pk).update(
+            tickets_sold=5
+        )
+        out = StringIO()
+
+        call_command("reconcile_tickets_sold", "--dry-run", stdout=out)
+        self.assertIn(
+            f"Show session {self.show_session.id}: tickets_sold 5, counted 1",
+            out.getvalue()
+        )
+        self.assertEqual(self.tickets_sold(), 5)
+
+        call_command("reconcile_tickets_sold", stdout=out)
+        self.assertEqual(self.tickets_sold(), 1)
+
+        out = StringIO()
+        call_command("reconcile_tickets_sold", stdout=out)
+        self.assertIn("No drift found.", out.getvalue())
@@ -1,8 +1,14 @@
+import json
 import uuid
-from datetime import datetime
+from base64 import b64encode
+from datetime import datetime, timedelta
+from unittest import skipUnless
 
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
@@ -11,6 +17,7 @@ from planetarium.models import (
     AstronomyShow,
     PlanetariumDome,
     Reservation,
+    SeatHold,
     ShowSession,
     ShowTheme,
     Ticket,
@@ -89,6 +96,20 @@ def sample_ticket(**params):
     return Ticket.objects.create(**defaults)
 
 
+def page_query_plan(client, url, table):
+    """The paginated query a GET of url runs and its SQLite query plan"""
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url)
+    sql = next(
+        query["sql"] for query in queries
+        if f'FROM "{table}"' in query["sql"] and "LIMIT" in query["sql"]
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql)
+        return sql, [row[-1] for row in cursor.fetchall()]
+
+
 class BaseApiTests(APITestCase):
     """This class for cleaning cache after each test"""
 
@@ -149,6 +170,111 @@ class AuthenticatedBusApiTests(BaseApiTests):
         self.assertIn(serializer1.data, res.data["results"])
         self.assertNotIn(serializer2.data, res.data["results"])
 
+    def test_search_tickets(self):
+        """Test ?search= matches title, email, or exact row and seat"""
+        show_session = sample_show_session(
+            astronomy_show=sample_astronomy_show(title="Nebula Nights"),
+            planetarium_dome=sample_planetarium_dome(
+                rows=20,
+                seats_in_row=20
+            ),
+        )
+        reservation = sample_reservation(
+            user=sample_user(email="stargazer@example.com")
+        )
+        nebula = sample_ticket(
+            row=12,
+            seat=3,
+            show_session=show_session,
+            reservation=reservation,
+        )
+        other = sample_ticket(
+            row=2,
+            seat=1,
+            show_session=sample_show_session(
+                astronomy_show=sample_astronomy_show(title="Moon Walk")
+            ),
+            reservation=sample_reservation(
+                user=sample_user(email="comet@example.com")
+            ),
+        )
+
+        def search(term):
+            res = self.client.get(TICKET_URL, {"search": term})
+            return {ticket["id"] for ticket in res.data["results"]}
+
+        self.assertEqual(search("nebula"), {nebula.id})
+        self.assertEqual(search("STARGAZER"), {nebula.id})
+        self.assertEqual(search("12"), {nebula.id})
+        self.assertEqual(search("2"), {other.id})
+        self.assertEqual(search("nebula 3"), {nebula.id})
+        self.assertEqual(search("nebula 1"), set())
+
+    def test_ticket_list_cursor_pagination(self):
+        """Test ticket cursor pages follow (show_session, row, seat)"""
+        show_session = sample_show_session(
+            planetarium_dome=sample_planetarium_dome(rows=5, seats_in_row=5)
+        )
+        reservation = sample_reservation()
+        for row in range(1, 5):
+            for seat in range(1, 4):
+                sample_ticket(
+                    row=row,
+                    seat=seat,
+                    show_session=show_session,
+                    reservation=reservation,
+                )
+        seen = []
+        url = TICKET_URL + "?pagination=cursor"
+        while url:
+            res = self.client.get(url)
+            self.assertNotIn("count", res.data)
+            seen += [(ticket["row"], ticket["seat"])
+                     for ticket in res.data["results"]]
+            url = res.data["next"]
+
+        self.assertEqual(
+            seen,
+            [(row, seat) for row in range(1, 5) for seat in range(1, 4)]
+        )
+
+    @skipUnless(connection.vendor == "sqlite", "reads SQLite query plans")
+    def test_ticket_list_cursor_page_is_an_index_range(self):
+        """Test a cursor page starts on the unique seat index"""
+        show_session = sample_show_session(
+            planetarium_dome=sample_planetarium_dome(rows=3, seats_in_row=3)
+        )
+        reservation = sample_reservation()
+        for seat in range(1, 4):
+            sample_ticket(
+                seat=seat,
+                show_session=show_session,
+                reservation=reservation,
+            )
+        first = self.client.get(
+            TICKET_URL,
+            {"pagination": "cursor", "page_size": 1}
+        )
+
+        sql, plan = page_query_plan(
+            self.client,
+            first.data["next"],
+            "planetarium_ticket"
+        )
+
+        self.assertIn('WHERE ("planetarium_ticket"."show_session_id" >= ', sql)
+        self.assertRegex(
+            plan[0],
+            r"^SEARCH planetarium_ticket USING INDEX \S+ "
+            r"\(show_session_id>\?\)$"
+        )
+        self.assertFalse(any("TEMP B-TREE" in step for step in plan))
+
+    def test_ticket_list_cursor_with_bad_value_types(self):
+        cursor = b64encode(json.dumps({"k": ["x", "y", "z"], "r": 0}).encode())
+        res = self.client.get(TICKET_URL, {"cursor": cursor})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_retrieve_ticket_with_cache(self):
         ticket1 = sample_ticket()
         cache.set("ticket_view1", ticket1)
@@ -197,6 +323,41 @@ class AdminUserTicketTests(BaseApiTests):
         res = self.client.post(TICKET_URL, payload)
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
 
+    def test_create_ticket_respects_seat_holds(self):
+        """Test staff cannot sell a seat someone else holds"""
+        show_session = sample_show_session()
+        reservation = sample_reservation()
+        for user, seat in ((sample_user(), 1), (reservation.user, 2)):
+            SeatHold.objects.create(
+                token=uuid.uuid4(),
+                row=1,
+                seat=seat,
+                show_session=show_session,
+                user=user,
+                expires_at=timezone.now() + timedelta(minutes=10),
+            )
+
+        def create(seat):
+            return self.client.post(TICKET_URL, {
+                "row": 1,
+                "seat": seat,
+                "show_session": show_session.id,
+                "reservation": reservation.id,
+            })
+
+        res = create(1)
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data["seats"], [{"row": 1, "seat": 1}])
+        self.assertFalse(Ticket.objects.exists())
+
+        # The reservation's user's own hold is used up instead.
+        res = create(2)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(SeatHold.objects.values_list("seat", flat=True)),
+            [1]
+        )
+
     def test_create_ticket_with_invalid_data(self):
         """Test that creating a ticket is successful for admin users"""
         show_session = sample_show_session()
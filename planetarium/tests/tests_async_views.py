@@ -0,0 +1,184 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium.booking import book_seats
+from planetarium.tests.tests_api_ticket import (
+    BaseApiTests,
+    sample_astronomy_show,
+    sample_planetarium_dome,
+    sample_show_session,
+    sample_user,
+)
+
+
+def url(name, *args):
+    return reverse(f"planetarium:{name}", args=args)
+
+
+class AsyncReadApiTests(BaseApiTests):
+    def setUp(self):
+        self.user = sample_user()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        self.dome = sample_planetarium_dome(rows=3, seats_in_row=4)
+        self.show = sample_astronomy_show(title="Moon Walk")
+        self.show_sessions = [
+            sample_show_session(
+                astronomy_show=self.show,
+                planetarium_dome=self.dome,
+                show_time=timezone.now() + timedelta(days=day),
+            )
+            for day in range(1, 13)
+        ]
+
+    def assertSameResponse(self, sync_url, async_url):
+        sync_res = self.client.get(sync_url)
+        async_res = self.client.get(async_url)
+        self.assertEqual(async_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(sync_res.status_code, status.HTTP_200_OK)
+        async_data = async_res.json()
+        if "results" in async_data:
+            # The page links point at each endpoint's own URL.
+            self.assertEqual(
+                async_data["results"],
+                sync_res.json()["results"]
+            )
+            self.assertEqual(async_data["count"], sync_res.json()["count"])
+        else:
+            self.assertEqual(async_data, sync_res.json())
+
+    def test_responses_match_sync_endpoints(self):
+        show_session = self.show_sessions[0]
+        for name, args in [
+            ("astronomyshow-list", []),
+            ("astronomyshow-detail", [self.show.pk]),
+            ("planetariumdome-list", []),
+            ("planetariumdome-detail", [self.dome.pk]),
+            ("showsession-list", []),
+            ("showsession-detail", [show_session.pk]),
+            ("showsession-seat-map", [show_session.pk]),
+        ]:
+            with self.subTest(name):
+                self.assertSameResponse(
+                    url(name, *args),
+                    url(f"async-{name}", *args)
+                )
+
+    def test_list_is_paginated(self):
+        res = self.client.get(url("async-showsession-list"))
+
+        self.assertEqual(res.json()["count"], 12)
+        self.assertEqual(len(res.json()["results"]), 10)
+        self.assertIsNone(res.json()["previous"])
+        self.assertTrue(res.json()["next"].endswith("?page=2"))
+
+        res = self.client.get(url("async-showsession-list"), {"page": 2})
+
+        self.assertEqual(len(res.json()["results"]), 2)
+        self.assertIsNone(res.json()["next"])
+        self.assertNotIn("page", res.json()["previous"])
+
+        res = self.client.get(url("async-showsession-list"), {"page": 3})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_show_session_filters(self):
+        day = self.show_sessions[2].show_time.date()
+        res = self.client.get(
+            url("async-showsession-list"),
+            {"date": day.isoformat()}
+        )
+
+        self.assertEqual(
+            [item["id"] for item in res.json()["results"]],
+            [self.show_sessions[2].pk]
+        )
+
+        res = self.client.get(
+            url("async-showsession-list"),
+            {"date": "tomorrow"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("date", res.json())
+
+    def test_astronomy_show_search(self):
+        sample_astronomy_show(title="Black Holes")
+
+        res = self.client.get(
+            url("async-astronomyshow-list"),
+            {"search": "moon"}
+        )
+
+        self.assertEqual(
+            [item["title"] for item in res.json()["results"]],
+            ["Moon Walk"]
+        )
+
+    def test_seat_map_shows_booked_seats(self):
+        show_session = self.show_sessions[0]
+        book_seats(self.user, show_session, [(1, 1), (1, 2)])
+
+        res = self.client.get(
+            url("async-showsession-seat-map", show_session.pk)
+        )
+
+        self.assertEqual(res.json()["taken"], 2)
+        self.assertEqual(res.json()["runs"], [0, 2, 10])
+
+        res = self.client.get(
+            url("async-showsession-seat-map", show_session.pk),
+            {"encoding": "binary"}
+        )
+
+        self.assertEqual(res["Content-Type"], "application/octet-stream")
+        self.assertEqual(res.content, bytes([0b11000000, 0]))
+
+    def test_missing_object_returns_404(self):
+        for name in [
+            "async-astronomyshow-detail",
+            "async-showsession-detail",
+            "async-showsession-seat-map",
+        ]:
+            with self.subTest(name):
+                res = self.client.get(url(name, 0))
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_conditional_get_returns_304(self):
+        res = self.client.get(url("async-showsession-list"))
+        etag = res["ETag"]
+
+        res = self.client.get(
+            url("async-showsession-list"),
+            HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        book_seats(self.user, self.show_sessions[0], [(2, 2)])
+        res = self.client.get(
+            url("async-showsession-list"),
+            HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["results"][0]["tickets_sold"], 1)
+
+    def test_auth_required(self):
+        self.client.credentials()
+
+        res = self.client.get(url("async-astronomyshow-list"))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("Bearer", res["WWW-Authenticate"])
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer not-a-token")
+        res = self.client.get(url("async-astronomyshow-list"))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res.json()["code"], "token_not_valid")
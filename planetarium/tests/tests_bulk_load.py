@@ -0,0 +1,199 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from planetarium.cache import get_generations
+from planetarium.models import (
+    AstronomyShow,
+    Reservation,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+from planetarium.seat_map import get_seat_map
+from planetarium.tests.tests_api_ticket import BaseApiTests, sample_user
+
+
+SESSION_TIME = "2030-01-01T19:00:00+02:00"
+
+
+class BulkLoadTests(BaseApiTests):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.alice = sample_user(email="alice@test.com")
+        self.bob = sample_user(email="bob@test.com")
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8") as file:
+            file.write(text)
+        return path
+
+    def write_ndjson(self, name, rows):
+        return self.write(
+            name, "".join(json.dumps(row) + "\n" for row in rows)
+        )
+
+    def bulk_load(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command("bulk_load", *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def load_schedule(self):
+        return self.bulk_load(
+            "--themes", self.write("themes.csv", "name\nStars\nPlanets\n"),
+            "--shows", self.write(
+                "shows.csv",
+                "title,description,themes\n"
+                "Night Sky,Stars above,Stars|Planets\n"
+                "Moon,Our moon,\n"
+            ),
+            "--domes", self.write(
+                "domes.csv",
+                "name,rows,seats_in_row\nBig,10,20\n"
+            ),
+            "--sessions", self.write_ndjson(
+                "sessions.ndjson.gz",
+                [
+                    {
+                        "astronomy_show": "Night Sky",
+                        "planetarium_dome": "Big",
+                        "show_time": SESSION_TIME,
+                    },
+                ]
+            ),
+        )
+
+    def ticket(self, row, seat, user="alice@test.com", **extra):
+        return {
+            "astronomy_show": "Night Sky",
+            "planetarium_dome": "Big",
+            "show_time": SESSION_TIME,
+            "row": row,
+            "seat": seat,
+            "user": user,
+            **extra,
+        }
+
+    def test_loads_catalog_and_schedule(self):
+        out, err = self.load_schedule()
+
+        self.assertEqual(err, "")
+        self.assertIn("sessions: 1 loaded, 0 skipped", out)
+        self.assertIn("rows/s", out)
+        show = AstronomyShow.objects.get(title="Night Sky")
+        self.assertEqual(
+            sorted(show.show_theme.values_list("name", flat=True)),
+            ["Planets", "Stars"]
+        )
+        self.assertEqual(ShowTheme.objects.count(), 2)
+        show_session = ShowSession.objects.get()
+        self.assertEqual(show_session.astronomy_show, show)
+        self.assertEqual(show_session.show_time.isoformat(), (
+            "2030-01-01T17:00:00+00:00"
+        ))
+
+    def test_loads_tickets_into_reservations(self):
+        self.load_schedule()
+        path = self.write_ndjson("tickets.ndjson", [
+            self.ticket(1, 1),
+            self.ticket(1, 2),
+            self.ticket(2, 1, user="bob@test.com"),
+            self.ticket(2, 2, user="bob@test.com", reservation="b2"),
+            self.ticket(2, 3, user="bob@test.com", reservation="b2"),
+        ])
+
+        self.bulk_load("--tickets", path, "--batch-size", "2")
+
+        self.assertEqual(Ticket.objects.count(), 5)
+        self.assertEqual(
+            sorted(
+                Reservation.objects.values_list("user__email", flat=True)
+            ),
+            ["alice@test.com", "bob@test.com", "bob@test.com"]
+        )
+        self.assertEqual(ShowSession.objects.get().tickets_sold, 5)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        self.load_schedule()
+        path = self.write_ndjson("tickets.ndjson", [
+            self.ticket(1, 1),
+            self.ticket(11, 1),
+            self.ticket(1, 1),
+            self.ticket(1, 2, user="nobody@test.com"),
+            self.ticket(1, 3, astronomy_show="Moon"),
+        ])
+
+        out, err = self.bulk_load("--tickets", path)
+
+        self.assertIn("tickets: 1 loaded, 4 skipped", out)
+        lines = err.splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].endswith(
+            "tickets.ndjson:2: Row 11, seat 1 is not in the dome."
+        ))
+        self.assertIn("tickets.ndjson:3: Seat already sold", lines[1])
+        self.assertIn("Unknown user 'nobody@test.com'", lines[2])
+        self.assertIn("No show session at", lines[3])
+
+    def test_seats_sold_before_are_reported_and_skipped(self):
+        self.load_schedule()
+        self.bulk_load(
+            "--tickets",
+            self.write_ndjson("sold.ndjson", [self.ticket(1, 1)])
+        )
+        path = self.write_ndjson("tickets.ndjson", [
+            self.ticket(1, 2),
+            self.ticket(1, 3),
+            self.ticket(1, 1),
+            self.ticket(1, 2),
+        ])
+
+        with CaptureQueriesContext(connection) as queries:
+            out, err = self.bulk_load(
+                "--tickets", path, "--batch-size", "2"
+            )
+
+        self.assertIn("tickets: 2 loaded, 2 skipped", out)
+        self.assertEqual(err.splitlines(), [
+            f"{path}:3: Seat already sold.",
+            f"{path}:4: Seat already sold.",
+        ])
+        # One lookup of sold seats per batch.
+        self.assertEqual(
+            sum(
+                query["sql"].startswith('SELECT "planetarium_ticket"')
+                for query in queries
+            ),
+            2
+        )
+        self.assertEqual(Ticket.objects.count(), 3)
+        self.assertEqual(ShowSession.objects.get().tickets_sold, 3)
+
+    def test_invalidates_caches(self):
+        self.load_schedule()
+        show_session = ShowSession.objects.get()
+        self.assertEqual(get_seat_map(show_session.pk).taken_count(), 0)
+        generations = get_generations(Ticket, ShowSession)
+
+        self.bulk_load(
+            "--tickets",
+            self.write_ndjson("tickets.ndjson", [self.ticket(1, 1)])
+        )
+
+        self.assertEqual(get_seat_map(show_session.pk).taken_count(), 1)
+        self.assertNotEqual(get_generations(Ticket, ShowSession), generations)
+
+    def test_requires_a_file(self):
+        with self.assertRaises(CommandError):
+            self.bulk_load()
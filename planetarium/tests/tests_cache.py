@@ -0,0 +1,195 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from planetarium.cache import bump_generation, get_generations
+from planetarium.models import AstronomyShow, ShowTheme
+from planetarium.tests.tests_api_ticket import (
+    BaseApiTests,
+    sample_astronomy_show,
+    sample_reservation,
+    sample_show_theme,
+    sample_ticket,
+)
+
+
+SHOW_THEME_URL = reverse("planetarium:showtheme-list")
+ASTRONOMY_SHOW_URL = reverse("planetarium:astronomyshow-list")
+TICKET_URL = reverse("planetarium:ticket-list")
+
+
+class GenerationTests(BaseApiTests):
+    def test_bump_changes_only_given_model(self):
+        theme, show = get_generations(ShowTheme, AstronomyShow)
+        bump_generation(ShowTheme)
+        self.assertNotEqual(get_generations(ShowTheme), (theme,))
+        self.assertEqual(get_generations(AstronomyShow), (show,))
+
+    def test_save_and_delete_bump_generation(self):
+        before = get_generations(ShowTheme)
+        theme = sample_show_theme()
+        after_save = get_generations(ShowTheme)
+        theme.delete()
+
+        self.assertNotEqual(before, after_save)
+        self.assertNotEqual(after_save, get_generations(ShowTheme))
+
+
+class CachedResponseTests(BaseApiTests):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="cache@test.com",
+            password="TestPass123",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_served_from_cache(self):
+        sample_show_theme()
+        self.client.get(SHOW_THEME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(SHOW_THEME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 1)
+
+    def test_list_invalidated_on_create(self):
+        self.client.get(SHOW_THEME_URL)
+        sample_show_theme()
+
+        res = self.client.get(SHOW_THEME_URL)
+        self.assertEqual(res.data["count"], 1)
+
+    def test_m2m_change_invalidates_shows(self):
+        show = sample_astronomy_show()
+        self.client.get(ASTRONOMY_SHOW_URL)
+
+        theme = ShowTheme.objects.create(name="Black Holes")
+        show.show_theme.add(theme)
+
+        res = self.client.get(ASTRONOMY_SHOW_URL)
+        self.assertIn("Black Holes", res.data["results"][0]["show_theme"])
+
+    def test_per_user_responses(self):
+        """Test per-user caches never leak one user's tickets to another"""
+        sample_ticket(reservation=sample_reservation(user=self.user))
+        self.client.get(TICKET_URL)
+
+        other = get_user_model().objects.create_user(
+            email="other@test.com",
+            password="TestPass123",
+        )
+        self.client.force_authenticate(user=other)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(TICKET_URL)
+        self.assertTrue(queries.captured_queries)
+
+    def test_ticket_delete_invalidates_list(self):
+        ticket = sample_ticket()
+        self.client.get(TICKET_URL)
+        ticket.delete()
+
+        res = self.client.get(TICKET_URL)
+        self.assertEqual(res.data["count"], 0)
+
+
+class ConditionalGetTests(BaseApiTests):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="etag@test.com",
+            password="TestPass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.theme = sample_show_theme()
+
+    def later(self, seconds=2):
+        return mock.patch(
+            "planetarium.cache.time.time_ns",
+            return_value=time.time_ns() + seconds * 10 ** 9
+        )
+
+    def test_response_has_validators(self):
+        with self.later():
+            res = self.client.get(SHOW_THEME_URL)
+        self.assertTrue(res["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", res)
+
+    def test_no_last_modified_within_the_second_of_a_change(self):
+        """Test If-Modified-Since is ignored until the second is over"""
+        generation, = get_generations(ShowTheme)
+
+        with mock.patch(
+            "planetarium.cache.time.time_ns",
+            return_value=generation
+        ):
+            res = self.client.get(
+                SHOW_THEME_URL,
+                HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Last-Modified", res)
+        self.assertIn("ETag", res)
+
+    def test_if_none_match_not_modified(self):
+        """Test an unchanged response is a 304 without database queries"""
+        etag = self.client.get(SHOW_THEME_URL)["ETag"]
+
+        with self.assertNumQueries(0):
+            res = self.client.get(SHOW_THEME_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+        self.assertFalse(res.content)
+
+    def test_change_gives_new_etag(self):
+        etag = self.client.get(SHOW_THEME_URL)["ETag"]
+        self.theme.name = "Galaxies"
+        self.theme.save()
+
+        res = self.client.get(SHOW_THEME_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(res.data["results"][0]["name"], "Galaxies")
+
+    def test_if_modified_since(self):
+        with self.later():
+            last_modified = self.client.get(SHOW_THEME_URL)["Last-Modified"]
+            res = self.client.get(
+                SHOW_THEME_URL,
+                HTTP_IF_MODIFIED_SINCE=last_modified
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_per_user_responses_vary_on_authorization(self):
+        res = self.client.get(reverse("planetarium:reservation-list"))
+        self.assertIn("Authorization", res["Vary"])
+
+        res = self.client.get(
+            reverse("planetarium:reservation-list"),
+            HTTP_IF_NONE_MATCH=res["ETag"]
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIn("Authorization", res["Vary"])
+
+    def test_etag_differs_per_url(self):
+        list_etag = self.client.get(SHOW_THEME_URL)["ETag"]
+        detail_etag = self.client.get(
+            reverse("planetarium:showtheme-detail", args=[self.theme.id])
+        )["ETag"]
+        self.assertNotEqual(list_etag, detail_etag)
+
+    def test_generation_is_modification_time(self):
+        bump_generation(ShowTheme)
+        self.assertAlmostEqual(
+            get_generations(ShowTheme)[0] / 10 ** 9,
+            time.time(),
+            delta=5
+        )
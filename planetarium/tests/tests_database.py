@@ -0,0 +1,129 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from planetarium.database import pool_stats
+from planetarium.tests.tests_api_ticket import BaseApiTests
+
+
+DATABASE_HEALTH_URL = reverse("planetarium:database-health")
+
+
+def fake_connections(*cursor_results):
+    connection = mock.Mock()
+    connection.cursor.side_effect = cursor_results
+    return {"default": connection}
+
+
+class WaitForDbTests(SimpleTestCase):
+    def test_waits_with_backoff_until_a_query_runs(self):
+        connections = fake_connections(
+            OperationalError("refused"),
+            OperationalError("refused"),
+            OperationalError("starting up"),
+            mock.MagicMock(),
+        )
+        out = StringIO()
+        with (
+            mock.patch(
+                "planetarium.management.commands.wait_for_db.connections",
+                connections
+            ),
+            mock.patch("time.sleep") as sleep,
+        ):
+            call_command("wait_for_db", "--max-interval", "1.5", stdout=out)
+
+        self.assertEqual(
+            [call.args[0] for call in sleep.call_args_list],
+            [0.5, 1, 1.5]
+        )
+        self.assertIn("Database available!", out.getvalue())
+
+    def test_gives_up_after_timeout(self):
+        connections = fake_connections(
+            *[OperationalError("refused")] * 100
+        )
+        with mock.patch(
+            "planetarium.management.commands.wait_for_db.connections",
+            connections
+        ):
+            with self.assertRaisesMessage(CommandError, "refused"):
+                call_command(
+                    "wait_for_db",
+                    "--timeout", "0.05",
+                    "--interval", "0.01",
+                    stdout=StringIO()
+                )
+
+
+class PoolStatsTests(SimpleTestCase):
+    def test_no_pool(self):
+        self.assertIsNone(pool_stats())
+
+    def test_saturation(self):
+        connection = mock.Mock()
+        connection.pool.get_stats.return_value = {
+            "pool_min": 2,
+            "pool_max": 10,
+            "pool_size": 8,
+            "pool_available": 3,
+            "requests_waiting": 0,
+        }
+        with mock.patch(
+            "planetarium.database.connections",
+            {"default": connection}
+        ):
+            stats = pool_stats()
+
+        self.assertEqual(stats["in_use"], 5)
+        self.assertEqual(stats["saturation"], 0.5)
+
+
+class DatabaseHealthTests(BaseApiTests):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="admin@test.com",
+            password="TestPass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_wait_for_db_runs_a_query(self):
+        out = StringIO()
+        call_command("wait_for_db", stdout=out)
+
+        self.assertIn("Database available!", out.getvalue())
+
+    def test_health(self):
+        res = self.client.get(DATABASE_HEALTH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertGreaterEqual(res.data["latency_ms"], 0)
+        self.assertIsNone(res.data["pool"])
+
+    def test_database_unavailable(self):
+        with mock.patch(
+            "planetarium.views.ping_database",
+            side_effect=OperationalError
+        ):
+            res = self.client.get(DATABASE_HEALTH_URL)
+
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    def test_staff_only(self):
+        self.user.is_staff = False
+        self.user.save()
+
+        res = self.client.get(DATABASE_HEALTH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
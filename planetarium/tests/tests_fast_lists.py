@@ -0,0 +1,129 @@
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.reverse import reverse
+
+from planetarium.fast_lists import FastJSONRenderer
+from planetarium.tests.tests_api_ticket import (
+    BaseApiTests,
+    sample_astronomy_show,
+    sample_planetarium_dome,
+    sample_reservation,
+    sample_show_session,
+    sample_show_theme,
+    sample_ticket,
+)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_same_bytes_as_json_renderer(self):
+        for data in [
+            {"title": "Étoile     \x1f \"quoted\" \\ / 🌌"},
+            [{"id": 1, "seats": [[1, 2]], "empty": None, "ok": True}],
+            {"when": timezone.now(), "ratio": 0.5},
+            None,
+        ]:
+            with self.subTest(data=data):
+                self.assertEqual(
+                    FastJSONRenderer().render(data),
+                    JSONRenderer().render(data)
+                )
+
+
+class FastListTests(BaseApiTests):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="fast@test.com",
+            password="TestPass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+        dome = sample_planetarium_dome(rows=5, seats_in_row=5)
+        themes = [sample_show_theme() for _ in range(3)]
+        for index in range(12):
+            show = sample_astronomy_show(
+                title=f"Ночь под звёздами {index}  ",
+                description="Stars" if index % 2 else "",
+            )
+            show.show_theme.add(*themes[:index % 4])
+            show_session = sample_show_session(
+                astronomy_show=show,
+                planetarium_dome=dome,
+                show_time=timezone.now() + timedelta(days=index, hours=3),
+            )
+            reservation = sample_reservation(user=self.user)
+            for seat in range(1, index % 3 + 2):
+                sample_ticket(
+                    row=index % 5 + 1,
+                    seat=seat,
+                    show_session=show_session,
+                    reservation=reservation,
+                )
+
+    def get(self, url, params):
+        cache.clear()
+        return self.client.get(url, params)
+
+    def assertSameBytes(self, name, params):
+        url = reverse(f"planetarium:{name}")
+        slow = self.get(url, params)
+        with override_settings(PLANETARIUM_FAST_LISTS=True):
+            fast = self.get(url, params)
+        self.assertEqual(slow.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_lists_are_byte_for_byte_the_same(self):
+        for name, params in [
+            ("astronomyshow-list", {}),
+            ("astronomyshow-list", {"page": 2}),
+            ("astronomyshow-list", {"search": "звёздами"}),
+            ("astronomyshow-list", {"fields": "show_theme,title"}),
+            ("astronomyshow-list", {"fields": "description"}),
+            ("showsession-list", {}),
+            ("showsession-list", {"page": 2}),
+            ("showsession-list", {"has_free_seats": "true"}),
+            ("showsession-list", {"pagination": "cursor"}),
+            ("ticket-list", {}),
+            ("ticket-list", {"search": "fast"}),
+            ("ticket-list", {"pagination": "cursor"}),
+            ("ticket-list", {"pagination": "cursor", "fields": "user"}),
+            ("ticket-list", {"fields": ""}),
+        ]:
+            with self.subTest(name=name, params=params):
+                self.assertSameBytes(name, params)
+
+    def test_cursor_links_are_the_same(self):
+        for name in ["showsession-list", "ticket-list"]:
+            with self.subTest(name=name):
+                res = self.assertSameBytes(name, {"pagination": "cursor"})
+                query = urlsplit(res.json()["next"]).query
+                self.assertSameBytes(name, dict(parse_qsl(query)))
+
+    @override_settings(PLANETARIUM_FAST_LISTS=True)
+    def test_fast_lists_skip_model_instances(self):
+        url = reverse("planetarium:astronomyshow-list")
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+
+        # Count, page and theme names.
+        self.assertEqual(len(queries), 3)
+        self.assertIn("SELECT", queries[1]["sql"])
+
+    @override_settings(PLANETARIUM_FAST_LISTS=True)
+    def test_other_actions_are_unchanged(self):
+        show = sample_astronomy_show()
+        res = self.client.get(
+            reverse("planetarium:astronomyshow-detail", args=[show.pk])
+        )
+
+        self.assertEqual(res.data["title"], show.title)
@@ -0,0 +1,180 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium.fieldsets import parse_paths
+from planetarium.tests.tests_api_ticket import (
+    BaseApiTests,
+    sample_astronomy_show,
+    sample_planetarium_dome,
+    sample_reservation,
+    sample_show_session,
+    sample_ticket,
+)
+
+
+class ParsePathsTests(SimpleTestCase):
+    def test_parse_paths(self):
+        self.assertEqual(
+            parse_paths("id, show_session.show_time,show_session.id,,"),
+            {"id": None, "show_session": {"show_time": None, "id": None}}
+        )
+
+    def test_whole_field_wins(self):
+        self.assertEqual(parse_paths("a.b,a"), {"a": None})
+        self.assertEqual(parse_paths("a,a.b"), {"a": None})
+
+
+class FieldsetApiTests(BaseApiTests):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="fields@test.com",
+            password="TestPass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.show = sample_astronomy_show()
+        self.theme = self.show.show_theme.get()
+        self.show_session = sample_show_session(
+            astronomy_show=self.show,
+            planetarium_dome=sample_planetarium_dome(rows=5, seats_in_row=4),
+            show_time=timezone.now() + timedelta(days=1),
+        )
+        self.ticket = sample_ticket(
+            show_session=self.show_session,
+            reservation=sample_reservation(user=self.user),
+        )
+        self.ticket_url = reverse(
+            "planetarium:ticket-detail",
+            args=[self.ticket.pk]
+        )
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        return res, " ".join(query["sql"] for query in queries)
+
+    def test_ticket_relations_are_ids_until_expanded(self):
+        res, sql = self.get(self.ticket_url, {})
+
+        self.assertEqual(res.data["show_session"], self.show_session.pk)
+        self.assertEqual(res.data["reservation"], self.ticket.reservation_id)
+        self.assertNotIn("planetarium_showsession", sql)
+
+        res, sql = self.get(
+            self.ticket_url,
+            {"expand": "show_session,reservation"}
+        )
+
+        self.assertEqual(
+            res.data["show_session"]["astronomy_show"]["show_theme"],
+            [{"id": self.theme.pk, "name": self.theme.name}]
+        )
+        self.assertEqual(res.data["show_session"]["tickets_available"], 19)
+        self.assertEqual(res.data["reservation"]["user"], self.user.email)
+
+    def test_fields_select_inside_expanded_objects(self):
+        res, sql = self.get(self.ticket_url, {
+            "expand": "show_session",
+            "fields": "row,show_session.show_time,"
+                      "show_session.astronomy_show.title",
+        })
+
+        self.assertEqual(
+            res.data,
+            {
+                "row": self.ticket.row,
+                "show_session": {
+                    "show_time": res.data["show_session"]["show_time"],
+                    "astronomy_show": {"title": self.show.title},
+                },
+            }
+        )
+        self.assertNotIn("description", sql)
+        self.assertNotIn("planetarium_planetariumdome", sql)
+        self.assertNotIn("planetarium_showtheme", sql)
+
+    def test_fields_trim_lists_and_their_queries(self):
+        res, sql = self.get(
+            reverse("planetarium:astronomyshow-list"),
+            {"fields": "id,title"}
+        )
+
+        self.assertIn(
+            {"id": self.show.pk, "title": self.show.title},
+            res.data["results"]
+        )
+        self.assertNotIn("description", sql)
+        self.assertNotIn("planetarium_showtheme", sql)
+
+        res, sql = self.get(
+            reverse("planetarium:showsession-list"),
+            {"fields": "show_time,tickets_available"}
+        )
+
+        self.assertEqual(
+            list(res.data["results"][0]),
+            ["show_time", "tickets_available"]
+        )
+        self.assertNotIn("planetarium_astronomyshow", sql)
+
+    def test_reservation_tickets(self):
+        res, sql = self.get(
+            reverse(
+                "planetarium:reservation-detail",
+                args=[self.ticket.reservation_id]
+            ),
+            {"fields": "tickets.astronomy_show"}
+        )
+
+        self.assertEqual(
+            res.data,
+            {"tickets": [{"astronomy_show": self.show.title}]}
+        )
+        self.assertNotIn("planetarium_planetariumdome", sql)
+
+    def test_invalid_fieldsets(self):
+        for url, params, error in [
+            (self.ticket_url, {"fields": "nope"}, "fields"),
+            (self.ticket_url, {"fields": "row.x"}, "fields"),
+            (self.ticket_url, {"fields": "show_session.id"}, "fields"),
+            (self.ticket_url, {"expand": "row"}, "expand"),
+            (
+                reverse("planetarium:showsession-list"),
+                {"expand": "astronomy_show"},
+                "expand",
+            ),
+        ]:
+            with self.subTest(params=params):
+                res = self.client.get(url, params)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(error, res.data)
+
+    def test_async_views_follow_fields(self):
+        params = {"fields": "id,astronomy_show.title,planetarium_dome"}
+        args = [self.show_session.pk]
+        res = self.client.get(
+            reverse("planetarium:showsession-detail", args=args),
+            params
+        )
+        async_res = self.client.get(
+            reverse("planetarium:async-showsession-detail", args=args),
+            params,
+            headers={
+                "Authorization": f"Bearer {AccessToken.for_user(self.user)}"
+            }
+        )
+
+        self.assertEqual(async_res.json(), res.json())
+        self.assertEqual(
+            list(res.data),
+            ["id", "astronomy_show", "planetarium_dome"]
+        )
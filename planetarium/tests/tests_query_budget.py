@@ -0,0 +1,239 @@
+import sys
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    SeatHold,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+
+
+def seed(size, user):
+    """Create `size` rows of every model, all tickets owned by `user`"""
+    themes = ShowTheme.objects.bulk_create(
+        ShowTheme(name=f"Theme {index}") for index in range(size)
+    )
+    shows = AstronomyShow.objects.bulk_create(
+        AstronomyShow(title=f"Show {index}", description="Stars")
+        for index in range(size)
+    )
+    AstronomyShow.show_theme.through.objects.bulk_create(
+        AstronomyShow.show_theme.through(
+            astronomyshow_id=show.id,
+            showtheme_id=themes[(index + offset) % size].id,
+        )
+        for index, show in enumerate(shows)
+        for offset in range(2)
+    )
+    domes = PlanetariumDome.objects.bulk_create(
+        PlanetariumDome(name=f"Dome {index}", rows=10, seats_in_row=10)
+        for index in range(size)
+    )
+    start = timezone.now() + timedelta(days=1)
+    sessions = ShowSession.objects.bulk_create(
+        ShowSession(
+            astronomy_show=shows[index],
+            planetarium_dome=domes[index],
+            show_time=start + timedelta(minutes=index),
+        )
+        for index in range(size)
+    )
+    reservations = Reservation.objects.bulk_create(
+        Reservation(user=user) for _ in range(size)
+    )
+    Ticket.objects.bulk_create(
+        Ticket(
+            row=1,
+            seat=1,
+            show_session=sessions[index],
+            reservation=reservations[index],
+        )
+        for index in range(size)
+    )
+
+
+class QueryBudgetMixin:
+    """
+    Every router endpoint and action with the most queries it may run.
+
+    The same budget has to hold for small and large datasets, so an
+    N+1 regression fails the build. Budgets count the database work of
+    a cold request (response caches are cleared first); JWT auth is
+    bypassed with force_authenticate, except on the async views, which
+    spend one query loading the token's user.
+    """
+
+    size = None
+    budgets = {
+        ("GET", "showtheme-list"): 2,
+        ("GET", "showtheme-detail"): 1,
+        ("GET", "astronomyshow-list"): 3,
+        ("GET", "astronomyshow-list", "search=show"): 3,
+        ("GET", "astronomyshow-list", "fields=id,title"): 2,
+        ("GET", "astronomyshow-detail"): 2,
+        ("GET", "planetariumdome-list"): 2,
+        ("GET", "planetariumdome-detail"): 1,
+        ("GET", "showsession-list"): 2,
+        ("GET", "showsession-list", "has_free_seats=true"): 2,
+        ("GET", "showsession-list", "pagination=cursor"): 1,
+        ("GET", "showsession-list", "fields=id,show_time"): 2,
+        ("GET", "showsession-detail"): 2,
+        ("GET", "showsession-detail", "fields=id,planetarium_dome"): 1,
+        ("GET", "showsession-seat-map"): 2,
+        ("GET", "showsession-best-seats", "count=4"): 2,
+        ("GET", "showsession-seat-events", "timeout=0"): 1,
+        ("GET", "async-astronomyshow-list"): 4,
+        ("GET", "async-astronomyshow-list", "search=show"): 4,
+        ("GET", "async-astronomyshow-detail"): 3,
+        ("GET", "async-planetariumdome-list"): 3,
+        ("GET", "async-planetariumdome-detail"): 2,
+        ("GET", "async-showsession-list"): 3,
+        ("GET", "async-showsession-list", "has_free_seats=true"): 3,
+        ("GET", "async-showsession-detail"): 3,
+        ("GET", "async-showsession-detail", "fields=show_time"): 2,
+        ("GET", "async-showsession-seat-map"): 3,
+        ("GET", "async-showsession-seat-events", "timeout=0"): 2,
+        ("GET", "database-health"): 1,
+        ("GET", "reservation-list"): 3,
+        ("GET", "reservation-detail"): 2,
+        ("GET", "reservation-detail", "fields=id,created_at"): 1,
+        ("GET", "reservation-upcoming"): 3,
+        ("GET", "ticket-list"): 2,
+        ("GET", "ticket-list", "search=show+1"): 2,
+        ("GET", "ticket-list", "pagination=cursor"): 1,
+        ("GET", "ticket-detail"): 1,
+        ("GET", "ticket-detail", "expand=reservation"): 1,
+        ("GET", "ticket-detail", "expand=show_session,reservation"): 2,
+        ("POST", "reservation-book"): 9,
+        ("POST", "reservation-hold"): 7,
+        ("POST", "reservation-confirm"): 9,
+        ("POST", "ticket-list"): 9,
+        ("DELETE", "ticket-detail"): 2,
+        ("DELETE", "reservation-detail"): 5,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email="budget@test.com",
+            password="TestPass123",
+            is_staff=True,
+        )
+        seed(cls.size, cls.user)
+        cls.show_session = ShowSession.objects.order_by("pk").last()
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Set outside setUpTestData, which deep-copies attributes per test.
+        cls.report = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        if not cls.report:
+            return super().tearDownClass()
+        width = max(len(cls.describe(key)) for key in cls.report)
+        lines = [f"\nQuery counts at {cls.size} rows:"]
+        for key, count in cls.report.items():
+            lines.append(
+                f"  {cls.describe(key):<{width}}  "
+                f"{count:>3} / {cls.budgets[key]}"
+            )
+        sys.stderr.write("\n".join(lines) + "\n")
+        super().tearDownClass()
+
+    @staticmethod
+    def describe(key):
+        method, name, *query = key
+        return f"{method} {name}{'?' + query[0] if query else ''}"
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def request_args(self, method, name):
+        """URL and body for an endpoint, using fresh rows for writes"""
+        ticket = Ticket.objects.order_by("pk").last()
+        reservation = Reservation.objects.order_by("pk").last()
+        args = {
+            "showtheme-detail": [ShowTheme.objects.last().pk],
+            "astronomyshow-detail": [AstronomyShow.objects.last().pk],
+            "planetariumdome-detail": [PlanetariumDome.objects.last().pk],
+            "showsession-detail": [self.show_session.pk],
+            "showsession-seat-map": [self.show_session.pk],
+            "showsession-best-seats": [self.show_session.pk],
+            "showsession-seat-events": [self.show_session.pk],
+            "reservation-detail": [reservation.pk],
+            "ticket-detail": [ticket.pk],
+        }.get(name.removeprefix("async-"), [])
+        data = None
+        if (method, name) == ("POST", "reservation-book"):
+            data = {
+                "show_session": self.show_session.pk,
+                "tickets": [{"row": 5, "seat": seat} for seat in (1, 2)],
+            }
+        if (method, name) == ("POST", "reservation-hold"):
+            data = {
+                "show_session": self.show_session.pk,
+                "tickets": [{"row": 7, "seat": seat} for seat in (1, 2)],
+            }
+        if (method, name) == ("POST", "reservation-confirm"):
+            data = {"hold": SeatHold.objects.order_by("pk").last().token}
+        if (method, name) == ("POST", "ticket-list"):
+            data = {
+                "row": 6,
+                "seat": 1,
+                "show_session": self.show_session.pk,
+                "reservation": reservation.pk,
+            }
+        return reverse(f"planetarium:{name}", args=args), data
+
+    def test_query_budgets(self):
+        for key, budget in self.budgets.items():
+            method, name, *query = key
+            with self.subTest(endpoint=self.describe(key)):
+                url, data = self.request_args(method, name)
+                if query:
+                    url = f"{url}?{query[0]}"
+                cache.clear()
+                send = getattr(self.client, method.lower())
+                with CaptureQueriesContext(connection) as queries:
+                    if data is not None:
+                        res = send(url, data, format="json")
+                    else:
+                        res = send(url)
+                self.report[key] = len(queries)
+                self.assertLess(res.status_code, 400, res.content)
+                self.assertLessEqual(
+                    len(queries),
+                    budget,
+                    f"{self.describe(key)} ran {len(queries)} queries "
+                    f"(budget {budget}) at {self.size} rows:\n"
+                    + "\n".join(query["sql"] for query in queries)
+                )
+
+
+class SmallDatasetQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    size = 10
+
+
+class LargeDatasetQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    size = 10000
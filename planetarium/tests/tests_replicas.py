@@ -0,0 +1,143 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import SimpleTestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from planetarium.models import AstronomyShow
+from planetarium.replicas import ReplicaRouter, read_from
+from planetarium.tests.tests_api_ticket import (
+    sample_astronomy_show,
+    sample_show_session,
+    sample_user,
+)
+
+
+ASTRONOMY_SHOW_URL = reverse("planetarium:astronomyshow-list")
+BOOK_URL = reverse("planetarium:reservation-book")
+RESERVATION_URL = reverse("planetarium:reservation-list")
+
+
+@override_settings(PLANETARIUM_DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_primary_by_default(self):
+        self.assertIsNone(self.router.db_for_read(AstronomyShow))
+
+        with read_from("replica"):
+            self.assertEqual(
+                self.router.db_for_read(AstronomyShow),
+                "replica"
+            )
+        self.assertIsNone(self.router.db_for_read(AstronomyShow))
+
+    def test_writes_primary(self):
+        astronomy_show = AstronomyShow(title="Read from the replica")
+        astronomy_show._state.db = "replica"
+
+        self.assertEqual(
+            self.router.db_for_write(AstronomyShow, instance=astronomy_show),
+            DEFAULT_DB_ALIAS
+        )
+
+    def test_no_migrations_on_replicas(self):
+        self.assertFalse(self.router.allow_migrate("replica", "planetarium"))
+        self.assertIsNone(
+            self.router.allow_migrate(DEFAULT_DB_ALIAS, "planetarium")
+        )
+
+
+@override_settings(
+    PLANETARIUM_DATABASE_REPLICAS=["replica"],
+    PLANETARIUM_REPLICA_PIN_SECONDS=60,
+)
+class ReplicaReadTests(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        self.user = sample_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.reader = APIClient()
+        self.reader.force_authenticate(user=sample_user())
+        self.show_session = sample_show_session()
+
+    def tearDown(self):
+        cache.clear()
+
+    def get(self, url, client=None):
+        """The response and the number of queries run on each alias"""
+        with (
+            CaptureQueriesContext(connections["default"]) as primary,
+            CaptureQueriesContext(connections["replica"]) as replica,
+        ):
+            res = (client or self.client).get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, len(primary), len(replica)
+
+    def book(self):
+        res = self.client.post(
+            BOOK_URL,
+            {
+                "show_session": self.show_session.id,
+                "tickets": [{"row": 1, "seat": 1}],
+            },
+            format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(PLANETARIUM_REPLICA_PIN_SECONDS=0)
+    def test_reads_from_replica(self):
+        res, primary, replica = self.get(ASTRONOMY_SHOW_URL, self.reader)
+
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+        self.assertEqual(res.data["count"], 1)
+
+    def test_writer_reads_primary(self):
+        self.book()
+
+        with mock.patch(
+            "planetarium.cache.written_recently",
+            return_value=False
+        ):
+            res, primary, replica = self.get(RESERVATION_URL)
+            self.assertEqual(replica, 0)
+            self.assertEqual(res.data["count"], 1)
+
+            res, primary, replica = self.get(RESERVATION_URL, self.reader)
+            self.assertEqual(primary, 0)
+            self.assertGreater(replica, 0)
+
+    @override_settings(PLANETARIUM_REPLICA_PIN_SECONDS=0)
+    def test_pin_expires(self):
+        self.book()
+
+        res, primary, replica = self.get(RESERVATION_URL)
+
+        self.assertEqual(primary, 0)
+        self.assertEqual(res.data["count"], 1)
+
+    def test_cache_fills_read_primary_after_a_change(self):
+        sample_astronomy_show()
+
+        res, primary, replica = self.get(ASTRONOMY_SHOW_URL, self.reader)
+
+        self.assertEqual(replica, 0)
+        self.assertEqual(res.data["count"], 2)
+
+    def test_seat_map_reads_primary(self):
+        url = reverse(
+            "planetarium:showsession-seat-map",
+            args=[self.show_session.id]
+        )
+
+        res, primary, replica = self.get(url, self.reader)
+
+        self.assertEqual(replica, 0)
@@ -0,0 +1,315 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import (
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium.booking import book_seats, hold_seats, sweep_expired_holds
+from planetarium.cancellation import cancel_reservations
+from planetarium.models import Reservation
+from planetarium.seat_events import (
+    CacheSeatEventBroker,
+    LocalSeatEventBroker,
+    get_seat_event_broker,
+    publish_seats,
+    wait_for_events,
+)
+from planetarium.tests.tests_api_ticket import (
+    BaseApiTests,
+    sample_planetarium_dome,
+    sample_show_session,
+)
+
+
+LOCAL_BROKER = "planetarium.seat_events.LocalSeatEventBroker"
+
+
+def seat_events_url(show_session_id, prefix=""):
+    return reverse(
+        f"planetarium:{prefix}showsession-seat-events",
+        args=[show_session_id]
+    )
+
+
+class BrokerTestsMixin:
+    broker_class = None
+
+    def setUp(self):
+        self.broker = self.broker_class()
+        self.broker.backlog = 3
+
+    def test_read_returns_events_after_id(self):
+        start = self.broker.last_event_id(1)
+        self.broker.publish(1, "taken", [[1, 1]])
+        self.broker.publish(2, "taken", [[1, 2]])
+        self.broker.publish(1, "freed", [[1, 1]])
+
+        last, events = self.broker.read(1, start)
+
+        self.assertEqual(last, start + 2)
+        self.assertEqual(
+            [(event["type"], event["seats"]) for event in events],
+            [("taken", [[1, 1]]), ("freed", [[1, 1]])]
+        )
+        self.assertEqual(self.broker.read(1, start + 1)[1], events[1:])
+        self.assertEqual(self.broker.read(1, last), (last, []))
+
+    def test_lost_events_give_reset(self):
+        start = self.broker.last_event_id(1)
+        for seat in range(1, 6):
+            self.broker.publish(1, "taken", [[1, seat]])
+
+        last, events = self.broker.read(1, start)
+
+        self.assertEqual(
+            events,
+            [{"id": last, "type": "reset", "seats": []}]
+        )
+        self.assertEqual(len(self.broker.read(1, last - 3)[1]), 3)
+
+    def test_unknown_id_gives_reset(self):
+        last = self.broker.last_event_id(1)
+
+        self.assertEqual(self.broker.read(1, last + 10)[1][0]["type"], "reset")
+
+
+class LocalSeatEventBrokerTests(BrokerTestsMixin, SimpleTestCase):
+    broker_class = LocalSeatEventBroker
+
+
+class CacheSeatEventBrokerTests(BrokerTestsMixin, BaseApiTests):
+    broker_class = CacheSeatEventBroker
+
+    def test_evicted_event_gives_reset(self):
+        start = self.broker.last_event_id(1)
+        event_id = self.broker.publish(1, "taken", [[1, 1]])
+        self.broker.publish(1, "taken", [[1, 2]])
+        cache.delete(self.broker._key(1, event_id))
+
+        # Within the grace the event may still be being published.
+        self.assertEqual(self.broker.read(1, start), (start, []))
+        later = time.time() + self.broker.publish_grace + 1
+        with mock.patch("time.time", return_value=later):
+            self.assertEqual(
+                self.broker.read(1, start)[1][0]["type"],
+                "reset"
+            )
+
+    def test_event_being_published_is_read_later(self):
+        """Test an id taken before its event is stored is no reset"""
+        start = self.broker.last_event_id(1)
+        first = self.broker.publish(1, "taken", [[1, 1]])
+        # Another worker took the next id but has not stored its event.
+        cache.incr(self.broker._last_id_key(1))
+
+        last, events = self.broker.read(1, start)
+
+        self.assertEqual(last, first)
+        self.assertEqual(
+            events,
+            [{"id": first, "type": "taken", "seats": [[1, 1]]}]
+        )
+        self.assertEqual(self.broker.read(1, first), (first, []))
+        cache.set(
+            self.broker._key(1, first + 1),
+            (time.time(), {"id": first + 1, "type": "freed", "seats": []})
+        )
+        self.assertEqual(
+            self.broker.read(1, first)[1][0]["type"],
+            "freed"
+        )
+
+
+@override_settings(PLANETARIUM_SEAT_EVENT_BROKER=LOCAL_BROKER)
+class SeatEventsApiTests(BaseApiTests):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="events@test.com",
+            password="TestPass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.show_session = sample_show_session(
+            planetarium_dome=sample_planetarium_dome(rows=3, seats_in_row=4),
+            show_time=timezone.now() + timedelta(days=1),
+        )
+        self.url = seat_events_url(self.show_session.pk)
+
+    def last_event_id(self):
+        res = self.client.get(
+            reverse(
+                "planetarium:showsession-seat-map",
+                args=[self.show_session.pk]
+            )
+        )
+        return res.data["last_event_id"]
+
+    def events_after(self, after):
+        res = self.client.get(self.url, {"after": after, "timeout": 0})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [
+            (event["type"], event["seats"]) for event in res.data["events"]
+        ]
+
+    def test_booking_and_cancelling_publish_deltas(self):
+        after = self.last_event_id()
+        with self.captureOnCommitCallbacks(execute=True):
+            book_seats(self.user, self.show_session, [(1, 1), (1, 2)])
+        with self.captureOnCommitCallbacks(execute=True):
+            cancel_reservations(Reservation.objects.all())
+
+        self.assertEqual(
+            self.events_after(after),
+            [("taken", [[1, 1], [1, 2]]), ("freed", [[1, 1], [1, 2]])]
+        )
+
+    def test_ticket_signals_publish_deltas(self):
+        after = self.last_event_id()
+        reservation = Reservation.objects.create(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket = reservation.tickets.create(
+                row=2,
+                seat=3,
+                show_session=self.show_session
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+
+        self.assertEqual(
+            self.events_after(after),
+            [("taken", [[2, 3]]), ("freed", [[2, 3]])]
+        )
+
+    def test_holds_publish_taken_and_sweeps_reset(self):
+        after = self.last_event_id()
+        with self.captureOnCommitCallbacks(execute=True):
+            hold_seats(
+                self.user,
+                self.show_session,
+                [(3, 1)],
+                ttl=timedelta(seconds=-1)
+            )
+        sweep_expired_holds()
+
+        self.assertEqual(
+            self.events_after(after),
+            [("taken", [[3, 1]]), ("reset", [])]
+        )
+
+    def test_without_after_only_new_events(self):
+        publish_seats(self.show_session.pk, [(1, 4)], True)
+
+        res = self.client.get(self.url, {"timeout": 0})
+
+        self.assertEqual(res.data["events"], [])
+        self.assertEqual(res.data["last_event_id"], self.last_event_id())
+
+    def test_long_poll_waits_for_event(self):
+        after = self.last_event_id()
+        timer = threading.Timer(
+            0.3,
+            publish_seats,
+            args=(self.show_session.pk, [(2, 2)], True)
+        )
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        res = self.client.get(self.url, {"after": after, "timeout": 10})
+
+        self.assertEqual(res.data["events"][0]["seats"], [[2, 2]])
+        self.assertEqual(res.data["last_event_id"], after + 1)
+
+    def test_invalid_parameters(self):
+        res = self.client.get(self.url, {"after": "x", "timeout": "nan"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(res.data), {"after", "timeout"})
+
+        res = self.client.get(seat_events_url(0), {"timeout": 0})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(PLANETARIUM_SEAT_EVENT_BROKER=LOCAL_BROKER)
+class WaitForEventsTests(TransactionTestCase):
+    def test_connection_released_while_waiting(self):
+        connection.ensure_connection()
+        after = get_seat_event_broker().last_event_id(1)
+
+        self.assertEqual(wait_for_events(1, after, 0.3), (after, []))
+        self.assertIsNone(connection.connection)
+
+    def test_connection_kept_when_events_are_ready(self):
+        connection.ensure_connection()
+        after = get_seat_event_broker().last_event_id(1)
+        publish_seats(1, [(1, 1)], True)
+
+        last, events = wait_for_events(1, after, 10)
+
+        self.assertEqual(last, after + 1)
+        self.assertIsNotNone(connection.connection)
+
+
+@override_settings(PLANETARIUM_SEAT_EVENT_BROKER=LOCAL_BROKER)
+class AsyncSeatEventsApiTests(BaseApiTests):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="async-events@test.com",
+            password="TestPass123",
+        )
+        self.show_session = sample_show_session()
+        self.url = seat_events_url(self.show_session.pk, prefix="async-")
+        self.headers = {
+            "Authorization": f"Bearer {AccessToken.for_user(self.user)}"
+        }
+        self.after = get_seat_event_broker().last_event_id(
+            self.show_session.pk
+        )
+        publish_seats(self.show_session.pk, [(1, 1)], True)
+        publish_seats(self.show_session.pk, [(1, 1)], False)
+
+    async def test_long_poll(self):
+        res = await self.async_client.get(
+            self.url,
+            {"after": self.after, "timeout": 0},
+            headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [event["type"] for event in res.json()["events"]],
+            ["taken", "freed"]
+        )
+
+    async def test_server_sent_events(self):
+        res = await self.async_client.get(
+            self.url,
+            {"timeout": 0.5},
+            headers={
+                **self.headers,
+                "Accept": "text/event-stream",
+                "Last-Event-ID": str(self.after + 1),
+            }
+        )
+        body = b"".join([chunk async for chunk in res.streaming_content])
+
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        self.assertEqual(
+            body.decode().split("\n\n")[:2],
+            [
+                "retry: 3000",
+                f"id: {self.after + 2}\nevent: freed\n"
+                f'data: {{"seats": [[1, 1]]}}',
+            ]
+        )
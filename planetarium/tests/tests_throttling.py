@@ -0,0 +1,147 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIRequestFactory
+
+from planetarium.tests.tests_api_ticket import (
+    BaseApiTests,
+    sample_show_session,
+    sample_user,
+)
+from planetarium.throttling import (
+    ScopedSlidingWindowThrottle,
+    SlidingWindowRateThrottle,
+)
+
+
+ASTRONOMY_SHOW_URL = reverse("planetarium:astronomyshow-list")
+BOOK_URL = reverse("planetarium:reservation-book")
+TOKEN_URL = reverse("accounts:token_obtain_pair")
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class ThreePerMinuteThrottle(SlidingWindowRateThrottle):
+    rate = "3/min"
+    scope = "test"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": "client"}
+
+
+class SlidingWindowRateThrottleTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = Clock(6000)
+        self.request = APIRequestFactory().get("/")
+
+    def tearDown(self):
+        cache.clear()
+
+    def allow(self):
+        throttle = ThreePerMinuteThrottle()
+        throttle.timer = self.clock
+        return throttle.allow_request(self.request, None), throttle
+
+    def test_limits_requests_in_the_window(self):
+        self.assertEqual(
+            [self.allow()[0] for _ in range(4)],
+            [True, True, True, False]
+        )
+
+    def test_previous_window_slides_out(self):
+        for _ in range(3):
+            self.allow()
+
+        # Half of the previous window still counts: 1.5 requests.
+        self.clock.now += 90
+        self.assertTrue(self.allow()[0])
+        allowed, throttle = self.allow()
+
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(throttle.wait(), 10)
+
+    def test_rejected_requests_are_not_counted(self):
+        for _ in range(10):
+            allowed, throttle = self.allow()
+
+        self.assertEqual(throttle.count, 3)
+        self.assertAlmostEqual(throttle.wait(), 80)
+
+    def test_keeps_one_counter_per_window(self):
+        for _ in range(3):
+            self.allow()
+        self.clock.now += 90
+        self.allow()
+
+        self.assertEqual(
+            cache.get_many(
+                ["throttle:test:client:100", "throttle:test:client:101"]
+            ),
+            {"throttle:test:client:100": 3, "throttle:test:client:101": 1}
+        )
+
+
+@mock.patch.object(
+    ScopedSlidingWindowThrottle,
+    "THROTTLE_RATES",
+    {
+        "anon": "100/min",
+        "user": "100/min",
+        "catalog": "100/min",
+        "booking": "1/min",
+        "token": "2/min",
+    }
+)
+class ScopedThrottleTests(BaseApiTests):
+    def setUp(self):
+        self.user = sample_user()
+        self.client.force_authenticate(user=self.user)
+
+    def book(self, show_session, seat):
+        return self.client.post(
+            BOOK_URL,
+            {
+                "show_session": show_session.id,
+                "tickets": [{"row": 1, "seat": seat}],
+            },
+            format="json"
+        )
+
+    def test_booking_does_not_use_the_catalog_budget(self):
+        show_session = sample_show_session()
+
+        res = self.book(show_session, 1)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        res = self.book(show_session, 2)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+
+        res = self.client.get(ASTRONOMY_SHOW_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_token_scope(self):
+        self.client.force_authenticate(user=None)
+        payload = {"email": self.user.email, "password": "wrong"}
+
+        statuses = [
+            self.client.post(TOKEN_URL, payload).status_code
+            for _ in range(3)
+        ]
+
+        self.assertEqual(
+            statuses,
+            [
+                status.HTTP_401_UNAUTHORIZED,
+                status.HTTP_401_UNAUTHORIZED,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            ]
+        )
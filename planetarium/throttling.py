@@ -0,0 +1,123 @@
+"""
+Sliding-window rate limits kept in a shared cache.
+
+Instead of DRF's list of request timestamps per client, each client has
+one counter per fixed window. The number of requests in the last
+`duration` seconds is estimated from the current window's count plus
+the previous window's, weighted by how much of it the sliding window
+still covers. That is two small integers per client whatever the rate,
+updated with an atomic increment.
+
+Counters live in the cache named by PLANETARIUM_THROTTLE_CACHE
+("default" unless set), which must be shared by every worker (Redis in
+production) for the limits to hold across processes.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    SimpleRateThrottle with sliding-window counters.
+
+    Subclasses implement get_cache_key() as for SimpleRateThrottle.
+    Rejected requests are not counted.
+    """
+
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def get_cache(self):
+        alias = getattr(settings, "PLANETARIUM_THROTTLE_CACHE", "default")
+        return caches[alias]
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        cache = self.get_cache()
+        self.now = self.timer()
+        window, self.offset = divmod(self.now, self.duration)
+        previous = f"{self.key}:{int(window) - 1}"
+        current = f"{self.key}:{int(window)}"
+        weight = 1 - self.offset / self.duration
+        counts = cache.get_many([previous, current])
+        self.previous_count = counts.get(previous, 0)
+        self.count = counts.get(current, 0)
+        if self.previous_count * weight + self.count >= self.num_requests:
+            return self.throttle_failure()
+
+        # Another worker may have counted a request since the read.
+        self.count = self._increment(cache, current)
+        if self.previous_count * weight + self.count > self.num_requests:
+            self.count = cache.decr(current)
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def _increment(self, cache, key):
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Kept for the next window too, where it is the previous one.
+            if cache.add(key, 1, 2 * self.duration):
+                return 1
+            return cache.incr(key)
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        """Seconds until the estimate leaves room for one more request"""
+        room = self.num_requests - self.count - 1
+        if room >= 0 and self.previous_count:
+            # Wait for the previous window to slide out far enough.
+            share = 1 - room / self.previous_count
+            return max(share * self.duration - self.offset, 0)
+        # The current window is full on its own: once it becomes the
+        # previous one, wait for enough of it to slide out.
+        share = 1 - (self.num_requests - 1) / max(self.count, 1)
+        return self.duration - self.offset + max(share, 0) * self.duration
+
+
+class ScopedSlidingWindowThrottle(SlidingWindowRateThrottle):
+    """
+    Limit each client per scope of the view handling the request.
+
+    The scope is the view's throttle_scope, or write_throttle_scope for
+    unsafe methods when set. Views without a scope fall back to the
+    "user" rate for authenticated clients and "anon" for the others.
+    Clients are told apart by user id, or IP address when anonymous.
+    """
+
+    def __init__(self):
+        # The rate depends on the view, see allow_request().
+        pass
+
+    def get_scope(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        if request.method not in SAFE_METHODS:
+            scope = getattr(view, "write_throttle_scope", None) or scope
+        if scope:
+            return scope
+        if request.user and request.user.is_authenticated:
+            return "user"
+        return "anon"
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(request, view)
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": ident}
@@ -4,7 +4,15 @@ from django.urls import (
 )
 from rest_framework import routers
 
+from planetarium.async_views import (
+    AsyncAstronomyShowView,
+    AsyncPlanetariumDomeView,
+    AsyncSeatEventsView,
+    AsyncSeatMapView,
+    AsyncShowSessionView,
+)
 from planetarium.views import (
+    DatabaseHealthView,
     ShowThemeViewSet,
     AstronomyShowViewSet,
     PlanetariumDomeViewSet,
@@ -21,8 +29,57 @@ router.register("show-sessions", ShowSessionViewSet)
 router.register("reservations", ReservationViewSet)
 router.register("tickets", TicketViewSet)
 
+async_urlpatterns = [
+    path(
+        "astronomy-shows/",
+        AsyncAstronomyShowView.as_view(),
+        name="async-astronomyshow-list"
+    ),
+    path(
+        "astronomy-shows/<int:pk>/",
+        AsyncAstronomyShowView.as_view(),
+        name="async-astronomyshow-detail"
+    ),
+    path(
+        "planetarium-domes/",
+        AsyncPlanetariumDomeView.as_view(),
+        name="async-planetariumdome-list"
+    ),
+    path(
+        "planetarium-domes/<int:pk>/",
+        AsyncPlanetariumDomeView.as_view(),
+        name="async-planetariumdome-detail"
+    ),
+    path(
+        "show-sessions/",
+        AsyncShowSessionView.as_view(),
+        name="async-showsession-list"
+    ),
+    path(
+        "show-sessions/<int:pk>/",
+        AsyncShowSessionView.as_view(),
+        name="async-showsession-detail"
+    ),
+    path(
+        "show-sessions/<int:pk>/seat-map/",
+        AsyncSeatMapView.as_view(),
+        name="async-showsession-seat-map"
+    ),
+    path(
+        "show-sessions/<int:pk>/seat-events/",
+        AsyncSeatEventsView.as_view(),
+        name="async-showsession-seat-events"
+    ),
+]
+
 urlpatterns = [
     path("", include(router.urls)),
+    path("async/", include(async_urlpatterns)),
+    path(
+        "health/database/",
+        DatabaseHealthView.as_view(),
+        name="database-health"
+    ),
 ]
 
 app_name = "planetarium"
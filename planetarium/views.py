@@ -1,55 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponse
 from django.utils import timezone
-from rest_framework import filters, viewsets
+from rest_framework import filters, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from planetarium.booking import SeatsUnavailable, claim_seats
+from planetarium.cache import CachedResponseMixin
+from planetarium.cancellation import (
+    CANCELLATION_CUTOFF,
+    cancel_reservations,
+    first_show_time,
+    reservations_past_cutoff,
+)
+from planetarium.database import ping_database, pool_stats
+from planetarium.fast_lists import FastListMixin
+from planetarium.fieldsets import FieldsetMixin
+from planetarium.filters import (
+    ShowSessionFilter,
+    TicketSearchFilter,
+    tickets_by_show_title,
+    tickets_by_user_email,
+)
 from planetarium.models import (
     AstronomyShow,
     PlanetariumDome,
     Reservation,
+    SeatHold,
     ShowSession,
     ShowTheme,
     Ticket,
 )
+from planetarium.pagination import (
+    KeysetPaginationMixin,
+    ShowSessionKeysetPagination,
+    TicketKeysetPagination,
+)
 from planetarium.permissions import (
     IsAdminAllORIsAuthenticatedOrReadOnly,
     IsOwnerOrAdmin
 )
+from planetarium.replicas import ReplicaReadMixin
+from planetarium.search import FullTextSearchFilter
+from planetarium.seat_events import (
+    get_seat_event_broker,
+    seat_event_params,
+    wait_for_events,
+)
+from planetarium.seat_map import get_seat_map
 from planetarium.serializers import (
     AstronomyShowListSerializer,
     AstronomyShowRetrieveSerializer,
     AstronomyShowSerializer,
+    AstronomyShowValuesListSerializer,
     PlanetariumDomeSerializer,
+    ReservationBookingSerializer,
+    ReservationBulkCancelSerializer,
+    ReservationDetailSerializer,
     ReservationSerializer,
+    SeatHoldConfirmSerializer,
+    SeatHoldSerializer,
     ShowSessionListSerializer,
     ShowSessionRetrieveSerializer,
     ShowSessionSerializer,
+    ShowSessionValuesListSerializer,
     ShowThemeSerializer,
     TickerRetrieveSerializer,
     TicketListSerializer,
     TicketSerializer,
+    TicketValuesListSerializer,
+    UpcomingShowSessionSerializer,
 )
 
 
-class ShowThemeViewSet(viewsets.ModelViewSet):
+class ShowThemeViewSet(
+    CachedResponseMixin,
+    ReplicaReadMixin,
+    FieldsetMixin,
+    viewsets.ModelViewSet
+):
+    throttle_scope = "catalog"
+    cache_models = (ShowTheme,)
     queryset = ShowTheme.objects.all()
     serializer_class = ShowThemeSerializer
 
 
-class AstronomyShowViewSet(viewsets.ModelViewSet):
+class AstronomyShowViewSet(
+    CachedResponseMixin,
+    ReplicaReadMixin,
+    FastListMixin,
+    FieldsetMixin,
+    viewsets.ModelViewSet
+):
+    throttle_scope = "catalog"
+    cache_models = (AstronomyShow, ShowTheme)
     queryset = AstronomyShow.objects.all()
     serializer_class = AstronomyShowSerializer
-    filter_backends = [filters.SearchFilter]
-    search_fields = [
-        "title",
-        "description"
-    ]
-
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        if self.action in ["list", "retrieve"]:
-            return queryset.prefetch_related("show_theme")
-        return queryset
+    fast_list_serializer_class = AstronomyShowValuesListSerializer
+    filter_backends = [FullTextSearchFilter]
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -59,29 +113,41 @@ class AstronomyShowViewSet(viewsets.ModelViewSet):
         return super().get_serializer_class()
 
 
-class PlanetariumDomeViewSet(viewsets.ModelViewSet):
+class PlanetariumDomeViewSet(
+    CachedResponseMixin,
+    ReplicaReadMixin,
+    FieldsetMixin,
+    viewsets.ModelViewSet
+):
+    throttle_scope = "catalog"
+    cache_models = (PlanetariumDome,)
     queryset = PlanetariumDome.objects.all()
     serializer_class = PlanetariumDomeSerializer
 
 
-class ShowSessionViewSet(viewsets.ModelViewSet):
+class ShowSessionViewSet(
+    CachedResponseMixin,
+    ReplicaReadMixin,
+    FastListMixin,
+    FieldsetMixin,
+    KeysetPaginationMixin,
+    viewsets.ModelViewSet
+):
+    throttle_scope = "catalog"
+    cache_models = (
+        ShowSession,
+        AstronomyShow,
+        ShowTheme,
+        PlanetariumDome,
+        Ticket,
+        SeatHold,
+    )
     queryset = ShowSession.objects.all()
     serializer_class = ShowSessionSerializer
+    fast_list_serializer_class = ShowSessionValuesListSerializer
     pagination_class = PageNumberPagination
-
-    def get_queryset(self):
-        queryset = self.queryset
-        if self.action == "list":
-            return queryset.prefetch_related(
-                "astronomy_show",
-                "planetarium_dome"
-            )
-        if self.action == "retrieve":
-            return queryset.prefetch_related(
-                "astronomy_show__show_theme",
-                "planetarium_dome"
-            )
-        return queryset
+    keyset_pagination_class = ShowSessionKeysetPagination
+    filterset_class = ShowSessionFilter
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -90,54 +156,269 @@ class ShowSessionViewSet(viewsets.ModelViewSet):
             return ShowSessionRetrieveSerializer
         return ShowSessionSerializer
 
+    @action(detail=True, methods=["get"], url_path="seat-map")
+    def seat_map(self, request, pk=None):
+        """Seat occupancy as run lengths or, with ?encoding=binary, a bitmap"""
+        try:
+            # Read before the map, so seat-events replays anything newer.
+            last_event_id = get_seat_event_broker().last_event_id(int(pk))
+            seat_map = get_seat_map(int(pk))
+        except (ValueError, ShowSession.DoesNotExist):
+            raise Http404
+        if request.query_params.get("encoding") == "binary":
+            response = HttpResponse(
+                seat_map.to_bytes(),
+                content_type="application/octet-stream"
+            )
+            response["X-Seat-Map-Rows"] = seat_map.rows
+            response["X-Seat-Map-Seats-In-Row"] = seat_map.seats_in_row
+            response["X-Seat-Map-Last-Event-Id"] = last_event_id
+            return response
+        return Response({
+            "show_session": int(pk),
+            "last_event_id": last_event_id,
+            **seat_map.summary(),
+        })
+
+    @action(detail=True, methods=["get"], url_path="seat-events")
+    def seat_events(self, request, pk=None):
+        """
+        Long-poll for seat changes after ?after=<event id>.
 
-class ReservationViewSet(viewsets.ModelViewSet):
+        Waits up to ?timeout seconds for the first change. Without
+        ?after, only changes from now on are returned.
+        """
+        after, timeout = seat_event_params(
+            request.query_params,
+            request.headers
+        )
+        show_session = self.get_object()
+        if after is None:
+            after = get_seat_event_broker().last_event_id(show_session.pk)
+        last_event_id, events = wait_for_events(
+            show_session.pk,
+            after,
+            timeout
+        )
+        return Response({
+            "show_session": show_session.pk,
+            "last_event_id": last_event_id,
+            "events": events,
+        })
+
+    @action(detail=True, methods=["get"], url_path="best-seats")
+    def best_seats(self, request, pk=None):
+        """The most central free seats for a group, adjacent if possible"""
+        try:
+            count = int(request.query_params.get("count", 1))
+        except ValueError:
+            count = 0
+        if count < 1:
+            raise ValidationError({"count": "Must be a positive integer."})
+        try:
+            seat_map = get_seat_map(int(pk))
+        except (ValueError, ShowSession.DoesNotExist):
+            raise Http404
+        seats = seat_map.best_seats(count)
+        if seats is None:
+            return Response(
+                {"detail": f"Fewer than {count} seats are free."},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response({
+            "show_session": int(pk),
+            "contiguous": len({row for row, _ in seats}) == 1 and (
+                seats[-1][1] - seats[0][1] == count - 1
+            ),
+            "tickets": [{"row": row, "seat": seat} for row, seat in seats],
+        })
+
+
+class ReservationViewSet(
+    CachedResponseMixin,
+    ReplicaReadMixin,
+    FieldsetMixin,
+    viewsets.ModelViewSet
+):
+    throttle_scope = "catalog"
+    write_throttle_scope = "booking"
     permission_classes = [
         IsAdminAllORIsAuthenticatedOrReadOnly,
         IsOwnerOrAdmin
     ]
+    cache_models = (
+        Reservation,
+        Ticket,
+        ShowSession,
+        AstronomyShow,
+        PlanetariumDome,
+        get_user_model(),
+    )
+    cache_per_user = True
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ["user__email"]
+    fieldset_sources = ("user",)
 
     def get_queryset(self):
         queryset = self.queryset
         if self.request.user.is_authenticated:
             queryset = queryset.filter(user=self.request.user)
-        if self.action == "list":
-            return queryset.prefetch_related("user")
         return queryset
 
+    def get_serializer_class(self):
+        if self.action in ("list", "retrieve"):
+            return ReservationDetailSerializer
+        if self.action == "book":
+            return ReservationBookingSerializer
+        if self.action == "hold":
+            return SeatHoldSerializer
+        if self.action == "confirm":
+            return SeatHoldConfirmSerializer
+        if self.action == "bulk_cancel":
+            return ReservationBulkCancelSerializer
+        if self.action == "upcoming":
+            return UpcomingShowSessionSerializer
+        return ReservationSerializer
+
+    @action(detail=False, methods=["get"])
+    def upcoming(self, request):
+        """The user's upcoming show sessions with their seats"""
+        user_tickets = Ticket.objects.filter(reservation__user=request.user)
+        queryset = ShowSession.objects.filter(
+            show_time__gte=timezone.now(),
+            pk__in=user_tickets.values("show_session")
+        ).select_related(
+            "astronomy_show",
+            "planetarium_dome"
+        ).prefetch_related(
+            Prefetch("tickets", queryset=user_tickets, to_attr="user_tickets")
+        ).order_by("show_time", "id")
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[IsAuthenticated]
+    )
+    def book(self, request):
+        """Create a reservation with all its tickets in one transaction"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[IsAuthenticated]
+    )
+    def hold(self, request):
+        """Hold seats for checkout until they are confirmed or expire"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[IsAuthenticated]
+    )
+    def confirm(self, request):
+        """Turn a seat hold into a reservation with its tickets"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     def perform_create(self, serializer):
         if self.request.user:
             serializer.save(user=self.request.user)
 
+    @action(detail=False, methods=["post"], url_path="bulk-cancel")
+    def bulk_cancel(self, request):
+        """
+        Cancel many reservations in one transaction.
+
+        Pass reservation ids, or a show_session to cancel every ticket
+        for it (e.g. when the show is cancelled; the 5-hour cutoff does
+        not apply then). Reservations left without tickets are deleted.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        show_session = data.get("show_session")
+        if show_session is not None:
+            reservations = Reservation.objects.filter(
+                tickets__show_session=show_session
+            ).distinct()
+        else:
+            reservations = Reservation.objects.filter(
+                pk__in=data["reservations"]
+            )
+            late = reservations_past_cutoff(reservations)
+            if late:
+                raise ValidationError({
+                    "reservations": late,
+                    "detail": "Impossible delete a reservation "
+                              "5 hours before the show.",
+                })
+        reservation_count, ticket_count = cancel_reservations(
+            reservations,
+            show_session=show_session
+        )
+        return Response({
+            "reservations": reservation_count,
+            "tickets": ticket_count,
+        })
+
     def perform_destroy(self, instance):
-        for ticket in instance.tickets.all():
-            time_diff = ticket.show_session.show_time - timezone.now()
-            if time_diff.total_seconds() < 5 * 3600:
-                raise ValidationError(
-                    "Impossible delete a reservation 5 hours before the show."
-                )
+        show_time = first_show_time([instance])
+        if show_time and show_time - timezone.now() < CANCELLATION_CUTOFF:
+            raise ValidationError(
+                "Impossible delete a reservation 5 hours before the show."
+            )
         instance.delete()
 
 
-class TicketViewSet(viewsets.ModelViewSet):
+class TicketViewSet(
+    CachedResponseMixin,
+    ReplicaReadMixin,
+    FastListMixin,
+    FieldsetMixin,
+    KeysetPaginationMixin,
+    viewsets.ModelViewSet
+):
+    throttle_scope = "catalog"
+    write_throttle_scope = "booking"
     permission_classes = [
         IsAdminAllORIsAuthenticatedOrReadOnly,
         IsOwnerOrAdmin
     ]
+    cache_models = (
+        Ticket,
+        Reservation,
+        ShowSession,
+        AstronomyShow,
+        ShowTheme,
+        PlanetariumDome,
+        get_user_model(),
+    )
+    cache_per_user = True
     queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
-    filter_backends = [filters.SearchFilter]
+    fast_list_serializer_class = TicketValuesListSerializer
+    filter_backends = [TicketSearchFilter]
     pagination_class = PageNumberPagination
-    search_fields = [
-        "row",
-        "seat",
-        "reservation__user__email",
-        "show_session__astronomy_show__title",
-    ]
+    keyset_pagination_class = TicketKeysetPagination
+    fieldset_sources = ("reservation.user",)
 
     @staticmethod
     def _params_to_ints(query_string):
@@ -150,21 +431,27 @@ class TicketViewSet(viewsets.ModelViewSet):
         email = self.request.GET.get("email")
 
         if title:
-            queryset = queryset.filter(
-                show_session__astronomy_show__title__icontains=title
-            )
+            queryset = queryset.filter(tickets_by_show_title(title))
 
         if email:
-            queryset = queryset.filter(
-                reservation__user__email__icontains=email
-            )
+            queryset = queryset.filter(tickets_by_user_email(email))
 
-        if self.action == "list":
-            return queryset.select_related(
-                "show_session__astronomy_show",
-                "reservation__user",
-            )
-        return queryset.distinct()
+        return queryset.select_related("reservation")
+
+    def perform_create(self, serializer):
+        # Seats held by anyone but the reservation's user stay theirs.
+        data = serializer.validated_data
+        seats = [(data["row"], data["seat"])]
+        try:
+            with transaction.atomic():
+                claim_seats(
+                    data["reservation"].user,
+                    data["show_session"],
+                    seats
+                )
+                serializer.save()
+        except IntegrityError:
+            raise SeatsUnavailable(seats)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -172,3 +459,26 @@ class TicketViewSet(viewsets.ModelViewSet):
         if self.action == "retrieve":
             return TickerRetrieveSerializer
         return TicketSerializer
+
+
+class DatabaseHealthView(APIView):
+    """
+    Query latency and connection pool metrics of this process.
+
+    Answers 503 when the database does not answer a query.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            latency_ms = ping_database()
+        except OperationalError:
+            return Response(
+                {"detail": "Database unavailable."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        return Response({
+            "latency_ms": latency_ms,
+            "pool": pool_stats(),
+        })
@@ -11,6 +11,9 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "planetarium_service.settings")
+os.environ.setdefault(
+    "DJANGO_SETTINGS_MODULE",
+    "planetarium_service.settings.dev"
+)
 
 application = get_asgi_application()
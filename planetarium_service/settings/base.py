@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     "django_filters",
     "debug_toolbar",
     "rest_framework_simplejwt",
+    "rest_framework_simplejwt.token_blacklist",
     "django_extensions",
 
     "planetarium",
@@ -82,6 +83,10 @@ TEMPLATES = [
 WSGI_APPLICATION = "planetarium_service.wsgi.application"
 
 
+# Reads of the planetarium viewsets go to the aliases listed in
+# PLANETARIUM_DATABASE_REPLICAS, if any; see planetarium.replicas.
+DATABASE_ROUTERS = ["planetarium.replicas.ReplicaRouter"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -130,21 +135,36 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "accounts.User"
 
+# Cache
+# Local memory by default; production settings switch to Redis so that
+# cached responses and invalidation are shared by every worker.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "planetarium",
+    }
+}
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_FILTER_BACKENDS": (
         "django_filters.rest_framework.DjangoFilterBackend",
     ),
     "DEFAULT_THROTTLE_CLASSES": (
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "planetarium.throttling.ScopedSlidingWindowThrottle",
     ),
+    # Views name their scope with throttle_scope (and write_throttle_scope
+    # for unsafe methods); "anon" and "user" cover the others.
     "DEFAULT_THROTTLE_RATES": {
         "anon": "31/day",
-        "user": "365/day"
+        "user": "365/day",
+        "catalog": "300/min",
+        "booking": "30/min",
+        "token": "10/min",
     },
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
@@ -159,12 +179,21 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(minutes=120),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
-    "UPDATE_LAST_LOGIN": True,
+    # Logins are recorded at most hourly by the accounts serializer.
+    "UPDATE_LAST_LOGIN": False,
+    "TOKEN_OBTAIN_SERIALIZER": (
+        "accounts.serializers.TokenObtainPairSerializer"
+    ),
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.TokenRefreshSerializer",
+    "TOKEN_VERIFY_SERIALIZER": "accounts.serializers.TokenVerifySerializer",
+    "TOKEN_BLACKLIST_SERIALIZER": (
+        "accounts.serializers.TokenBlacklistSerializer"
+    ),
 }
 
 SPECTACULAR_SETTINGS = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
     ),
     "TITLE": "Planetarium API",
     "DESCRIPTION": "Planetarium Ticket Booking API.",
@@ -10,7 +10,24 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        # Take the write lock when a transaction starts so concurrent
+        # bookings wait for each other instead of failing to upgrade.
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
+        # A file database lets threaded tests share one database.
+        "TEST": {
+            "NAME": os.path.join(BASE_DIR, "test_db.sqlite3"),
+        },
     }
 }
 
+# A second connection to the same file stands in for a read replica.
+# Set PLANETARIUM_DATABASE_REPLICAS = ["replica"] to read from it.
+DATABASES["replica"] = {
+    **DATABASES["default"],
+    "TEST": {"MIRROR": "default"},
+}
+
 SESSION_ENGINE = "django.contrib.sessions.backends.db"
\ No newline at end of file
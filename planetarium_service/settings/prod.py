@@ -22,3 +22,47 @@ DATABASES = {
     }
 }
 
+# Connections are checked before use, so one the server dropped is
+# replaced instead of failing a request.
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Each process keeps a psycopg pool of open connections. With
+# POSTGRES_POOL=false every thread keeps a persistent connection instead.
+if os.environ.get("POSTGRES_POOL", "true").lower() in ("1", "true", "yes"):
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("POSTGRES_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.environ.get("POSTGRES_POOL_MAX_SIZE", 10)),
+            "timeout": float(os.environ.get("POSTGRES_POOL_TIMEOUT", 10)),
+            "max_idle": float(os.environ.get("POSTGRES_POOL_MAX_IDLE", 600)),
+        },
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(
+        os.environ.get("POSTGRES_CONN_MAX_AGE", 60)
+    )
+
+# Read replicas, as a comma-separated list of hosts sharing the
+# primary's credentials.
+PLANETARIUM_DATABASE_REPLICAS = []
+for index, host in enumerate(
+    filter(None, os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(","))
+):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {**DATABASES["default"], "HOST": host.strip()}
+    PLANETARIUM_DATABASE_REPLICAS.append(alias)
+
+PLANETARIUM_REPLICA_PIN_SECONDS = int(
+    os.environ.get("POSTGRES_REPLICA_PIN_SECONDS", 10)
+)
+
+# Cache
+CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": os.environ.get("REDIS_URL", "redis://redis:6379/0"),
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+        },
+    }
+}